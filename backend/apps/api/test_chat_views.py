@@ -0,0 +1,154 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+
+class ChatApiTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        override = override_settings(GIT_REPO_ROOT=self.storage_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = APIClient()
+
+    def _sync(self, provider, messages, title='Captured'):
+        return self.client.post('/v1/chats', {
+            'title': title,
+            'provider': provider,
+            'conversation_id': 'conv-1',
+            'messages': messages,
+        }, format='json')
+
+    def _read_messages(self, chat_id):
+        response = self.client.get(f'/v1/chats/{chat_id}/messages')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_sync_same_conversation_updates_existing_chat(self):
+        first = self._sync('ChatGPT', [{'role': 'user', 'content': 'hi'}])
+        self.assertEqual(first.status_code, 201)
+
+        second = self._sync('chatgpt', [
+            {'role': 'user', 'content': 'hi'},
+            {'role': 'assistant', 'content': 'hello'},
+        ], title='Renamed')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['id'], first.json()['id'])
+
+        chat_files = list((Path(self.storage_root) / 'chats').glob('chat-*.json'))
+        self.assertEqual(len(chat_files), 1)
+        detail = self.client.get(f"/v1/chats/{first.json()['id']}").json()
+        self.assertEqual(detail['title'], 'Renamed')
+
+    def test_append_messages_extends_log(self):
+        chat_id = self._sync('Claude', [{'role': 'user', 'content': 'hi'}]).json()['id']
+
+        response = self.client.post(f'/v1/chats/{chat_id}/messages', {
+            'messages': [
+                {'role': 'assistant', 'content': 'hello'},
+                {'role': 'user', 'content': 'again'},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message_count'], 3)
+        self.assertEqual(response.json()['turn_count'], 2)
+
+        messages = self._read_messages(chat_id)['messages']
+        self.assertEqual([m['content'] for m in messages], ['hi', 'hello', 'again'])
+
+        log_path = Path(self.storage_root) / 'chats' / f'chat-{chat_id}.messages.jsonl'
+        self.assertEqual(len(log_path.read_text(encoding='utf-8').splitlines()), 3)
+
+    def test_resync_with_edited_history_rewrites_log(self):
+        chat_id = self._sync('Claude', [
+            {'role': 'user', 'content': 'hi'},
+            {'role': 'assistant', 'content': 'draft'},
+        ]).json()['id']
+        self._sync('Claude', [
+            {'role': 'user', 'content': 'hi'},
+            {'role': 'assistant', 'content': 'final'},
+        ])
+
+        data = self._read_messages(chat_id)
+        self.assertEqual([m['content'] for m in data['messages']], ['hi', 'final'])
+        self.assertEqual(data['turn_count'], 1)
+
+    def test_append_converts_legacy_single_file_chat(self):
+        chat_dir = Path(self.storage_root) / 'chats'
+        chat_dir.mkdir(parents=True, exist_ok=True)
+        (chat_dir / 'chat-legacy.json').write_text(json.dumps({
+            'id': 'legacy',
+            'title': 'Old chat',
+            'messages': [{'role': 'user', 'content': 'before'}],
+        }), encoding='utf-8')
+
+        response = self.client.post('/v1/chats/legacy/messages', {
+            'messages': [{'role': 'assistant', 'content': 'after'}],
+        }, format='json')
+        self.assertEqual(response.json()['message_count'], 2)
+
+        header = json.loads((chat_dir / 'chat-legacy.json').read_text(encoding='utf-8'))
+        self.assertNotIn('messages', header)
+        messages = self._read_messages('legacy')['messages']
+        self.assertEqual([m['content'] for m in messages], ['before', 'after'])
+
+    def test_metadata_update_leaves_message_log_untouched(self):
+        chat_id = self._sync('Claude', [{'role': 'user', 'content': 'hi'}]).json()['id']
+        log_path = Path(self.storage_root) / 'chats' / f'chat-{chat_id}.messages.jsonl'
+        before = log_path.stat()
+
+        response = self.client.put(f'/v1/chats/{chat_id}', {'title': 'Renamed', 'labels': ['x']}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        after = log_path.stat()
+        self.assertEqual((before.st_ino, before.st_mtime_ns), (after.st_ino, after.st_mtime_ns))
+        detail = self.client.get(f'/v1/chats/{chat_id}').json()
+        self.assertEqual(detail['title'], 'Renamed')
+        self.assertEqual(detail['turn_count'], 1)
+        messages = self._read_messages(chat_id)['messages']
+        self.assertEqual(len(messages), 1)
+
+    def test_messages_can_be_read_by_range(self):
+        messages = [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': str(i)} for i in range(10)]
+        chat_id = self._sync('Claude', messages[:6]).json()['id']
+        self.client.post(f'/v1/chats/{chat_id}/messages', {'messages': messages[6:]}, format='json')
+        url = f'/v1/chats/{chat_id}/messages'
+
+        latest = self.client.get(url, {'limit': 3}).json()
+        self.assertEqual([m['content'] for m in latest['messages']], ['7', '8', '9'])
+        self.assertEqual((latest['start'], latest['end'], latest['message_count']), (7, 10, 10))
+        self.assertTrue(latest['has_more_before'])
+
+        previous = self.client.get(url, {'limit': 3, 'before': latest['start']}).json()
+        self.assertEqual([m['content'] for m in previous['messages']], ['4', '5', '6'])
+
+        newer = self.client.get(url, {'after': 2, 'limit': 2}).json()
+        self.assertEqual([m['content'] for m in newer['messages']], ['3', '4'])
+
+        page = self.client.get(url, {'offset': 8, 'limit': 5}).json()
+        self.assertEqual([m['content'] for m in page['messages']], ['8', '9'])
+        self.assertFalse(page['has_more_after'])
+
+        self.assertEqual(self.client.get(url, {'offset': -1}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': 0}).status_code, 400)
+        self.assertEqual(len(self.client.get(url, {'limit': 5000}).json()['messages']), 10)
+
+    def test_full_messages_response_is_streamed(self):
+        chat_id = self._sync('Claude', [{'role': 'user', 'content': 'héllo'}]).json()['id']
+
+        response = self.client.get(f'/v1/chats/{chat_id}/messages')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        # Streamed bodies are not conditional: no ETag, so no 304 on If-None-Match
+        self.assertFalse(response.has_header('ETag'))
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['messages'], [{'role': 'user', 'content': 'héllo'}])
+        self.assertEqual((data['turn_count'], data['message_count']), (1, 1))
+
+        response = self.client.get(f'/v1/chats/{chat_id}/messages', {'stream': '1'}, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), data)
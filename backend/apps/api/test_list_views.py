@@ -0,0 +1,317 @@
+import shutil
+import tempfile
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+class ListViewsApiTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        override = override_settings(GIT_REPO_ROOT=self.storage_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = APIClient()
+
+    def _create_prompt(self, title, labels=None):
+        response = self.client.post('/v1/prompts', {
+            'title': title,
+            'content': f'{title} body',
+            'labels': labels or [],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['id']
+
+    def test_prompts_list_paginates_with_cursor(self):
+        ids = [self._create_prompt(f'Prompt {i}') for i in range(3)]
+
+        response = self.client.get('/v1/prompts', {'limit': 2})
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['total'], 3)
+        self.assertEqual([item['id'] for item in data['items']], ids[:0:-1])
+        self.assertNotIn('file_path', data['items'][0])
+
+        response = self.client.get('/v1/prompts', {'limit': 2, 'cursor': data['next_cursor']})
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['items']], ids[:1])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_lists_sort_by_other_keys_with_cursor(self):
+        for title in ('Bravo', 'alpha', 'Charlie'):
+            self._create_prompt(title)
+
+        titles = []
+        cursor = None
+        for _ in range(3):
+            data = self.client.get('/v1/prompts', {'sort': 'title', 'limit': 1, 'cursor': cursor}
+                                   if cursor else {'sort': 'title', 'limit': 1}).json()
+            titles.extend(item['title'] for item in data['items'])
+            cursor = data['next_cursor']
+        self.assertEqual(titles, ['Bravo', 'Charlie', 'alpha'])
+        self.assertIsNone(cursor)
+
+        data = self.client.get('/v1/search', {'type': 'prompt', 'sort': '-title', 'limit': 2}).json()
+        self.assertEqual([item['title'] for item in data['items']], ['alpha', 'Charlie'])
+        data = self.client.get('/v1/search', {'type': 'prompt', 'sort': '-title', 'cursor': data['next_cursor']}).json()
+        self.assertEqual([item['title'] for item in data['items']], ['Bravo'])
+
+        for turns in (2, 5, 1):
+            self.client.post('/v1/chats', {
+                'title': f'{turns} turns', 'messages': [{'role': 'user', 'content': 'hi'}] * turns,
+            }, format='json')
+        data = self.client.get('/v1/chats', {'sort': '-turn_count'}).json()
+        self.assertEqual([item['title'] for item in data['items']], ['5 turns', '2 turns', '1 turns'])
+
+        self.assertEqual(self.client.get('/v1/prompts', {'sort': 'turn_count'}).status_code, 400)
+        self.assertEqual(self.client.get('/v1/search', {'sort': 'size'}).status_code, 400)
+
+    def test_prompts_list_filters_labels(self):
+        self._create_prompt('Tagged', labels=['a', 'b'])
+        self._create_prompt('Other', labels=['a'])
+
+        data = self.client.get('/v1/prompts', {'labels': ['a', 'b']}).json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['items'][0]['title'], 'Tagged')
+
+    def test_chats_list_filters_provider_case_insensitively(self):
+        self.client.post('/v1/chats', {
+            'title': 'Captured',
+            'provider': 'ChatGPT',
+            'conversation_id': 'abc',
+            'messages': [{'role': 'user', 'content': 'hi'}],
+        }, format='json')
+        self.client.post('/v1/chats', {'title': 'Manual'}, format='json')
+
+        data = self.client.get('/v1/chats', {'provider': 'chatgpt'}).json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['items'][0]['provider'], 'ChatGPT')
+        self.assertNotIn('messages', data['items'][0])
+
+    def test_labels_filter_any_mode_and_label_counts(self):
+        self._create_prompt('A', labels=['a'])
+        self._create_prompt('B', labels=['b'])
+        self._create_prompt('C', labels=['c', 'a'])
+
+        data = self.client.get('/v1/prompts', {'labels': ['a', 'b'], 'labels_mode': 'any'}).json()
+        self.assertEqual(sorted(item['title'] for item in data['items']), ['A', 'B', 'C'])
+
+        data = self.client.get('/v1/labels', {'type': 'prompt'}).json()
+        self.assertEqual(data['labels'][0], {'label': 'a', 'count': 2})
+        self.assertEqual(data['count'], 3)
+
+        # Relabeling replaces the item's label rows
+        prompt_id = self.client.get('/v1/prompts', {'labels': ['c']}).json()['items'][0]['id']
+        self.client.put(f'/v1/prompts/{prompt_id}', {'title': 'C', 'labels': ['d']}, format='json')
+        self.assertEqual(self.client.get('/v1/prompts', {'labels': ['c']}).json()['total'], 0)
+        self.assertEqual(self.client.get('/v1/labels', {'prefix': 'd'}).json()['labels'],
+                         [{'label': 'd', 'count': 1}])
+
+    def test_search_ranks_full_text_matches(self):
+        self._create_prompt('Release notes writer')
+        self._create_prompt('Translator', labels=['release'])
+        self._create_prompt('Summarizer')
+
+        data = self.client.get('/v1/search', {'q': 'releas'}).json()
+        self.assertEqual([item['title'] for item in data['items']], ['Release notes writer', 'Translator'])
+
+        first = self.client.get('/v1/search', {'q': 'releas', 'limit': 1}).json()
+        self.assertEqual(first['items'][0]['title'], 'Release notes writer')
+        second = self.client.get('/v1/search', {'q': 'releas', 'limit': 1, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([item['title'] for item in second['items']], ['Translator'])
+        self.assertIsNone(second['next_cursor'])
+
+        # Renames are picked up by the index writes
+        prompt_id = self.client.get('/v1/search', {'q': 'summarizer'}).json()['items'][0]['id']
+        self.client.put(f'/v1/prompts/{prompt_id}', {'title': 'Digest'}, format='json')
+        self.assertEqual(self.client.get('/v1/search', {'q': 'dig'}).json()['count'], 1)
+        # The old title is still in the body
+        hit = self.client.get('/v1/search', {'q': 'summarizer'}).json()['items'][0]
+        self.assertEqual(hit['title'], 'Digest')
+        self.assertEqual(hit['snippet'], '<mark>Summarizer</mark> body')
+
+        # A table remake drops indexed_items' triggers and may renumber its rowids
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'indexed_items'")
+            for name, in cursor.fetchall():
+                cursor.execute(f'DROP TRIGGER "{name}"')
+            cursor.execute("UPDATE indexed_items SET rowid = rowid + 1000")
+        self.assertEqual([item['title'] for item in self.client.get('/v1/search', {'q': 'release'}).json()['items']],
+                         ['Release notes writer', 'Translator'])
+        self.client.delete(f'/v1/prompts/{prompt_id}')
+        self.assertEqual(self.client.get('/v1/search', {'q': 'dig'}).json()['count'], 0)
+
+    def test_search_matches_head_content_and_chat_messages(self):
+        prompt_id = self._create_prompt('Reviewer')
+        self.client.post(f'/v1/prompts/{prompt_id}/versions', {
+            'version_number': '2', 'content': 'Check the migration for locking issues',
+        }, format='json')
+        chat_id = self.client.post('/v1/chats', {
+            'title': 'Standup',
+            'messages': [{'role': 'user', 'content': 'hello'}],
+        }, format='json').json()['id']
+        self.client.post(f'/v1/chats/{chat_id}/messages', {
+            'messages': [{'role': 'assistant', 'content': [{'type': 'text', 'text': 'Locking is fine here'}]}],
+        }, format='json')
+
+        data = self.client.get('/v1/search', {'q': 'locking'}).json()
+        hits = {item['id']: item for item in data['items']}
+        self.assertEqual(set(hits), {prompt_id, chat_id})
+        self.assertEqual(hits[prompt_id]['snippet'], 'Check the migration for <mark>locking</mark> issues')
+        self.assertIsNone(hits[prompt_id]['snippet_message'])
+        self.assertEqual(hits[chat_id]['snippet_message'], 1)
+
+        # Only the HEAD version is searchable
+        self.assertEqual(self.client.get('/v1/search', {'q': 'reviewer body'}).json()['count'], 0)
+        self.assertEqual(self.client.get('/v1/search', {'q': 'locking', 'type': 'chat'}).json()['count'], 1)
+
+        self.client.delete(f'/v1/chats/{chat_id}')
+        self.assertEqual(self.client.get('/v1/search', {'q': 'locking'}).json()['count'], 1)
+
+    def test_search_facets_count_the_filtered_set(self):
+        self._create_prompt('Alpha', labels=['a'])
+        self._create_prompt('Beta', labels=['a', 'b'])
+        self.client.post('/v1/chats', {
+            'title': 'Alpha chat', 'provider': 'Claude', 'model': 'opus', 'labels': ['a'],
+        }, format='json')
+
+        facets = self.client.get('/v1/search/facets').json()['facets']
+        self.assertEqual(facets['labels'], [{'value': 'a', 'count': 3}, {'value': 'b', 'count': 1}])
+        self.assertEqual(facets['type'], [{'value': 'prompt', 'count': 2}, {'value': 'chat', 'count': 1}])
+        self.assertEqual(facets['provider'], [{'value': 'Claude', 'count': 1}])
+
+        data = self.client.get('/v1/search', {'q': 'alpha', 'facets': 1}).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['facets']['type'], [{'value': 'chat', 'count': 1}, {'value': 'prompt', 'count': 1}])
+        self.assertEqual(data['facets']['labels'], [{'value': 'a', 'count': 2}])
+
+        # Cached counts are dropped on index writes
+        self._create_prompt('Gamma', labels=['b'])
+        facets = self.client.get('/v1/search/facets').json()['facets']
+        self.assertEqual(facets['labels'], [{'value': 'a', 'count': 3}, {'value': 'b', 'count': 2}])
+
+    def test_fuzzy_search_tolerates_typos(self):
+        summarizer = self._create_prompt('Meeting summarizer', labels=['productivity'])
+        self._create_prompt('Code reviewer', labels=['engineering'])
+        self._create_prompt('Translator')
+
+        self.assertEqual(self.client.get('/v1/search', {'q': 'sumarizer'}).json()['count'], 0)
+
+        data = self.client.get('/v1/search', {'q': 'sumarizer', 'fuzzy': 1}).json()
+        self.assertEqual([item['id'] for item in data['items']], [summarizer])
+        self.assertGreaterEqual(data['items'][0]['similarity'], 0.3)
+
+        # Labels are matched too, and filters still apply
+        data = self.client.get('/v1/search', {'q': 'productivty', 'fuzzy': 1, 'type': 'prompt'}).json()
+        self.assertEqual([item['id'] for item in data['items']], [summarizer])
+        data = self.client.get('/v1/search', {'q': 'productivty', 'fuzzy': 1, 'type': 'chat'}).json()
+        self.assertEqual(data['count'], 0)
+
+        # Renamed items are re-indexed
+        self.client.put(f'/v1/prompts/{summarizer}', {'title': 'Meeting notes'}, format='json')
+        data = self.client.get('/v1/search', {'q': 'sumarizer', 'fuzzy': 1}).json()
+        self.assertEqual(data['count'], 0)
+
+    def test_search_results_are_cached_until_the_index_changes(self):
+        from backend.apps.core.services.db_index_service import DBIndexService, search_cache
+
+        self._create_prompt('Alpha', labels=['x', 'y'])
+        first = self.client.get('/v1/search', {'q': 'Alpha', 'labels': ['x', 'y']}).json()
+        self.assertEqual(first['count'], 1)
+
+        # Equivalent parameters share the cached result, validated without reading the index
+        hits = search_cache.stats()['hits']
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get('/v1/search', {'q': '  alpha ', 'labels': ['y', 'x', 'x']}).json()
+        self.assertEqual(again['items'], first['items'])
+        self.assertEqual(search_cache.stats()['hits'], hits + 1)
+        self.assertFalse([query for query in queries if 'index_generation' in query['sql']])
+
+        generation = DBIndexService.generation()
+        self._create_prompt('Alpha two', labels=['x', 'y'])
+        self.assertGreater(DBIndexService.generation(), generation)
+        data = self.client.get('/v1/search', {'q': 'alpha', 'labels': ['x', 'y']}).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(search_cache.stats()['hits'], hits + 1)
+
+    @override_settings(VECTOR_SEARCH_ENABLED=True)
+    def test_similar_search_by_item_and_text(self):
+        french = self._create_prompt('French translator')
+        spanish = self._create_prompt('Spanish translator')
+        self._create_prompt('Pytest writer')
+        chat = self.client.post('/v1/chats', {
+            'title': 'Trip planning', 'messages': [{'role': 'user', 'content': 'translator for my trip'}],
+        }, format='json').json()['id']
+
+        # Prompt bodies share the word 'body', so every prompt scores above zero
+        data = self.client.get('/v1/search/similar', {'id': french, 'type': 'prompt'}).json()
+        self.assertEqual(data['items'][0]['id'], spanish)
+        self.assertNotIn(french, [item['id'] for item in data['items']])
+        self.assertGreater(data['items'][0]['score'], data['items'][1]['score'])
+
+        data = self.client.get('/v1/search/similar', {'q': 'translator'}).json()
+        self.assertEqual(sorted(item['id'] for item in data['items']), sorted([french, spanish, chat]))
+
+        self.assertEqual(self.client.get('/v1/search/similar').status_code, 400)
+        self.assertEqual(self.client.get('/v1/search/similar', {'id': 'missing'}).status_code, 404)
+        with self.settings(VECTOR_SEARCH_ENABLED=False):
+            self.assertEqual(self.client.get('/v1/search/similar', {'q': 'translator'}).status_code, 400)
+
+    @override_settings(DUPLICATE_DETECTION_ENABLED=True)
+    def test_duplicates_are_reported_on_create_and_listed_in_clusters(self):
+        body = ('Review the following pull request for correctness, naming, error handling and '
+                'missing tests, then summarize the three most important issues in a short list.')
+        first = self.client.post('/v1/prompts', {'title': 'PR review', 'content': body},
+                                 format='json').json()['id']
+        self._create_prompt('Pytest writer')
+
+        response = self.client.post('/v1/prompts', {
+            'title': 'Code review', 'content': body + ' Be concise.', 'check_duplicates': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        second = response.json()['id']
+        duplicates = response.json()['duplicates']
+        self.assertEqual([item['id'] for item in duplicates], [first])
+        self.assertGreaterEqual(duplicates[0]['similarity'], 0.8)
+
+        data = self.client.get('/v1/duplicates', {'type': 'prompt'}).json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(sorted(item['id'] for item in data['clusters'][0]['items']), sorted([first, second]))
+        self.assertEqual(self.client.get('/v1/duplicates', {'type': 'chat'}).json()['count'], 0)
+        self.assertEqual(self.client.get('/v1/duplicates', {'threshold': '2'}).status_code, 400)
+
+        with self.settings(DUPLICATE_DETECTION_ENABLED=False):
+            self.assertEqual(self.client.get('/v1/duplicates').status_code, 400)
+            response = self.client.post('/v1/prompts', {
+                'title': 'Third review', 'content': body, 'check_duplicates': True,
+            }, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(self.client.get('/v1/prompts').json()['count'], 3)
+
+    def test_content_endpoint_returns_head_with_etag(self):
+        prompt_id = self._create_prompt('Reviewer')
+
+        response = self.client.get(f'/v1/prompts/{prompt_id}/content')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['title'], data['content']), ('Reviewer', 'Reviewer body'))
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        response = self.client.get(f'/v1/prompts/{prompt_id}/content', HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.client.post(f'/v1/prompts/{prompt_id}/versions', {
+            'version_number': '2', 'content': 'Check the migration',
+        }, format='json')
+        response = self.client.get(f'/v1/prompts/{prompt_id}/content', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['content'], 'Check the migration')
+        self.assertNotEqual(response['ETag'], etag)
+
+        self.assertEqual(self.client.get('/v1/prompts/missing/content').status_code, 404)
+        self.assertEqual(self.client.get(f'/v1/templates/{prompt_id}/content').status_code, 404)
@@ -8,12 +8,14 @@ urlpatterns = [
     # Prompts
     path('prompts', views.PromptsListView.as_view(), name='prompts-list'),
     path('prompts/<str:prompt_id>', views.PromptDetailView.as_view(), name='prompt-detail'),
+    path('prompts/<str:prompt_id>/content', views.PromptContentView.as_view(), name='prompt-content'),
     path('prompts/<str:prompt_id>/versions', views.PromptVersionsView.as_view(), name='prompt-versions'),
     path('prompts/<str:prompt_id>/versions/<str:version_id>', views.PromptVersionDetailView.as_view(), name='prompt-version-detail'),
 
     # Templates
     path('templates', views.TemplatesListView.as_view(), name='templates-list'),
     path('templates/<str:template_id>', views.TemplateDetailView.as_view(), name='template-detail'),
+    path('templates/<str:template_id>/content', views.TemplateContentView.as_view(), name='template-content'),
     path('templates/<str:template_id>/versions', views.TemplateVersionsView.as_view(), name='template-versions'),
     path('templates/<str:template_id>/versions/<str:version_id>', views.TemplateVersionDetailView.as_view(), name='template-version-detail'),
 
@@ -24,10 +26,15 @@ urlpatterns = [
 
     # Search (from common API)
     path('search', views.SearchView.as_view(), name='search'),
+    path('search/facets', views.SearchFacetsView.as_view(), name='search-facets'),
+    path('search/similar', views.SimilarSearchView.as_view(), name='search-similar'),
+    path('labels', views.LabelsView.as_view(), name='labels-list'),
+    path('duplicates', views.DuplicatesView.as_view(), name='duplicates'),
 
     # Index management
     path('index/status', views.IndexStatusView.as_view(), name='index-status'),
     path('index/rebuild', views.IndexRebuildView.as_view(), name='index-rebuild'),
+    path('index/reconcile', views.IndexReconcileView.as_view(), name='index-reconcile'),
 
     # DOM Providers for browser extension
     path('providers', views.DomProvidersView.as_view(), name='providers-list'),
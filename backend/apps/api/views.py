@@ -1,15 +1,17 @@
 """
 Unified API views for prompts, templates, and chats.
 """
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 import datetime
+import json
 
-from backend.apps.core.services.file_storage_service import FileStorageService
-from backend.apps.core.services.db_index_service import DBIndexService
-from backend.apps.core.exceptions import ValidationError, BadRequestError
+from backend.apps.core.services.file_storage_service import FileStorageService, head_cache, metadata_cache, version_cache
+from backend.apps.core.services.db_index_service import DBIndexService, search_cache
+from backend.apps.core.services.index_queue import get_index_queue
+from backend.apps.core.exceptions import ValidationError, BadRequestError, ResourceNotFoundError
 from backend.apps.core.domain.itemmetadata import ItemMetadata
 from backend.apps.core.domain.version import TemplateVariable
 from backend.apps.core.domain.chatmetadata import ChatMetadata
@@ -19,6 +21,32 @@ from backend.apps.api.dom_providers import dom_provider_store
 # Prompts
 # ============================================================================
 
+def head_content_response(request, item_type: str, item_id: str):
+    """
+    Respond with an item's metadata and HEAD content, honouring If-None-Match.
+
+    Args:
+        request: Request, possibly carrying If-None-Match
+        item_type: 'prompt' or 'template'
+        item_id: Item ID
+
+    Returns:
+        200 with the content and an ETag, or 304 if the client's copy is current
+    """
+    head = FileStorageService().read_head(item_type, item_id)
+    if_none_match = request.headers.get('If-None-Match', '')
+    etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+
+    if head['etag'] in etags or '*' in etags:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = JsonResponse(head['data'], status=status.HTTP_200_OK)
+    response['ETag'] = head['etag']
+    # Let clients cache the body but revalidate it on every use
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 class PromptsListView(APIView):
     """
     GET /v1/prompts - List all prompts
@@ -27,24 +55,18 @@ class PromptsListView(APIView):
 
     def get(self, request):
         """List all prompts."""
-        storage = FileStorageService()
-        prompts = storage.list_all_items('prompt')
-
-        # Apply filters if provided
         labels = request.query_params.getlist('labels')
         limit = int(request.query_params.get('limit', 100))
+        cursor = request.query_params.get('cursor')
 
-        if labels:
-            prompts = [p for p in prompts if all(label in p.labels for label in labels)]
-
-        # Sort by updated_at descending
-        prompts.sort(key=lambda x: x.updated_at or x.created_at or "", reverse=True)
+        index_service = DBIndexService()
+        results = index_service.list_items(
+            'prompt', labels=labels, limit=limit, cursor=cursor,
+            labels_mode=request.query_params.get('labels_mode', 'all'),
+            sort=request.query_params.get('sort'),
+        )
 
-        return Response({
-            'items': [p.to_summary().__dict__() for p in prompts[:limit]],
-            'count': len(prompts[:limit]),
-            'total': len(prompts),
-        })
+        return Response(results)
 
     def post(self, request):
         """Create a new prompt."""
@@ -59,6 +81,8 @@ class PromptsListView(APIView):
             raise BadRequestError("title is required")
         if not content:
             raise BadRequestError("content is required")
+        if request.data.get('check_duplicates'):
+            DBIndexService().require_duplicate_detection()
 
         metadata = ItemMetadata(
             id='',
@@ -76,11 +100,14 @@ class PromptsListView(APIView):
         storage = FileStorageService()
         item_id, version_id = storage.create_item('prompt', metadata, content, None)
 
-        return JsonResponse({
+        response_data = {
             'success': True,
             'id': item_id,
             'version_id': version_id
-        }, status=status.HTTP_200_OK)
+        }
+        if request.data.get('check_duplicates'):
+            response_data['duplicates'] = DBIndexService().find_duplicates(item_id)
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
 
 
 class PromptDetailView(APIView):
@@ -121,6 +148,16 @@ class PromptDetailView(APIView):
         return JsonResponse({'success': True, 'id': prompt_id}, status=status.HTTP_200_OK)
 
 
+class PromptContentView(APIView):
+    """
+    GET /v1/prompts/{id}/content - Get prompt metadata and HEAD content in one call
+    """
+
+    def get(self, request, prompt_id):
+        """Get prompt metadata with its HEAD version."""
+        return head_content_response(request, 'prompt', prompt_id)
+
+
 class PromptVersionsView(APIView):
     """
     GET /v1/prompts/{id}/versions - List all versions
@@ -203,24 +240,18 @@ class TemplatesListView(APIView):
 
     def get(self, request):
         """List all templates."""
-        storage = FileStorageService()
-        templates = storage.list_all_items('template')
-
-        # Apply filters if provided
         labels = request.query_params.getlist('labels')
         limit = int(request.query_params.get('limit', 100))
+        cursor = request.query_params.get('cursor')
 
-        if labels:
-            templates = [t for t in templates if all(label in t.labels for label in labels)]
-
-        # Sort by updated_at descending
-        templates.sort(key=lambda x: x.updated_at or x.created_at or "", reverse=True)
+        index_service = DBIndexService()
+        results = index_service.list_items(
+            'template', labels=labels, limit=limit, cursor=cursor,
+            labels_mode=request.query_params.get('labels_mode', 'all'),
+            sort=request.query_params.get('sort'),
+        )
 
-        return Response({
-            'items': [t.to_summary().__dict__() for t in templates[:limit]],
-            'count': len(templates[:limit]),
-            'total': len(templates),
-        })
+        return Response(results)
 
     def post(self, request):
         """Create a new template."""
@@ -297,6 +328,16 @@ class TemplateDetailView(APIView):
         return JsonResponse({'success': True, 'id': template_id}, status=status.HTTP_200_OK)
 
 
+class TemplateContentView(APIView):
+    """
+    GET /v1/templates/{id}/content - Get template metadata, HEAD content and variables in one call
+    """
+
+    def get(self, request, template_id):
+        """Get template metadata with its HEAD version."""
+        return head_content_response(request, 'template', template_id)
+
+
 class TemplateVersionsView(APIView):
     """
     GET /v1/templates/{id}/versions - List all versions
@@ -380,28 +421,19 @@ class ChatsListView(APIView):
 
     def get(self, request):
         """List all chats."""
-        storage = FileStorageService()
-        chats = storage.list_all_chats()
-
-        # Apply filters if provided
         provider = request.query_params.get('provider')
         labels = request.query_params.getlist('labels')
         limit = int(request.query_params.get('limit', 100))
+        cursor = request.query_params.get('cursor')
 
-        if provider:
-            chats = [c for c in chats if c.provider and c.provider.lower() == provider.lower()]
-
-        if labels:
-            chats = [c for c in chats if all(label in c.labels for label in labels)]
-
-        # Sort by updated_at descending
-        chats.sort(key=lambda x: x.updated_at or x.created_at or "", reverse=True)
+        index_service = DBIndexService()
+        results = index_service.list_items(
+            'chat', labels=labels, provider=provider, limit=limit, cursor=cursor,
+            labels_mode=request.query_params.get('labels_mode', 'all'),
+            sort=request.query_params.get('sort'),
+        )
 
-        return Response({
-            'items': [c.to_summary().__dict__() for c in chats[:limit]],
-            'count': len(chats[:limit]),
-            'total': len(chats),
-        })
+        return Response(results)
 
     def post(self, request):
         """Create a new chat (or update if provider + conversation_id exists)."""
@@ -410,38 +442,18 @@ class ChatsListView(APIView):
         labels = request.data.get('labels', request.data.get('tags', []))
         provider = request.data.get('provider')
         model = request.data.get('model')
-        conversation_id = request.data.get('conversation_id')
+        conversation_id = request.data.get('conversation_id') or None
         messages = request.data.get('messages', [])
         author = request.data.get('author', 'system')
         now = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
         if not title:
             raise BadRequestError("title is required")
+        if request.data.get('check_duplicates'):
+            DBIndexService().require_duplicate_detection()
 
         storage = FileStorageService()
 
-        # Check for existing chat by provider + conversation_id (for browser extension deduplication)
-        if provider and conversation_id:
-            existing = storage.find_chat_by_conversation(provider, conversation_id)
-
-            if existing:
-                # Update existing chat
-                existing.title = title
-                existing.description = description
-                existing.labels = labels
-                existing.messages = messages
-                existing.updated_at = now
-                existing.model = model or existing.model
-                storage.save_chat(existing)
-
-                return Response({
-                    'success': True,
-                    'id': existing.id,
-                    'updated_at': now,
-                    'message': 'Chat updated',
-                })
-
-        # Create new chat
         chat = ChatMetadata(
             id='',
             title=title,
@@ -457,13 +469,28 @@ class ChatsListView(APIView):
             messages=messages,
         )
 
-        chat_id = storage.create_chat(chat.__dict__())
+        # Deduplicate by provider + conversation_id (browser extension syncs)
+        if provider and conversation_id:
+            chat_id, created = storage.upsert_chat_by_conversation(chat)
 
-        return Response({
+            if not created:
+                return Response({
+                    'success': True,
+                    'id': chat_id,
+                    'updated_at': now,
+                    'message': 'Chat updated',
+                })
+        else:
+            chat_id = storage.create_chat(chat.__dict__())
+
+        response_data = {
             'success': True,
             'id': chat_id,
             'created_at': chat.created_at,
-        }, status=status.HTTP_201_CREATED)
+        }
+        if request.data.get('check_duplicates'):
+            response_data['duplicates'] = DBIndexService().find_duplicates(chat_id)
+        return Response(response_data, status=status.HTTP_201_CREATED)
 
 
 class ChatDetailView(APIView):
@@ -512,19 +539,92 @@ class ChatMessagesView(APIView):
     """
     GET /v1/chats/{id}/messages - Get chat messages
     PUT /v1/chats/{id}/messages - Update chat messages
+    POST/PATCH /v1/chats/{id}/messages - Append chat messages
     """
 
+    # Largest page a single paged request may ask for
+    max_page_size = 1000
+    default_page_size = 100
+    page_params = ('offset', 'limit', 'before', 'after')
+
     def get(self, request, chat_id):
-        """Get chat with full messages."""
+        """
+        Get chat messages.
+
+        Without paging parameters (or with stream=1) all messages are streamed;
+        otherwise only the requested slice is read from disk.
+        """
+        params = request.query_params
         storage = FileStorageService()
+
+        if params.get('stream') in ('1', 'true') or not any(key in params for key in self.page_params):
+            chat, messages = storage.stream_chat_messages(chat_id)
+            return StreamingHttpResponse(
+                self._stream_messages(chat_id, chat, messages),
+                content_type='application/json',
+            )
+
+        offset = self._int_param(params, 'offset')
+        after = self._int_param(params, 'after')
+        before = self._int_param(params, 'before')
+        limit = self._int_param(params, 'limit')
+        if limit == 0:
+            raise BadRequestError("limit must be positive")
+        limit = min(limit or self.default_page_size, self.max_page_size)
+
         chat = storage.load_chat(chat_id)
 
+        if after is not None:
+            start = after + 1
+        elif offset is not None:
+            start = offset
+        else:
+            # Anchor the page at `before`, or at the latest message
+            end = chat.message_count if before is None else min(before, chat.message_count)
+            start = max(end - limit, 0)
+
+        stop = start + limit if before is None else min(before, start + limit)
+        messages, total = storage.read_chat_messages(chat_id, start, stop)
+        end = start + len(messages)
+
         return JsonResponse({
             'chat_id': chat_id,
-            'messages': chat.messages,
+            'messages': messages,
             'turn_count': chat.turn_count,
+            'message_count': total,
+            'start': start,
+            'end': end,
+            'has_more_before': start > 0,
+            'has_more_after': end < total,
         }, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _int_param(params, name):
+        """Parse a non-negative integer query parameter."""
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            number = int(value)
+        except ValueError:
+            raise BadRequestError(f"{name} must be an integer")
+        if number < 0:
+            raise BadRequestError(f"{name} must not be negative")
+        return number
+
+    @staticmethod
+    def _stream_messages(chat_id, chat, messages):
+        """Yield the full messages response as JSON chunks."""
+        head = json.dumps({
+            'chat_id': chat_id,
+            'turn_count': chat.turn_count,
+            'message_count': chat.message_count,
+        })
+        yield head[:-1] + ', "messages": ['
+        for index, message in enumerate(messages):
+            yield (',' if index else '') + json.dumps(message, ensure_ascii=False)
+        yield ']}'
+
     def put(self, request, chat_id):
         """Update chat messages."""
         messages = request.data.get('messages', [])
@@ -544,6 +644,26 @@ class ChatMessagesView(APIView):
             'turn_count': chat.turn_count,
         }, status=status.HTTP_200_OK)
 
+    def post(self, request, chat_id):
+        """Append messages to the end of the chat."""
+        messages = request.data.get('messages')
+        if not isinstance(messages, list) or not messages:
+            raise BadRequestError("messages must be a non-empty list")
+
+        storage = FileStorageService()
+        header = storage.append_chat_messages(chat_id, messages)
+
+        return JsonResponse({
+            'success': True,
+            'id': chat_id,
+            'turn_count': header['turn_count'],
+            'message_count': header['message_count'],
+        }, status=status.HTTP_200_OK)
+
+    def patch(self, request, chat_id):
+        """Append messages (alias of POST)."""
+        return self.post(request, chat_id)
+
 
 # ============================================================================
 # Common endpoints
@@ -563,8 +683,13 @@ class SearchView(APIView):
         provider = request.query_params.get('provider')
         limit = int(request.query_params.get('limit', 50))
         cursor = request.query_params.get('cursor')
+        facets = request.query_params.get('facets') in ('1', 'true')
+        facet_limit = int(request.query_params.get('facet_limit', 20))
+        fuzzy = request.query_params.get('fuzzy') in ('1', 'true')
+        sort = request.query_params.get('sort')
 
         index_service = DBIndexService()
+        index_service.parse_sort(sort, type_filter)
 
         try:
             results = index_service.search(
@@ -576,12 +701,108 @@ class SearchView(APIView):
                 query=query,
                 limit=limit,
                 cursor=cursor,
+                labels_mode=request.query_params.get('labels_mode', 'all'),
+                facets=facets,
+                facet_limit=facet_limit,
+                fuzzy=fuzzy,
+                sort=sort,
             )
             return Response(results)
         except Exception as e:
             return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class SimilarSearchView(APIView):
+    """
+    GET /v1/search/similar - Items most similar to an item or a text
+    """
+
+    def get(self, request):
+        params = request.query_params
+        item_id = params.get('id')
+        query = params.get('q')
+        if not item_id and not query:
+            raise BadRequestError("Either 'id' or 'q' is required")
+
+        vector_index = FileStorageService().vector_index
+        if vector_index is None:
+            raise BadRequestError("Vector search is disabled (VECTOR_SEARCH_ENABLED)")
+
+        if item_id:
+            vector = vector_index.get(item_id)
+            if vector is None:
+                raise ResourceNotFoundError(f"Item {item_id} has no similarity vector")
+        else:
+            from backend.apps.core.services.vector_index import text_vector
+            vector = text_vector([(query, 1.0)], vector_index.dimensions)
+
+        matches = vector_index.search(vector, limit=int(params.get('limit', 10)),
+                                      type_filter=params.get('type'), exclude=item_id)
+        scores = {match_id: score for match_id, _, score in matches}
+        items = []
+        for record in DBIndexService().get_many(list(scores)):
+            item = record.to_response_dict()
+            item['score'] = round(scores[record.id], 4)
+            items.append(item)
+        return Response({'items': items, 'count': len(items)})
+
+
+class SearchFacetsView(APIView):
+    """
+    GET /v1/search/facets - Facet counts for a search, without results
+    """
+
+    def get(self, request):
+        params = request.query_params
+        results = DBIndexService().facets(
+            type_filter=params.get('type'),
+            labels=params.getlist('labels'),
+            slug=params.get('slug'),
+            author=params.get('author'),
+            provider=params.get('provider'),
+            query=params.get('q'),
+            labels_mode=params.get('labels_mode', 'all'),
+            limit=int(params.get('limit', 20)),
+            fuzzy=params.get('fuzzy') in ('1', 'true'),
+        )
+        return Response({'facets': results})
+
+
+class LabelsView(APIView):
+    """
+    GET /v1/labels - List labels with item counts
+    """
+
+    def get(self, request):
+        item_type = request.query_params.get('type')
+        prefix = request.query_params.get('prefix')
+        limit = int(request.query_params.get('limit', 100))
+
+        results = DBIndexService().list_labels(item_type=item_type, prefix=prefix, limit=limit)
+        return Response(results)
+
+
+class DuplicatesView(APIView):
+    """
+    GET /v1/duplicates - Clusters of near-duplicate items
+    """
+
+    def get(self, request):
+        threshold = request.query_params.get('threshold')
+        if threshold:
+            try:
+                threshold = float(threshold)
+            except ValueError:
+                raise BadRequestError("threshold must be a number")
+            if not 0 < threshold <= 1:
+                raise BadRequestError("threshold must be between 0 and 1")
+        clusters = DBIndexService().duplicate_clusters(
+            item_type=request.query_params.get('type'),
+            threshold=threshold or None,
+        )
+        return Response({'clusters': clusters, 'count': len(clusters)})
+
+
 # ============================================================================
 # Index management
 # ============================================================================
@@ -602,6 +823,14 @@ class IndexStatusView(APIView):
             )
             status_data.setdefault('last_error', None)
             status_data['lock_status'] = 'unlocked'
+            status_data['metadata_cache'] = metadata_cache.stats()
+            status_data['version_cache'] = version_cache.stats()
+            status_data['head_cache'] = head_cache.stats()
+            status_data['search_cache'] = search_cache.stats()
+            vector_index = FileStorageService().vector_index
+            status_data['vectors'] = vector_index.stats() if vector_index is not None else None
+            queue = get_index_queue()
+            status_data['write_queue'] = queue.stats() if queue is not None else None
             return Response(status_data)
         except Exception as e:
             return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -623,6 +852,23 @@ class IndexRebuildView(APIView):
             return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class IndexReconcileView(APIView):
+    """
+    POST /v1/index/reconcile - Re-index only files changed since they were indexed
+    """
+
+    def post(self, request):
+        storage = FileStorageService()
+        service = DBIndexService()
+        dry_run = str(request.data.get('dry_run', request.query_params.get('dry_run', ''))).lower() in ('1', 'true')
+
+        try:
+            stats = service.reconcile(storage, dry_run=dry_run)
+            return Response({'success': True, 'stats': stats})
+        except Exception as e:
+            return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # =============================================================================
 # DOM Providers (for browser extension)
 # =============================================================================
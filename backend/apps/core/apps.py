@@ -1,6 +1,26 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.core'
+
+    def ready(self):
+        from django.conf import settings
+
+        if not getattr(settings, 'INDEX_WATCHER_AUTOSTART', False):
+            return
+
+        # Only serving processes watch: skip other management commands, and
+        # the runserver autoreloader parent (the child has RUN_MAIN set)
+        command = sys.argv[1] if len(sys.argv) > 1 and os.path.basename(sys.argv[0]) == 'manage.py' else None
+        if command is not None and command != 'runserver':
+            return
+        if command == 'runserver' and os.environ.get('RUN_MAIN') != 'true' and '--noreload' not in sys.argv:
+            return
+
+        from backend.apps.core.services.index_watcher import autostart_watcher
+        autostart_watcher()
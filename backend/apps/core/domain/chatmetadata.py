@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 
 
 @dataclass
@@ -36,9 +36,9 @@ class ChatSummary:
 @dataclass
 class ChatMetadata:
     """
-    Metadata for a chat, stored within the JSON file.
-    Keeps the single-file JSON storage approach while providing
-    structured metadata similar to ItemMetadata.
+    Metadata for a chat.
+    The header fields live in chat-<id>.json; messages live in a separate
+    log and can be loaded lazily through `message_loader`.
     """
     id: str
     title: str
@@ -53,16 +53,48 @@ class ChatMetadata:
     model: Optional[str] = None
     conversation_id: Optional[str] = None
     turn_count: int = 0
-    # Messages stored within the same JSON
-    messages: List[Dict[str, Any]] = field(default_factory=list)
+    messages: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    # Number of messages committed in storage (set when loaded from a header)
+    message_count: int = 0
+    # Reads messages on first access of `messages`
+    message_loader: Optional[Callable[[], List[Dict[str, Any]]]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if self.message_loader is not None:
+            # Leave messages unset so the first access goes through __getattr__
+            del self.messages
+
+    def __getattr__(self, name):
+        if name == "messages" and self.message_loader is not None:
+            self.messages = self.message_loader()
+            return self.messages
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    @property
+    def messages_loaded(self) -> bool:
+        """Whether messages are in memory (loaded or assigned)."""
+        try:
+            object.__getattribute__(self, "messages")
+            return True
+        except AttributeError:
+            return False
 
     @classmethod
-    def from_dict(cls, data: dict) -> "ChatMetadata":
-        messages = data.get("messages", [])
+    def from_dict(cls, data: dict, message_loader: Optional[Callable] = None) -> "ChatMetadata":
+        """
+        Build from a chat dict.
+
+        Args:
+            data: Header fields, optionally with `messages`
+            message_loader: Loads messages lazily when `data` has none
+        """
+        messages = data.get("messages")
         turn_count = data.get("turn_count")
         if turn_count is None:
             # Calculate turn count from messages
-            turn_count = sum(1 for msg in messages if msg.get("role") == "user")
+            turn_count = sum(1 for msg in messages or [] if msg.get("role") == "user")
 
         return cls(
             id=data["id"],
@@ -77,10 +109,13 @@ class ChatMetadata:
             model=data.get("model"),
             conversation_id=data.get("conversation_id"),
             turn_count=turn_count,
-            messages=messages,
+            messages=messages or [],
+            message_count=data.get("message_count", len(messages or [])),
+            message_loader=message_loader if messages is None else None,
         )
 
-    def __dict__(self) -> dict:
+    def to_header_dict(self) -> dict:
+        """Header fields only; never touches messages."""
         return {
             "id": self.id,
             "title": self.title,
@@ -94,6 +129,11 @@ class ChatMetadata:
             "model": self.model,
             "conversation_id": self.conversation_id,
             "turn_count": self.turn_count,
+        }
+
+    def __dict__(self) -> dict:
+        return {
+            **self.to_header_dict(),
             "messages": self.messages,
         }
 
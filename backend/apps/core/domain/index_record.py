@@ -32,6 +32,8 @@ class IndexRecord:
     # File tracking
     file_path: str = ""
     sha: str = "latest"
+    # Bytes the item's files take up in storage (not part of API responses)
+    size_bytes: int = 0
 
     # Chat-specific fields
     provider: Optional[str] = None
@@ -21,10 +21,20 @@ class VersionData:
             "author": self.author,
         }
 
-    def to_text(self) -> str:
+    def to_text(self, storage_fields: Optional[dict] = None, body: Optional[str] = None) -> str:
+        """
+        Serialize as Markdown with JSON front matter.
+
+        Args:
+            storage_fields: Extra front matter describing how the body is
+                stored (blob reference, delta base)
+            body: Stored body when it is not the content itself
+        """
         frontmatter_dict = self.__dict__()
+        if storage_fields:
+            frontmatter_dict.update(storage_fields)
         frontmatter = f"---\n{json.dumps(frontmatter_dict, indent=2, ensure_ascii=False)}\n---\n\n"
-        return frontmatter + (self.content or "")
+        return frontmatter + ((self.content or "") if body is None else body)
     
     @classmethod
     def from_text(cls, text: str) -> "VersionData":
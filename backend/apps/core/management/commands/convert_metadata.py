@@ -0,0 +1,33 @@
+"""
+Management command to convert prompt/template metadata files between formats.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.services.file_storage_service import FileStorageService
+from backend.apps.core.utils.metadata_codec import CODECS
+
+
+class Command(BaseCommand):
+    help = 'Convert prompt.yaml/template.yaml metadata files to another format (and back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=sorted(CODECS),
+            default=None,
+            help='Target format (defaults to settings.METADATA_FORMAT)',
+        )
+
+    def handle(self, *args, **options):
+        metadata_format = options.get('format') or settings.METADATA_FORMAT
+        storage = FileStorageService(metadata_format=metadata_format)
+
+        self.stdout.write(self.style.WARNING(f'Converting metadata to {metadata_format}...'))
+        converted = storage.convert_metadata(metadata_format)
+        self.stdout.write(self.style.SUCCESS(f'Converted {converted} file(s)'))
+
+        if metadata_format != settings.METADATA_FORMAT:
+            self.stdout.write(self.style.WARNING(
+                f'METADATA_FORMAT is {settings.METADATA_FORMAT!r}; new writes will use that format'
+            ))
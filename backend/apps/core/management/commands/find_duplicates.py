@@ -0,0 +1,37 @@
+"""
+Management command to list clusters of near-duplicate prompts, templates and chats.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.apps.core.services.db_index_service import DBIndexService
+
+
+class Command(BaseCommand):
+    help = 'List clusters of near-duplicate items, found through MinHash/LSH signatures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=['prompt', 'template', 'chat'],
+            help='Only consider items of this type',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            help='Minimum estimated similarity (default: settings.DUPLICATE_THRESHOLD)',
+        )
+
+    def handle(self, *args, **options):
+        if not DBIndexService.duplicates_enabled():
+            raise CommandError(
+                "Duplicate detection is disabled; set DUPLICATE_DETECTION_ENABLED=True and run rebuild_index"
+            )
+
+        clusters = DBIndexService().duplicate_clusters(item_type=options['type'], threshold=options['threshold'])
+
+        for cluster in clusters:
+            self.stdout.write(f"{cluster['size']} items:")
+            for item in cluster['items']:
+                self.stdout.write(f"  - {item['type']} {item['id']}: {item['title']}")
+
+        self.stdout.write(self.style.SUCCESS(f"Found {len(clusters)} duplicate clusters"))
@@ -0,0 +1,17 @@
+"""
+Management command to convert legacy single-file chats to header + message log.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.services.file_storage_service import FileStorageService
+
+
+class Command(BaseCommand):
+    help = 'Split legacy chat JSON files into a header and an append-only message log'
+
+    def handle(self, *args, **options):
+        storage = FileStorageService()
+
+        self.stdout.write(self.style.WARNING('Converting legacy chats...'))
+        converted = storage.convert_legacy_chats()
+        self.stdout.write(self.style.SUCCESS(f'Converted {converted} chat(s)'))
@@ -0,0 +1,44 @@
+"""
+Management command to move version bodies into (or out of) the blob store.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.services.file_storage_service import FileStorageService
+
+
+class Command(BaseCommand):
+    help = 'Store existing version bodies in the content-addressed blob store and prune unused blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--unpack',
+            action='store_true',
+            help='Write full-text version files again (e.g. before disabling VERSION_BLOB_STORE)',
+        )
+        parser.add_argument(
+            '--prune-only',
+            action='store_true',
+            help='Only delete blobs no version references',
+        )
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=None,
+            help='Keep unreferenced blobs written within this many seconds (default 3600)',
+        )
+
+    def handle(self, *args, **options):
+        storage = FileStorageService()
+
+        if not options['prune_only']:
+            action = 'Unpacking' if options['unpack'] else 'Packing'
+            self.stdout.write(self.style.WARNING(f'{action} version files...'))
+            rewritten = storage.pack_versions(unpack=options['unpack'])
+            self.stdout.write(self.style.SUCCESS(f'Rewrote {rewritten} version file(s)'))
+
+        result = storage.prune_blobs(options['grace'])
+        stats = storage.blob_store.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {result['removed']} blob(s), freed {result['freed_bytes']} bytes; "
+            f"{stats['blobs']} blob(s) / {stats['bytes']} bytes in store"
+        ))
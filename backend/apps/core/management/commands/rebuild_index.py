@@ -17,6 +17,18 @@ class Command(BaseCommand):
             action='store_true',
             help='Show detailed progress',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Parser processes (default: INDEX_REBUILD_WORKERS or CPU count; 1 parses inline)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Files per parse batch and rows per bulk insert (default: INDEX_REBUILD_CHUNK_SIZE)',
+        )
 
     def handle(self, *args, **options):
         verbose = options.get('verbose', False)
@@ -29,13 +41,22 @@ class Command(BaseCommand):
 
         try:
             # Rebuild index
-            stats = index_service.rebuild(storage)
+            stats = index_service.rebuild(
+                storage,
+                workers=options.get('workers'),
+                chunk_size=options.get('chunk_size'),
+            )
 
             # Display results
             self.stdout.write(self.style.SUCCESS('\nRebuild complete!'))
             self.stdout.write(f"Prompts added: {stats['prompts_added']}")
             self.stdout.write(f"Templates added: {stats['templates_added']}")
             self.stdout.write(f"Chats added: {stats['chats_added']}")
+            self.stdout.write(
+                f"Scanned {stats['files_scanned']} files in {stats['elapsed_seconds']}s "
+                f"(parse {stats['parse_seconds']}s with {stats['workers']} worker(s), "
+                f"write {stats['write_seconds']}s): {stats['items_per_second']} items/s"
+            )
 
             if stats['errors']:
                 self.stdout.write(self.style.ERROR(f"\nErrors encountered: {len(stats['errors'])}"))
@@ -0,0 +1,39 @@
+"""
+Management command to incrementally sync the search index with file storage.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.services.file_storage_service import FileStorageService
+from backend.apps.core.services.db_index_service import DBIndexService
+
+
+class Command(BaseCommand):
+    help = 'Re-index files changed since the last rebuild/reconcile and drop deleted items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would change',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Show detailed errors',
+        )
+
+    def handle(self, *args, **options):
+        stats = DBIndexService().reconcile(FileStorageService(), dry_run=options['dry_run'])
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Scanned {stats['files_scanned']} files in {stats['elapsed_seconds']}s: "
+            f"{stats['unchanged']} unchanged, {stats['touched']} touched, {stats['added']} added, "
+            f"{stats['updated']} updated, {stats['removed']} removed"
+        ))
+
+        if stats['errors']:
+            self.stdout.write(self.style.ERROR(f"Errors encountered: {len(stats['errors'])}"))
+            if options['verbose']:
+                for error in stats['errors']:
+                    self.stdout.write(f"  - {error.get('type', 'unknown')} {error.get('item')}: {error.get('error')}")
@@ -0,0 +1,44 @@
+"""
+Management command to keep the search index in sync with file edits.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.services.index_watcher import IndexWatcher
+
+
+class Command(BaseCommand):
+    help = 'Watch file storage and re-index items edited outside the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend',
+            choices=['auto', 'inotify', 'polling'],
+            default='auto',
+            help='Change detection backend (default: inotify where available)',
+        )
+        parser.add_argument(
+            '--debounce',
+            type=float,
+            default=None,
+            help='Seconds an item must be quiet before it is re-indexed (default: INDEX_WATCHER_DEBOUNCE)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Seconds between scans in polling mode (default: INDEX_WATCHER_POLL_INTERVAL)',
+        )
+
+    def handle(self, *args, **options):
+        watcher = IndexWatcher(
+            debounce=options['debounce'],
+            poll_interval=options['interval'],
+            backend=options['backend'],
+        )
+        self.stdout.write(self.style.WARNING(
+            f"Watching {watcher.storage_service.storage_root} (Ctrl+C to stop)..."
+        ))
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Stopped'))
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:31
+
+from django.db import migrations, models
+
+
+def populate_provider_key(apps, schema_editor):
+    """Fill provider_key for existing rows, leaving older duplicates unkeyed."""
+    IndexedItem = apps.get_model("core", "IndexedItem")
+    seen = set()
+    items = IndexedItem.objects.filter(provider__isnull=False).order_by("-updated_at", "-id")
+    for item in items.iterator():
+        key = item.provider.lower()
+        if item.conversation_id is not None:
+            if (key, item.conversation_id) in seen:
+                continue
+            seen.add((key, item.conversation_id))
+        item.provider_key = key
+        item.save(update_fields=["provider_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_indexeditem_indexeditem_unique_type_slug"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="indexeditem",
+            name="provider_key",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(populate_provider_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="indexeditem",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("conversation_id__isnull", False), ("provider_key__isnull", False)
+                ),
+                fields=("provider_key", "conversation_id"),
+                name="unique_provider_conversation",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_indexeditem_provider_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexManifest",
+            fields=[
+                (
+                    "path",
+                    models.CharField(max_length=500, primary_key=True, serialize=False),
+                ),
+                ("item_id", models.CharField(db_index=True, max_length=26)),
+                ("item_type", models.CharField(max_length=20)),
+                ("mtime_ns", models.BigIntegerField()),
+                ("size", models.BigIntegerField()),
+                ("content_hash", models.CharField(max_length=64)),
+            ],
+            options={
+                "db_table": "index_manifest",
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:47
+
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_item_labels(apps, schema_editor):
+    """Copy labels_json of existing rows into the join table."""
+    IndexedItem = apps.get_model("core", "IndexedItem")
+    ItemLabel = apps.get_model("core", "ItemLabel")
+    rows = []
+    for item_id, item_type, labels_json in IndexedItem.objects.values_list("id", "item_type", "labels_json").iterator():
+        try:
+            labels = json.loads(labels_json or "[]")
+        except (TypeError, ValueError):
+            continue
+        for label in dict.fromkeys(label for label in labels if isinstance(label, str) and label):
+            rows.append(ItemLabel(item_id=item_id, item_type=item_type, label=label))
+    ItemLabel.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_indexmanifest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemLabel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("item_type", models.CharField(max_length=20)),
+                ("label", models.CharField(max_length=200)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="label_rows",
+                        to="core.indexeditem",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "item_labels",
+                "indexes": [
+                    models.Index(fields=["label", "item"], name="idx_label_item"),
+                    models.Index(fields=["item_type", "label"], name="idx_label_type"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="itemlabel",
+            constraint=models.UniqueConstraint(
+                fields=("item", "label"), name="unique_item_label"
+            ),
+        ),
+        migrations.RunPython(populate_item_labels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:50
+
+from django.db import migrations
+
+from backend.apps.core.utils.fts import item_search_row
+
+# Full-text index over indexed_items (SQLite FTS5). The table keeps its own
+# copy of the searchable fields plus the item ID, and DBIndexService writes it
+# with every index change: indexed_items has a text primary key, so its rowid
+# is not stable across the table remakes SQLite schema changes do.
+FTS_SQL = """
+    CREATE VIRTUAL TABLE item_search USING fts5(
+        title, description, slug, labels_json, item_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+
+INSERT_SQL = (
+    "INSERT INTO item_search(rowid, title, description, slug, labels_json, item_id)"
+    " VALUES (%s, %s, %s, %s, %s, %s)"
+)
+
+
+def create_item_search(apps, schema_editor):
+    """Create and fill the FTS5 index on SQLite builds that include FTS5; other backends skip it."""
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    IndexedItem = apps.get_model("core", "IndexedItem")
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        if "ENABLE_FTS5" not in {row[0] for row in cursor.fetchall()}:
+            return
+        cursor.execute(FTS_SQL)
+        rows = IndexedItem.objects.values_list("id", "title", "description", "slug", "labels_json")
+        cursor.executemany(INSERT_SQL, [item_search_row(*row) for row in rows.iterator()])
+
+
+def drop_item_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS item_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_itemlabel"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_item_search, drop_item_search),
+    ]
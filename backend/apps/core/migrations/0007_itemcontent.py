@@ -0,0 +1,106 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Full-text index over item_content (SQLite FTS5, external content). The
+# content rowid is item_content.id, an INTEGER PRIMARY KEY, so it survives
+# VACUUM. Existing installs fill item_content with rebuild_index.
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE content_search USING fts5(
+        body,
+        content='item_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER content_search_ai AFTER INSERT ON item_content BEGIN
+        INSERT INTO content_search(rowid, body) VALUES (new.id, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER content_search_ad AFTER DELETE ON item_content BEGIN
+        INSERT INTO content_search(content_search, rowid, body) VALUES ('delete', old.id, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER content_search_au AFTER UPDATE ON item_content BEGIN
+        INSERT INTO content_search(content_search, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO content_search(rowid, body) VALUES (new.id, new.body);
+    END
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS content_search_au",
+    "DROP TRIGGER IF EXISTS content_search_ad",
+    "DROP TRIGGER IF EXISTS content_search_ai",
+    "DROP TABLE IF EXISTS content_search",
+]
+
+
+def create_content_search(apps, schema_editor):
+    """Create the FTS5 index on SQLite builds that include FTS5; other backends skip it."""
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        if "ENABLE_FTS5" not in {row[0] for row in cursor.fetchall()}:
+            return
+        for sql in FTS_SQL:
+            cursor.execute(sql)
+
+
+def drop_content_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_item_search_fts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemContent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("item_type", models.CharField(max_length=20)),
+                ("seq", models.IntegerField(default=0)),
+                ("body", models.TextField()),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="content_rows",
+                        to="core.indexeditem",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "item_content",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="itemcontent",
+            constraint=models.UniqueConstraint(
+                fields=("item", "seq"), name="unique_item_content_seq"
+            ),
+        ),
+        migrations.RunPython(create_content_search, drop_content_search),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+
+def create_generation_row(apps, schema_editor):
+    IndexGeneration = apps.get_model("core", "IndexGeneration")
+    IndexGeneration.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_itemcontent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "index_generation",
+            },
+        ),
+        migrations.RunPython(create_generation_row, migrations.RunPython.noop),
+    ]
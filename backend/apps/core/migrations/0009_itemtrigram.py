@@ -0,0 +1,71 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:01
+
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from backend.apps.core.utils.trigrams import trigrams_of
+
+
+def populate_item_trigrams(apps, schema_editor):
+    """Index the title, slug and labels of existing rows."""
+    IndexedItem = apps.get_model("core", "IndexedItem")
+    ItemTrigram = apps.get_model("core", "ItemTrigram")
+    rows = []
+    for item_id, title, slug, labels_json in IndexedItem.objects.values_list(
+        "id", "title", "slug", "labels_json"
+    ).iterator():
+        try:
+            labels = [label for label in json.loads(labels_json or "[]") if isinstance(label, str)]
+        except (TypeError, ValueError):
+            labels = []
+        for trigram in trigrams_of([title, slug, *labels]):
+            rows.append(ItemTrigram(item_id=item_id, trigram=trigram))
+    ItemTrigram.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_indexgeneration"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemTrigram",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trigram", models.CharField(max_length=3)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="trigram_rows",
+                        to="core.indexeditem",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "item_trigrams",
+                "indexes": [
+                    models.Index(fields=["trigram", "item"], name="idx_trigram_item"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="itemtrigram",
+            constraint=models.UniqueConstraint(
+                fields=("item", "trigram"), name="unique_item_trigram"
+            ),
+        ),
+        migrations.RunPython(populate_item_trigrams, migrations.RunPython.noop),
+    ]
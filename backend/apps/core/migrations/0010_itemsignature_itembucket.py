@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Signatures are computed from item_content; existing installs fill them
+# with rebuild_index.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_itemtrigram"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemSignature",
+            fields=[
+                (
+                    "item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="signature",
+                        serialize=False,
+                        to="core.indexeditem",
+                    ),
+                ),
+                ("item_type", models.CharField(max_length=20)),
+                ("signature", models.BinaryField()),
+            ],
+            options={
+                "db_table": "item_signatures",
+            },
+        ),
+        migrations.CreateModel(
+            name="ItemBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("item_type", models.CharField(max_length=20)),
+                ("band", models.SmallIntegerField()),
+                ("bucket", models.BigIntegerField()),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="bucket_rows",
+                        to="core.indexeditem",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "item_buckets",
+                "indexes": [
+                    models.Index(
+                        fields=["band", "bucket", "item"], name="idx_bucket_item"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:19
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def populate_index_stats(apps, schema_editor):
+    """Compute the totals of existing rows; storage sizes are filled by rebuild_index."""
+    IndexedItem = apps.get_model("core", "IndexedItem")
+    ItemLabel = apps.get_model("core", "ItemLabel")
+    IndexStat = apps.get_model("core", "IndexStat")
+    IndexGeneration = apps.get_model("core", "IndexGeneration")
+
+    rows = [
+        IndexStat(dimension="type", key=item_type, value=count)
+        for item_type, count in IndexedItem.objects.order_by()
+        .values_list("item_type")
+        .annotate(Count("id"))
+    ]
+    rows.extend(
+        IndexStat(dimension="provider", key=provider, value=count)
+        for provider, count in IndexedItem.objects.filter(provider__gt="")
+        .order_by()
+        .values_list("provider")
+        .annotate(Count("id"))
+    )
+    rows.extend(
+        IndexStat(dimension="label", key=label, value=count)
+        for label, count in ItemLabel.objects.order_by()
+        .values_list("label")
+        .annotate(Count("id"))
+    )
+    rows.append(IndexStat(dimension="storage", key="bytes", value=0))
+    IndexStat.objects.bulk_create(rows, batch_size=1000)
+
+    newest = IndexedItem.objects.aggregate(newest=Max("updated_at"))["newest"]
+    if not IndexGeneration.objects.filter(pk=1).update(last_updated=newest):
+        IndexGeneration.objects.create(pk=1, value=0, last_updated=newest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_itemsignature_itembucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="indexeditem",
+            name="size_bytes",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="indexgeneration",
+            name="last_updated",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="IndexStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("dimension", models.CharField(max_length=20)),
+                ("key", models.CharField(max_length=200)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "index_stats",
+                "indexes": [
+                    models.Index(fields=["dimension", "-value"], name="idx_stat_value"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="indexstat",
+            constraint=models.UniqueConstraint(
+                fields=("dimension", "key"), name="unique_stat_key"
+            ),
+        ),
+        migrations.RunPython(populate_index_stats, migrations.RunPython.noop),
+    ]
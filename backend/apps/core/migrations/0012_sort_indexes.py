@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_indexstat"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["item_type", "-created_at", "-id"], name="idx_type_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["item_type", "title", "id"], name="idx_type_title"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["item_type", "-version_count", "-id"], name="idx_type_versions"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["item_type", "-turn_count", "-id"], name="idx_type_turns"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["provider_key", "-updated_at", "-id"],
+                name="idx_provider_updated",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["provider_key", "-created_at", "-id"],
+                name="idx_provider_created",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["provider_key", "title", "id"], name="idx_provider_title"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(
+                fields=["provider_key", "-turn_count", "-id"], name="idx_provider_turns"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(fields=["-updated_at", "-id"], name="idx_updated"),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(fields=["-created_at", "-id"], name="idx_created"),
+        ),
+        migrations.AddIndex(
+            model_name="indexeditem",
+            index=models.Index(fields=["title", "id"], name="idx_title"),
+        ),
+    ]
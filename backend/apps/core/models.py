@@ -37,9 +37,13 @@ class IndexedItem(models.Model):
     # File tracking
     file_path = models.CharField(max_length=500)
     sha = models.CharField(max_length=64, default="latest")
+    # Bytes the item's files take up in storage
+    size_bytes = models.BigIntegerField(default=0)
 
     # Chat-specific fields
     provider = models.CharField(max_length=100, null=True, blank=True)
+    # Lower-cased provider, used for case-insensitive lookups
+    provider_key = models.CharField(max_length=100, null=True, blank=True)
     model = models.CharField(max_length=200, null=True, blank=True)
     conversation_id = models.CharField(max_length=200, null=True, blank=True)
     turn_count = models.IntegerField(default=0)
@@ -50,6 +54,20 @@ class IndexedItem(models.Model):
         indexes = [
             # Primary lookup index
             models.Index(fields=['item_type', '-updated_at', '-id'], name='idx_type_updated'),
+            # The other list/search sort keys (see db_index_service.SORT_KEYS),
+            # per type, per chat provider and across types; each matches the
+            # keyset order (key, id) so sorted pages are read in index order
+            models.Index(fields=['item_type', '-created_at', '-id'], name='idx_type_created'),
+            models.Index(fields=['item_type', 'title', 'id'], name='idx_type_title'),
+            models.Index(fields=['item_type', '-version_count', '-id'], name='idx_type_versions'),
+            models.Index(fields=['item_type', '-turn_count', '-id'], name='idx_type_turns'),
+            models.Index(fields=['provider_key', '-updated_at', '-id'], name='idx_provider_updated'),
+            models.Index(fields=['provider_key', '-created_at', '-id'], name='idx_provider_created'),
+            models.Index(fields=['provider_key', 'title', 'id'], name='idx_provider_title'),
+            models.Index(fields=['provider_key', '-turn_count', '-id'], name='idx_provider_turns'),
+            models.Index(fields=['-updated_at', '-id'], name='idx_updated'),
+            models.Index(fields=['-created_at', '-id'], name='idx_created'),
+            models.Index(fields=['title', 'id'], name='idx_title'),
             # Slug uniqueness per type
             models.Index(fields=['item_type', 'slug'], name='idx_type_slug'),
             # Author filter
@@ -61,7 +79,13 @@ class IndexedItem(models.Model):
             models.UniqueConstraint(
                 fields=['item_type', 'slug'],
                 name='unique_type_slug'
-            )
+            ),
+            # One chat per provider conversation; also serves upsert lookups
+            models.UniqueConstraint(
+                fields=['provider_key', 'conversation_id'],
+                condition=models.Q(provider_key__isnull=False, conversation_id__isnull=False),
+                name='unique_provider_conversation'
+            ),
         ]
 
     @property
@@ -86,6 +110,184 @@ class IndexedItem(models.Model):
         return f"{self.item_type}:{self.slug} ({self.id})"
 
 
+class ItemLabel(models.Model):
+    """
+    One row per (item, label), so label filters and counts run in SQL.
+    Mirrors IndexedItem.labels_json, which stays the source for responses.
+    """
+    # Rows are deleted explicitly by DBIndexService before their items, which
+    # keeps bulk index deletes free of per-row cascade collection
+    item = models.ForeignKey(IndexedItem, on_delete=models.DO_NOTHING, related_name='label_rows')
+    # Denormalized from the item for per-type label counts without a join
+    item_type = models.CharField(max_length=20)
+    label = models.CharField(max_length=200)
+
+    class Meta:
+        db_table = 'item_labels'
+        indexes = [
+            # Label filters: label -> items
+            models.Index(fields=['label', 'item'], name='idx_label_item'),
+            # Label listing/counts per type
+            models.Index(fields=['item_type', 'label'], name='idx_label_type'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'label'], name='unique_item_label'),
+        ]
+
+    def __str__(self):
+        return f"{self.label} ({self.item_id})"
+
+
+class ItemContent(models.Model):
+    """
+    Searchable body text of an indexed item: the HEAD version of a prompt or
+    template (seq 0), or one row per chat message (seq = message index).
+    Full-text indexed by the content_search FTS5 table (migration 0007).
+    """
+    # Deleted explicitly before their items, like ItemLabel rows
+    item = models.ForeignKey(IndexedItem, on_delete=models.DO_NOTHING, related_name='content_rows')
+    item_type = models.CharField(max_length=20)
+    seq = models.IntegerField(default=0)
+    body = models.TextField()
+
+    class Meta:
+        db_table = 'item_content'
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'seq'], name='unique_item_content_seq'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id}#{self.seq}"
+
+
+class ItemTrigram(models.Model):
+    """
+    One row per (item, trigram) of the item's title, slug and labels, for
+    typo-tolerant search (see utils.trigrams). A fuzzy query only reads the
+    posting lists of its own trigrams.
+    """
+    # Deleted explicitly before their items, like ItemLabel rows
+    item = models.ForeignKey(IndexedItem, on_delete=models.DO_NOTHING, related_name='trigram_rows')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        db_table = 'item_trigrams'
+        indexes = [
+            # Posting lists: trigram -> items
+            models.Index(fields=['trigram', 'item'], name='idx_trigram_item'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'trigram'], name='unique_item_trigram'),
+        ]
+
+    def __str__(self):
+        return f"{self.trigram!r} ({self.item_id})"
+
+
+class ItemSignature(models.Model):
+    """
+    MinHash signature of an item's content (see utils.minhash), for
+    near-duplicate detection. Items without content have none.
+    """
+    # Deleted explicitly before their items, like ItemLabel rows
+    item = models.OneToOneField(IndexedItem, on_delete=models.DO_NOTHING, primary_key=True,
+                                related_name='signature')
+    item_type = models.CharField(max_length=20)
+    signature = models.BinaryField()
+
+    class Meta:
+        db_table = 'item_signatures'
+
+    def __str__(self):
+        return f"signature ({self.item_id})"
+
+
+class ItemBucket(models.Model):
+    """
+    One row per LSH band of an item's signature: items sharing a
+    (band, bucket) are candidate duplicates.
+    """
+    # Deleted explicitly before their items, like ItemLabel rows
+    item = models.ForeignKey(IndexedItem, on_delete=models.DO_NOTHING, related_name='bucket_rows')
+    # Denormalized from the item for per-type duplicate listings
+    item_type = models.CharField(max_length=20)
+    band = models.SmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'item_buckets'
+        indexes = [
+            # Candidates: (band, bucket) -> items
+            models.Index(fields=['band', 'bucket', 'item'], name='idx_bucket_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.band}:{self.bucket} ({self.item_id})"
+
+
+class IndexManifest(models.Model):
+    """
+    Fingerprint of each storage file the index was built from.
+    Lets a reconcile re-parse only files that changed since they were indexed.
+    """
+    # Path relative to the storage root, e.g. prompts/prompt-<id>/prompt.yaml
+    path = models.CharField(max_length=500, primary_key=True)
+    item_id = models.CharField(max_length=26, db_index=True)
+    item_type = models.CharField(max_length=20)
+    mtime_ns = models.BigIntegerField()
+    size = models.BigIntegerField()
+    content_hash = models.CharField(max_length=64)
+
+    class Meta:
+        db_table = 'index_manifest'
+
+    def __str__(self):
+        return f"{self.path} ({self.item_id})"
+
+
+class IndexGeneration(models.Model):
+    """
+    Single-row counter bumped in every index write transaction.
+    Cached search results are only valid for the generation they were computed at.
+    """
+    value = models.BigIntegerField(default=0)
+    # Newest updated_at of any indexed item, refreshed by item writes
+    last_updated = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'index_generation'
+
+    def __str__(self):
+        return f"generation {self.value}"
+
+
+class IndexStat(models.Model):
+    """
+    Running totals over the index, kept up to date by every index write so
+    the status endpoint reads them instead of aggregating indexed_items.
+
+    Dimensions: 'type' (items per item type), 'provider' (chats per
+    provider), 'label' (items per label) and 'storage' ('bytes': total
+    size of the indexed items' files).
+    """
+    dimension = models.CharField(max_length=20)
+    key = models.CharField(max_length=200)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'index_stats'
+        indexes = [
+            # Largest entries of a dimension, e.g. most used labels
+            models.Index(fields=['dimension', '-value'], name='idx_stat_value'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unique_stat_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key} = {self.value}"
+
+
 class AuditLog(models.Model):
     """
     Audit log for tracking operations.
@@ -0,0 +1,144 @@
+"""
+Content-addressed blob store for version bodies.
+
+Blobs live under <storage_root>/.blobs/<aa>/<sha256>, zlib-compressed. A body
+is stored once no matter how many versions (of any item) reference it.
+"""
+import hashlib
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from backend.apps.core.exceptions import ResourceNotFoundError
+
+# Prefix of blob references stored in version front matter
+BLOB_REF_PREFIX = 'sha256:'
+
+# Blobs touched more recently than this are never pruned, so a version file
+# being written concurrently cannot lose its blob
+PRUNE_GRACE_SECONDS = 3600
+
+
+class BlobStore:
+    """Stores compressed version bodies keyed by their SHA-256 digest."""
+
+    def __init__(self, root: Path, compression_level: int = 6):
+        """
+        Initialize blob store.
+
+        Args:
+            root: Blob directory (usually <storage_root>/.blobs)
+            compression_level: zlib compression level (0-9)
+        """
+        self.root = Path(root)
+        self.compression_level = compression_level
+
+    @staticmethod
+    def digest(content: str) -> str:
+        """Get the blob reference for a body."""
+        return BLOB_REF_PREFIX + hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _path(self, ref: str) -> Path:
+        if not ref.startswith(BLOB_REF_PREFIX):
+            raise ResourceNotFoundError(f"Invalid blob reference: {ref}")
+        hex_digest = ref[len(BLOB_REF_PREFIX):]
+        return self.root / hex_digest[:2] / hex_digest
+
+    def put(self, content: str) -> str:
+        """
+        Store a body, once.
+
+        Args:
+            content: Version body
+
+        Returns:
+            Blob reference ('sha256:<hex>')
+        """
+        ref = self.digest(content)
+        path = self._path(ref)
+
+        if path.exists():
+            # Refresh mtime so a concurrent prune keeps the blob
+            os.utime(path)
+            return ref
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(zlib.compress(content.encode('utf-8'), self.compression_level))
+        os.replace(tmp_path, path)
+        return ref
+
+    def get(self, ref: str) -> str:
+        """
+        Read a body.
+
+        Args:
+            ref: Blob reference
+
+        Returns:
+            Version body
+
+        Raises:
+            ResourceNotFoundError: If the blob is missing
+        """
+        path = self._path(ref)
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"Blob {ref} not found") from None
+        return zlib.decompress(raw).decode('utf-8')
+
+    def iter_refs(self) -> Iterator[str]:
+        """Iterate over references of all stored blobs."""
+        if not self.root.exists():
+            return
+        for shard in self.root.iterdir():
+            if not shard.is_dir():
+                continue
+            for path in shard.iterdir():
+                if not path.name.endswith('.tmp'):
+                    yield BLOB_REF_PREFIX + path.name
+
+    def prune(self, referenced: Iterable[str], grace_seconds: Optional[int] = None) -> Dict:
+        """
+        Delete blobs no version references.
+
+        Args:
+            referenced: Blob references still in use
+            grace_seconds: Skip blobs modified this recently. Defaults to PRUNE_GRACE_SECONDS
+
+        Returns:
+            Dict with removed blob count and freed bytes
+        """
+        referenced = set(referenced)
+        grace = PRUNE_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        cutoff = time.time() - grace
+        removed = 0
+        freed = 0
+
+        for ref in list(self.iter_refs()):
+            if ref in referenced:
+                continue
+            path = self._path(ref)
+            try:
+                stat = path.stat()
+                if stat.st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += stat.st_size
+
+        return {'removed': removed, 'freed_bytes': freed}
+
+    def stats(self) -> Dict:
+        """Get blob count and total compressed size."""
+        count = 0
+        size = 0
+        for ref in self.iter_refs():
+            count += 1
+            size += self._path(ref).stat().st_size
+        return {'blobs': count, 'bytes': size}
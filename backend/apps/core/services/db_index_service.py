@@ -2,16 +2,163 @@
 Database-backed index service for fast search and lookup.
 Replaces file-based index.json with PostgreSQL database.
 """
-from typing import List, Dict, Optional
+import copy
+import json
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
-from django.db import models, transaction
-from django.db.models import Q, Count
+import re
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Q, Count, Subquery
+from django.db.models.expressions import RawSQL
 from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
 
-from backend.apps.core.models import IndexedItem
+from backend.apps.core.models import (
+    IndexedItem, IndexGeneration, IndexManifest, IndexStat, ItemBucket, ItemContent, ItemLabel, ItemSignature,
+    ItemTrigram,
+)
 from backend.apps.core.domain.index_record import IndexRecord
+from backend.apps.core.domain.itemmetadata import ItemSummary
+from backend.apps.core.domain.chatmetadata import ChatSummary
+from backend.apps.core.exceptions import BadRequestError
 from backend.apps.core.domain.enums import ItemType
-from backend.apps.core.utils.pagination import encode_cursor, decode_cursor, parse_datetime
+from backend.apps.core.services.index_queue import read_barrier
+from backend.apps.core.utils import minhash
+from backend.apps.core.utils.fts import item_search_row, item_search_rowid
+from backend.apps.core.utils.trigrams import similarity, trigrams, trigrams_of
+from backend.apps.core.utils.pagination import (
+    encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor, parse_datetime, parse_sort,
+)
+
+# SQLite FTS5 table over indexed_items' text fields (migration 0006), written
+# with every index change and keyed by item_search_rowid. Relevance is the
+# negated bm25 score so that, as with PostgreSQL's SearchRank, higher is better;
+# weights are for title, description, slug and labels.
+FTS_TABLE = 'item_search'
+FTS_RANK = f"-bm25({FTS_TABLE}, 10.0, 4.0, 6.0, 3.0)"
+
+# FTS5 table over item_content (migration 0007): HEAD version bodies and chat
+# messages. An item's score is its metadata score plus its best content row's.
+CONTENT_FTS_TABLE = 'content_search'
+CONTENT_FTS_RANK = f"-bm25({CONTENT_FTS_TABLE})"
+
+# Highlighting used in search snippets
+SNIPPET_MARKS = ('<mark>', '</mark>')
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+# Cached per process: whether the FTS5 table exists in the default database
+_fts_available: Optional[bool] = None
+
+# Sort keys of the list and search endpoints -> the item types they apply to
+# (None: all). IndexedItem has a (key, id) index per type, per chat provider
+# and across types for each of them, in the order pages are read.
+SORT_KEYS = {
+    'updated_at': None,
+    'created_at': None,
+    'title': None,
+    'version_count': ('prompt', 'template'),
+    'turn_count': ('chat',),
+}
+DEFAULT_SORT = '-updated_at'
+
+# IndexedItem columns of a search result and of a list summary, in row order.
+# Pages are fetched as values_list() rows of just these and unpacked into
+# response dicts in one step (see _row_to_response, _row_to_summary).
+RESPONSE_COLUMNS = (
+    'id', 'item_type', 'title', 'description', 'slug', 'labels_json', 'author', 'created_at', 'updated_at',
+    'version_count', 'head_version_id', 'head_version_number', 'file_path', 'sha',
+    'provider', 'model', 'conversation_id', 'turn_count',
+)
+SUMMARY_COLUMNS = (
+    'id', 'item_type', 'title', 'labels_json', 'description', 'updated_at', 'created_at', 'author',
+    'provider', 'model', 'turn_count',
+)
+
+# Facet name -> IndexedItem field; labels are counted from item_labels
+FACET_FIELDS = (
+    ('type', 'item_type'),
+    ('provider', 'provider'),
+    ('model', 'model'),
+    ('author', 'author'),
+)
+
+
+class ResultCache:
+    """
+    Process-wide LRU of search and facet results.
+
+    Entries are keyed by normalized arguments (see DBIndexService._cache_key)
+    and only served while the index is at the generation they were computed
+    at (see DBIndexService._cache_generation).
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries: Capacity
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, generation: Tuple[int, int]) -> Optional[Dict]:
+        """Get a copy of a cached result if the index has not changed since."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry[1]
+        return copy.deepcopy(result)
+
+    def put(self, key: str, generation: Tuple[int, int], result: Dict):
+        """Store a result computed at a generation."""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (generation, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+search_cache = ResultCache(getattr(settings, 'SEARCH_CACHE_SIZE', 256))
+
+# Index writes made by this process. Part of every cache validation key, as
+# a rolled-back write also rolls back its generation bump.
+_local_writes = 0
+
+# Per thread: the database connection, its PRAGMA data_version and the index
+# generation last read on it (see DBIndexService._cache_generation)
+_generation_seen = threading.local()
 
 
 class DBIndexService:
@@ -20,40 +167,29 @@ class DBIndexService:
     Provides search, filtering, and fast lookups using PostgreSQL.
     """
 
-    def add_or_update(self, record: IndexRecord) -> None:
+    def add_or_update(self, record: IndexRecord, manifest: Optional[List[Dict]] = None) -> None:
         """
         Add or update an item in the index.
 
         Args:
             record: IndexRecord instance
+            manifest: IndexManifest field values for the files the record was
+                read from (see FileStorageService.index_manifest); when given,
+                they replace the item's manifest rows
         """
-        # Parse datetime strings
-        created_at = parse_datetime(record.created_at) if record.created_at else datetime.now()
-        updated_at = parse_datetime(record.updated_at) if record.updated_at else datetime.now()
-
-        # Update or create
-        IndexedItem.objects.update_or_create(
-            id=record.id,
-            defaults={
-                'item_type': record.item_type.value,
-                'title': record.title,
-                'description': record.description,
-                'slug': record.slug,
-                'labels': record.labels,
-                'author': record.author,
-                'created_at': created_at,
-                'updated_at': updated_at,
-                'version_count': record.version_count,
-                'head_version_id': record.head_version_id,
-                'head_version_number': record.head_version_number,
-                'file_path': record.file_path,
-                'sha': record.sha,
-                'provider': record.provider,
-                'model': record.model,
-                'conversation_id': record.conversation_id,
-                'turn_count': record.turn_count,
-            }
-        )
+        fields = self._record_fields(record)
+        with transaction.atomic():
+            before = self._stats_of([record.id])
+            IndexedItem.objects.update_or_create(id=fields.pop('id'), defaults=fields)
+            self._set_search_rows([{'id': record.id, **fields}])
+            ItemLabel.objects.filter(item_id=record.id).delete()
+            ItemLabel.objects.bulk_create(self._label_rows(record))
+            ItemTrigram.objects.filter(item_id=record.id).delete()
+            ItemTrigram.objects.bulk_create(self._trigram_rows(record))
+            if manifest is not None:
+                self._set_manifest([record.id], manifest)
+            self._apply_stats(before, self._stats_of([record.id]))
+            self._bump_generation()
 
     def remove(self, item_id: str) -> None:
         """
@@ -62,7 +198,116 @@ class DBIndexService:
         Args:
             item_id: Item ID
         """
-        IndexedItem.objects.filter(id=item_id).delete()
+        with transaction.atomic():
+            before = self._stats_of([item_id])
+            ItemLabel.objects.filter(item_id=item_id).delete()
+            ItemTrigram.objects.filter(item_id=item_id).delete()
+            ItemBucket.objects.filter(item_id=item_id).delete()
+            ItemSignature.objects.filter(item_id=item_id).delete()
+            ItemContent.objects.filter(item_id=item_id).delete()
+            IndexManifest.objects.filter(item_id=item_id).delete()
+            self._remove_search_rows([item_id])
+            IndexedItem.objects.filter(id=item_id).delete()
+            self._apply_stats(before, Counter())
+            self._bump_generation()
+
+    def remove_many(self, item_ids: List[str], chunk_size: int = 500) -> None:
+        """
+        Remove several items from the index.
+
+        Args:
+            item_ids: Item IDs
+            chunk_size: IDs per DELETE statement
+        """
+        for i in range(0, len(item_ids), chunk_size):
+            chunk = item_ids[i:i + chunk_size]
+            with transaction.atomic():
+                before = self._stats_of(chunk)
+                ItemLabel.objects.filter(item_id__in=chunk).delete()
+                ItemTrigram.objects.filter(item_id__in=chunk).delete()
+                ItemBucket.objects.filter(item_id__in=chunk).delete()
+                ItemSignature.objects.filter(item_id__in=chunk).delete()
+                ItemContent.objects.filter(item_id__in=chunk).delete()
+                IndexManifest.objects.filter(item_id__in=chunk).delete()
+                self._remove_search_rows(chunk)
+                IndexedItem.objects.filter(id__in=chunk).delete()
+                self._apply_stats(before, Counter())
+                self._bump_generation()
+
+    def set_content(self, item_id: str, item_type: str, bodies: List[str], start: int = 0) -> None:
+        """
+        Replace an item's searchable content from position start on.
+
+        Rows before start are kept, so appending chat messages only inserts
+        the new ones. The item must already be indexed. With duplicate
+        detection on, its MinHash signature is updated too; an append merges
+        the new messages into the stored signature instead of reading the
+        whole chat.
+
+        Args:
+            item_id: Item ID
+            item_type: 'prompt', 'template' or 'chat'
+            bodies: Text of the HEAD version, or of chat messages start, start+1, ...
+            start: Position of the first body
+        """
+        with transaction.atomic():
+            replaced, _ = ItemContent.objects.filter(item_id=item_id, seq__gte=start).delete()
+            ItemContent.objects.bulk_create(self._content_rows(item_id, item_type, bodies, start))
+            if self.duplicates_enabled():
+                self._sign_content(item_id, item_type, bodies, start, appended=start > 0 and not replaced)
+            self._bump_generation()
+
+    def write_batch(self, records: List[IndexRecord], removed_ids: List[str] = (),
+                    contents: List[Tuple[str, str, List[str], int]] = (),
+                    manifests: Optional[Dict[str, List[Dict]]] = None) -> List[Dict]:
+        """
+        Apply a batch of index changes in one transaction (see IndexWriteQueue).
+
+        Rows are upserted with a single bulk INSERT ... ON CONFLICT; if that
+        trips another unique constraint, the batch falls back to per-item
+        upserts and reports the items that still fail.
+
+        Args:
+            records: Items to add or update
+            removed_ids: Items to remove
+            contents: (item_id, item_type, bodies, start) content changes, in
+                order, for items in records or already indexed
+            manifests: IndexManifest field values per item ID in records (see
+                add_or_update); items left out keep their manifest rows
+
+        Returns:
+            List of errors for items that could not be written
+        """
+        errors: List[Dict] = []
+        failed = set()
+        manifests = manifests or {}
+
+        with transaction.atomic():
+            if removed_ids:
+                self.remove_many(list(removed_ids))
+
+            if records:
+                try:
+                    with transaction.atomic():
+                        self._bulk_upsert(records)
+                        self._set_manifest(
+                            [record.id for record in records if record.id in manifests],
+                            [entry for record in records for entry in manifests.get(record.id, ())],
+                        )
+                except IntegrityError:
+                    for record in records:
+                        try:
+                            with transaction.atomic():
+                                self.add_or_update(record, manifests.get(record.id))
+                        except IntegrityError as e:
+                            failed.add(record.id)
+                            errors.append({'item': record.id, 'type': record.item_type.value, 'error': str(e)})
+
+            for item_id, item_type, bodies, start in contents:
+                if item_id not in failed:
+                    self.set_content(item_id, item_type, bodies, start)
+
+        return errors
 
     def get_by_id(self, item_id: str) -> Optional[IndexRecord]:
         """
@@ -74,12 +319,48 @@ class DBIndexService:
         Returns:
             IndexRecord or None
         """
+        read_barrier()
         try:
             item = IndexedItem.objects.get(id=item_id)
             return self._item_to_record(item)
         except IndexedItem.DoesNotExist:
             return None
 
+    def get_many(self, item_ids: List[str]) -> List[IndexRecord]:
+        """
+        Get several items by ID in one query.
+
+        Args:
+            item_ids: Item IDs
+
+        Returns:
+            IndexRecords in the order of item_ids; unknown IDs are skipped
+        """
+        read_barrier()
+        items = IndexedItem.objects.in_bulk(list(item_ids))
+        return [self._item_to_record(items[item_id]) for item_id in item_ids if item_id in items]
+
+    def find_by_conversation(self, provider: str, conversation_id: str) -> Optional[IndexRecord]:
+        """
+        Find a chat by provider (case-insensitive) and conversation_id.
+
+        Backed by the unique (provider_key, conversation_id) index, so the
+        lookup cost does not depend on the number of chats.
+
+        Args:
+            provider: AI provider name (e.g., 'ChatGPT', 'Claude')
+            conversation_id: Conversation ID from the provider
+
+        Returns:
+            IndexRecord or None
+        """
+        read_barrier()
+        item = IndexedItem.objects.filter(
+            provider_key=self._provider_key(provider),
+            conversation_id=conversation_id,
+        ).first()
+        return self._item_to_record(item) if item else None
+
     def search(self,
                type_filter: Optional[str] = None,
                labels: Optional[List[str]] = None,
@@ -88,26 +369,549 @@ class DBIndexService:
                provider: Optional[str] = None,
                query: Optional[str] = None,
                limit: int = 50,
-               cursor: Optional[str] = None) -> Dict:
+               cursor: Optional[str] = None,
+               labels_mode: str = 'all',
+               facets: bool = False,
+               facet_limit: int = 20,
+               fuzzy: bool = False,
+               sort: Optional[str] = None) -> Dict:
         """
         Search index with filters and pagination.
 
         Args:
             type_filter: Filter by type (prompt/template/chat)
-            labels: Filter by labels (AND logic - must have all)
+            labels: Filter by labels
             slug: Filter by exact slug
             author: Filter by author
             provider: Filter by provider (for chats)
-            query: Text search query (title, description, slug)
+            query: Text search query over title, description, slug, labels
+                and content (HEAD version, chat messages); matches are
+                ordered by relevance and carry a highlighted snippet
+            limit: Max results
+            cursor: Pagination cursor
+            labels_mode: 'all' (AND, default) or 'any' (OR) for label filters
+            facets: Also return facet counts for the whole result set (see facets())
+            facet_limit: Max values per facet
+            fuzzy: Match query against title, slug and labels by trigram
+                similarity instead, tolerating typos; results are ordered by
+                similarity
+            sort: Sort key (see SORT_KEYS), '-' prefixed for descending;
+                defaults to '-updated_at'. Text searches are ordered by
+                relevance instead
+
+        Results are cached until the next index write (see search_cache).
+
+        Returns:
+            Dict with items, count, and next_cursor (and facets if requested)
+        """
+        read_barrier()
+        sort_key = self.parse_sort(sort, type_filter)
+        key = self._cache_key('search', type_filter, labels, slug, author, provider, query, labels_mode,
+                              limit, cursor, facets, facet_limit, fuzzy, sort_key)
+        generation = self._cache_generation()
+        cached = search_cache.get(key, generation)
+        if cached is not None:
+            return cached
+
+        queryset = self._filtered_queryset(
+            type_filter=type_filter,
+            labels=labels,
+            slug=slug,
+            author=author,
+            provider=provider,
+            labels_mode=labels_mode,
+        )
+        if fuzzy and query:
+            results = self._search_fuzzy(queryset, query, limit, cursor)
+        else:
+            results = self._search_page(queryset, query, limit, cursor, sort_key)
+
+        if facets:
+            results['facets'] = self.facets(type_filter, labels, slug, author, provider, query,
+                                            labels_mode, facet_limit, fuzzy)
+
+        search_cache.put(key, generation, results)
+        return results
+
+    def facets(self,
+               type_filter: Optional[str] = None,
+               labels: Optional[List[str]] = None,
+               slug: Optional[str] = None,
+               author: Optional[str] = None,
+               provider: Optional[str] = None,
+               query: Optional[str] = None,
+               labels_mode: str = 'all',
+               limit: int = 20,
+               fuzzy: bool = False) -> Dict:
+        """
+        Count matching items per label, type, provider, model and author.
+
+        Takes the same filters as search(); each facet is one grouped query
+        over the matching items. Counts are cached until the next index
+        write, so the unfiltered library's are usually free.
+
+        Args:
+            limit: Max values per facet, most frequent first
+            fuzzy: Count the items a fuzzy search (see search()) would return
+
+        Returns:
+            Dict mapping facet name ('labels', 'type', 'provider', 'model',
+            'author') to [{value, count}]
+        """
+        read_barrier()
+        key = self._cache_key('facets', type_filter, labels, slug, author, provider, query, labels_mode,
+                              limit, fuzzy)
+        generation = self._cache_generation()
+        cached = search_cache.get(key, generation)
+        if cached is not None:
+            return cached
+
+        queryset = self._filtered_queryset(
+            type_filter=type_filter,
+            labels=labels,
+            slug=slug,
+            author=author,
+            provider=provider,
+            labels_mode=labels_mode,
+        )
+        if query and fuzzy:
+            queryset = queryset.filter(id__in=[item_id for _, item_id in self._fuzzy_matches(queryset, query)])
+        elif query:
+            queryset = self._matching_queryset(queryset, query)
+        counts = self._facet_counts(queryset, limit)
+
+        search_cache.put(key, generation, counts)
+        return counts
+
+    @staticmethod
+    def parse_sort(sort: Optional[str], item_type: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Validate a sort parameter of the list and search endpoints.
+
+        Args:
+            sort: Sort key from SORT_KEYS, '-' prefixed for descending
+            item_type: Type the listing is restricted to, if any
+
+        Returns:
+            Tuple of (field, descending)
+
+        Raises:
+            BadRequestError: Unknown key, or a key that does not apply to item_type
+        """
+        field, descending = parse_sort(sort, DEFAULT_SORT)
+        if field not in SORT_KEYS:
+            raise BadRequestError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        types = SORT_KEYS[field]
+        if types is not None and item_type not in types:
+            raise BadRequestError(f"sort by {field} requires type {' or '.join(types)}")
+        return field, descending
+
+    @staticmethod
+    def generation() -> int:
+        """
+        Get the index generation, which every index write transaction bumps.
+
+        Returns:
+            Current generation (0 before the first write)
+        """
+        return IndexGeneration.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+    @classmethod
+    def _cache_generation(cls) -> Tuple[int, int]:
+        """
+        Get the (index generation, local write count) search_cache entries are validated with.
+
+        On SQLite the generation is read again only after another connection
+        committed, as told by PRAGMA data_version, which reads no table. This
+        process's own writes are covered by the write count, so a cache hit
+        costs no query against the index.
+        """
+        if connection.vendor != 'sqlite':
+            return cls.generation(), _local_writes
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA data_version')
+            data_version = cursor.fetchone()[0]
+        seen = _generation_seen
+        if getattr(seen, 'connection', None) is not connection.connection or seen.data_version != data_version:
+            seen.connection, seen.data_version = connection.connection, data_version
+            seen.generation = cls.generation()
+        return seen.generation, _local_writes
+
+    def list_items(self,
+                   item_type: str,
+                   labels: Optional[List[str]] = None,
+                   provider: Optional[str] = None,
+                   limit: int = 100,
+                   cursor: Optional[str] = None,
+                   labels_mode: str = 'all',
+                   sort: Optional[str] = None) -> Dict:
+        """
+        List items of one type for the list endpoints.
+
+        Served entirely from the index; item files are never read.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            labels: Filter by labels
+            provider: Filter by provider, case-insensitive (for chats)
             limit: Max results
             cursor: Pagination cursor
+            labels_mode: 'all' (AND, default) or 'any' (OR) for label filters
+            sort: Sort key (see SORT_KEYS), '-' prefixed for descending;
+                defaults to '-updated_at'
+
+        Returns:
+            Dict with summary items, count, total and next_cursor
+        """
+        read_barrier()
+        sort_key = self.parse_sort(sort, item_type)
+        queryset = self._filtered_queryset(type_filter=item_type, labels=labels, provider=provider,
+                                           labels_mode=labels_mode)
+
+        total = queryset.count()
+        rows, next_cursor = self._paginate(queryset, limit, cursor, sort_key=sort_key, columns=SUMMARY_COLUMNS)
+
+        return {
+            'items': [self._row_to_summary(row) for row in rows],
+            'count': len(rows),
+            'total': total,
+            'next_cursor': next_cursor,
+        }
+
+    def list_labels(self,
+                    item_type: Optional[str] = None,
+                    prefix: Optional[str] = None,
+                    limit: int = 100) -> Dict:
+        """
+        List labels with the number of items carrying each.
+
+        Args:
+            item_type: Only count items of this type
+            prefix: Only labels starting with this text
+            limit: Max labels
+
+        Returns:
+            Dict with labels ([{label, count}], most used first) and count
+        """
+        read_barrier()
+        queryset = ItemLabel.objects.all()
+        if item_type:
+            queryset = queryset.filter(item_type=item_type)
+        if prefix:
+            queryset = queryset.filter(label__startswith=prefix)
+
+        rows = list(
+            queryset.values('label')
+            .annotate(count=Count('item_id'))
+            .order_by('-count', 'label')[:limit]
+        )
+        return {'labels': rows, 'count': len(rows)}
+
+    @staticmethod
+    def duplicates_enabled() -> bool:
+        """Whether content is signed for duplicate detection (settings.DUPLICATE_DETECTION_ENABLED)."""
+        return getattr(settings, 'DUPLICATE_DETECTION_ENABLED', False)
+
+    def require_duplicate_detection(self) -> None:
+        """
+        Reject duplicate lookups while content is not being signed.
+
+        Raises:
+            BadRequestError: If duplicate detection is disabled
+        """
+        if not self.duplicates_enabled():
+            raise BadRequestError("Duplicate detection is disabled (DUPLICATE_DETECTION_ENABLED)")
+
+    def find_duplicates(self, item_id: str, threshold: Optional[float] = None, limit: int = 10) -> List[Dict]:
+        """
+        Find likely duplicates of one item.
+
+        Candidates are the items sharing an LSH bucket with it; each is kept
+        if its estimated content similarity reaches the threshold.
+
+        Args:
+            item_id: Item ID
+            threshold: Minimum similarity; defaults to settings.DUPLICATE_THRESHOLD
+            limit: Max results
+
+        Returns:
+            List of item dicts with a 'similarity', most similar first
+
+        Raises:
+            BadRequestError: If duplicate detection is disabled
+        """
+        self.require_duplicate_detection()
+        read_barrier()
+        threshold = threshold if threshold is not None else getattr(settings, 'DUPLICATE_THRESHOLD', 0.8)
+        own = ItemSignature.objects.filter(item_id=item_id).values_list('signature', flat=True).first()
+        if own is None:
+            return []
+        own = minhash.from_bytes(own)
+
+        buckets = Q()
+        for band, bucket in ItemBucket.objects.filter(item_id=item_id).values_list('band', 'bucket'):
+            buckets |= Q(band=band, bucket=bucket)
+        candidates = ItemBucket.objects.filter(buckets).exclude(item_id=item_id).values('item_id').distinct()
+
+        scores = {}
+        for candidate_id, signature in ItemSignature.objects.filter(item_id__in=candidates).values_list(
+                'item_id', 'signature'):
+            score = minhash.similarity(own, minhash.from_bytes(signature))
+            if score >= threshold:
+                scores[candidate_id] = score
+
+        best = sorted(scores, key=lambda candidate_id: (-scores[candidate_id], candidate_id))[:limit]
+        duplicates = []
+        for record in self.get_many(best):
+            item = record.to_response_dict()
+            item['similarity'] = scores[record.id]
+            duplicates.append(item)
+        return duplicates
+
+    def duplicate_clusters(self, item_type: Optional[str] = None,
+                           threshold: Optional[float] = None) -> List[Dict]:
+        """
+        Group the library into clusters of near-duplicate items.
+
+        Only LSH buckets holding more than one item are read. Within a bucket
+        each member is compared with the bucket's first member, and matches
+        are merged across buckets, so the work grows with the number of
+        candidate items rather than with the number of pairs.
+
+        Args:
+            item_type: Only consider items of this type
+            threshold: Minimum similarity; defaults to settings.DUPLICATE_THRESHOLD
 
         Returns:
-            Dict with items, count, and next_cursor
+            List of clusters ({items, size}), largest first; items are
+            item dicts ordered by most recent update
+
+        Raises:
+            BadRequestError: If duplicate detection is disabled
+        """
+        self.require_duplicate_detection()
+        read_barrier()
+        threshold = threshold if threshold is not None else getattr(settings, 'DUPLICATE_THRESHOLD', 0.8)
+
+        shared = ItemBucket.objects.all()
+        if item_type:
+            shared = shared.filter(item_type=item_type)
+        shared_sql, params = shared.order_by().values('band', 'bucket').annotate(
+            members=Count('id')).filter(members__gt=1).values('band', 'bucket').query.sql_with_params()
+        sql = (
+            f"SELECT b.band, b.bucket, b.item_id FROM item_buckets b "
+            f"JOIN ({shared_sql}) shared ON shared.band = b.band AND shared.bucket = b.bucket"
+        )
+        params = list(params)
+        if item_type:
+            sql += " WHERE b.item_type = %s"
+            params.append(item_type)
+        sql += " ORDER BY b.band, b.bucket, b.item_id"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        groups: Dict[Tuple[int, int], List[str]] = {}
+        for band, bucket, member_id in rows:
+            groups.setdefault((band, bucket), []).append(member_id)
+
+        member_ids = list({member_id for _, _, member_id in rows})
+        signatures = {}
+        for i in range(0, len(member_ids), 500):
+            for member_id, signature in ItemSignature.objects.filter(
+                    item_id__in=member_ids[i:i + 500]).values_list('item_id', 'signature'):
+                signatures[member_id] = minhash.from_bytes(signature)
+
+        # Union-find over verified pairs
+        parent = {}
+
+        def find(node):
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for members in groups.values():
+            members = [member_id for member_id in members if member_id in signatures]
+            for other in members[1:]:
+                if find(members[0]) == find(other):
+                    continue
+                if minhash.similarity(signatures[members[0]], signatures[other]) >= threshold:
+                    parent[find(other)] = find(members[0])
+
+        clusters: Dict[str, List[str]] = {}
+        for member_id in parent:
+            clusters.setdefault(find(member_id), []).append(member_id)
+        clusters = [members for members in clusters.values() if len(members) > 1]
+
+        records = {}
+        all_ids = [member_id for members in clusters for member_id in members]
+        for i in range(0, len(all_ids), 500):
+            records.update((record.id, record) for record in self.get_many(all_ids[i:i + 500]))
+
+        result = []
+        for members in clusters:
+            items = sorted((records[member_id] for member_id in members if member_id in records),
+                           key=lambda record: (record.updated_at or '', record.id), reverse=True)
+            if len(items) > 1:
+                result.append({'items': [record.to_response_dict() for record in items], 'size': len(items)})
+        result.sort(key=lambda cluster: (-cluster['size'], cluster['items'][0]['id']))
+        return result
+
+    def get_status(self, top_labels: int = 20) -> Dict:
+        """
+        Get index status information.
+
+        Counts and sizes come from the IndexStat totals maintained by index
+        writes, so the cost does not depend on the size of the index.
+
+        Args:
+            top_labels: Number of most used labels to include
+
+        Returns:
+            Dict with status info
+        """
+        read_barrier()
+        counts: Dict[str, Dict[str, int]] = {'type': {}, 'provider': {}, 'storage': {}}
+        for dimension, key, value in IndexStat.objects.filter(
+                dimension__in=list(counts)).values_list('dimension', 'key', 'value'):
+            counts[dimension][key] = value
+        labels = IndexStat.objects.filter(dimension='label').order_by('-value', 'key')[:top_labels]
+
+        generation, last_updated = IndexGeneration.objects.filter(pk=1).values_list(
+            'value', 'last_updated').first() or (0, None)
+
+        return {
+            'prompts_count': counts['type'].get('prompt', 0),
+            'templates_count': counts['type'].get('template', 0),
+            'chats_count': counts['type'].get('chat', 0),
+            'providers': counts['provider'],
+            'top_labels': [{'label': stat.key, 'count': stat.value} for stat in labels],
+            'last_updated': last_updated.isoformat() if last_updated else None,
+            'index_size_bytes': self._database_size(),
+            'storage_size_bytes': counts['storage'].get('bytes', 0),
+            'generation': generation,
+        }
+
+    def rebuild(self, storage_service, workers: Optional[int] = None,
+                chunk_size: Optional[int] = None) -> Dict:
+        """
+        Rebuild index from file storage.
+
+        Files are parsed in parallel and rows are bulk-inserted in chunks
+        (see IndexBuilder).
+
+        Args:
+            storage_service: FileStorageService instance
+            workers: Parser processes (defaults to settings / CPU count)
+            chunk_size: Batch size for parsing and inserts
+
+        Returns:
+            Dict with rebuild and throughput statistics
+        """
+        from backend.apps.core.services.index_builder import IndexBuilder
+        read_barrier()
+        return IndexBuilder(storage_service, self, workers, chunk_size).rebuild()
+
+    def reconcile(self, storage_service, dry_run: bool = False) -> Dict:
+        """
+        Incrementally sync the index with file storage.
+
+        Only files whose manifest fingerprint changed are re-parsed (see
+        IndexReconciler).
+
+        Args:
+            storage_service: FileStorageService instance
+            dry_run: Only report what would change
+
+        Returns:
+            Dict with reconcile statistics
+        """
+        from backend.apps.core.services.index_reconciler import IndexReconciler
+        read_barrier()
+        return IndexReconciler(storage_service, self).reconcile(dry_run=dry_run)
+
+    def reconcile_items(self, storage_service, items: List[Tuple[str, str]]) -> Dict:
+        """
+        Sync only the given items with file storage.
+
+        Args:
+            storage_service: FileStorageService instance
+            items: (item_type, path) pairs, as from FileStorageService.list_index_paths
+
+        Returns:
+            Dict with reconcile statistics
+        """
+        from backend.apps.core.services.index_reconciler import IndexReconciler
+        read_barrier()
+        return IndexReconciler(storage_service, self).reconcile_items(items)
+
+    def replace_all(self, chunk_size: int = 1000) -> 'IndexReplacement':
+        """
+        Start replacing the whole index with freshly parsed items.
+
+        The items are written chunk by chunk with IndexReplacement.write,
+        each chunk in its own transaction, and IndexReplacement.finish then
+        drops whatever no chunk contained.
+
+        Args:
+            chunk_size: Rows per bulk_create batch
+
+        Returns:
+            IndexReplacement to write the parsed items through
+        """
+        return IndexReplacement(self, chunk_size)
+
+    def _search_page(self, queryset, query: Optional[str], limit: int, cursor: Optional[str],
+                     sort_key: Tuple[str, bool] = (DEFAULT_SORT[1:], True)) -> Dict:
+        """Apply text search to a filtered queryset and fetch one page of results."""
+        match = self._fts_match_expression(query) if query else None
+        if match and self._fts_available():
+            results, next_cursor = self._search_fts(queryset, match, limit, cursor)
+            items = []
+            for row, snippet, message_index in results:
+                item = self._row_to_response(row)
+                item['snippet'] = snippet
+                item['snippet_message'] = message_index
+                items.append(item)
+            return {'items': items, 'count': len(items), 'next_cursor': next_cursor}
+
+        ranked = False
+        if query:
+            queryset, ranked = self._apply_text_search(queryset, query)
+
+        rows, next_cursor = self._paginate(queryset, limit, cursor, ranked=ranked, sort_key=sort_key)
+
+        items = [self._row_to_response(row) for row in rows]
+        if query:
+            for item in items:
+                item['snippet'] = None
+                item['snippet_message'] = None
+        return {
+            'items': items,
+            'count': len(items),
+            'next_cursor': next_cursor,
+        }
+
+    def _filtered_queryset(self,
+                           type_filter: Optional[str] = None,
+                           labels: Optional[List[str]] = None,
+                           slug: Optional[str] = None,
+                           author: Optional[str] = None,
+                           provider: Optional[str] = None,
+                           labels_mode: str = 'all'):
+        """
+        Build a queryset with the exact-match filters applied.
+
+        Label filters run as semi-joins against the item_labels table;
+        labels_mode 'all' requires every label, 'any' at least one.
+
+        Returns:
+            Filtered queryset
         """
         queryset = IndexedItem.objects.all()
 
-        # Apply filters
         if type_filter:
             queryset = queryset.filter(item_type=type_filter)
 
@@ -118,220 +922,742 @@ class DBIndexService:
             queryset = queryset.filter(author=author)
 
         if provider:
-            queryset = queryset.filter(provider=provider)
+            queryset = queryset.filter(provider_key=self._provider_key(provider))
 
         if labels:
-            # AND logic: must contain all specified labels
-            # For SQLite: filter in Python since JSON field doesn't support contains
-            # This is less efficient but works across all databases
-            for label in labels:
-                # Filter using JSON contains - works in memory for SQLite
-                queryset = [item for item in queryset if label in item.labels]
-                # Convert back to queryset
-                item_ids = [item.id if hasattr(item, 'id') else item['id'] for item in queryset]
-                queryset = IndexedItem.objects.filter(id__in=item_ids)
-
-        # Text search
-        if query:
-            queryset = self._apply_text_search(queryset, query)
+            if labels_mode == 'any':
+                # OR logic: one semi-join over the label index
+                queryset = queryset.filter(id__in=ItemLabel.objects.filter(label__in=labels).values('item_id'))
+            else:
+                # AND logic: must contain all specified labels
+                for label in labels:
+                    queryset = queryset.filter(id__in=ItemLabel.objects.filter(label=label).values('item_id'))
 
-        # Cursor-based pagination
-        if cursor:
-            cursor_data = decode_cursor(cursor)
-            if cursor_data:
-                cursor_updated_at, cursor_id = cursor_data
-                cursor_dt = parse_datetime(cursor_updated_at)
+        return queryset
 
-                # Keyset pagination: (updated_at, id) ordering
-                queryset = queryset.filter(
-                    Q(updated_at__lt=cursor_dt) |
-                    Q(updated_at=cursor_dt, id__lt=cursor_id)
-                )
+    def _paginate(self, queryset, limit: int, cursor: Optional[str], ranked: bool = False,
+                  sort_key: Tuple[str, bool] = (DEFAULT_SORT[1:], True),
+                  columns: Tuple[str, ...] = RESPONSE_COLUMNS):
+        """
+        Apply keyset pagination over (sort key, id).
 
-        # Order by updated_at DESC, id DESC (already in Meta.ordering)
-        queryset = queryset.order_by('-updated_at', '-id')
+        Args:
+            queryset: Filtered queryset
+            limit: Page size
+            cursor: Cursor from a previous page
+            ranked: Queryset carries a 'rank' from text search; paginate
+                over (rank desc, id) instead
+            sort_key: (field, descending) from parse_sort; id follows the
+                same direction
+            columns: IndexedItem columns to fetch
+
+        Returns:
+            Tuple of (list of row tuples of columns, then the sort field if
+            not among them; next_cursor or None)
+        """
+        if ranked:
+            return self._paginate_ranked(queryset, limit, cursor, columns)
+
+        field, descending = sort_key
+        before = 'lt' if descending else 'gt'
+        cursor_data = decode_cursor(cursor, field)
+        if cursor_data:
+            cursor_value, cursor_id = cursor_data
+            if field in ('updated_at', 'created_at'):
+                cursor_value = parse_datetime(cursor_value)
+
+            # Keyset pagination: rows after (value, id) in sort order
+            queryset = queryset.filter(
+                Q(**{f'{field}__{before}': cursor_value}) |
+                Q(**{field: cursor_value, f'id__{before}': cursor_id})
+            )
+
+        direction = '-' if descending else ''
+        queryset = queryset.order_by(f'{direction}{field}', f'{direction}id')
 
         # Fetch limit + 1 to determine if there's a next page
-        items_list = list(queryset[:limit + 1])
+        columns = tuple(dict.fromkeys((*columns, field)))
+        rows = list(queryset.values_list(*columns)[:limit + 1])
 
-        has_more = len(items_list) > limit
+        has_more = len(rows) > limit
         if has_more:
-            items_list = items_list[:limit]
+            rows = rows[:limit]
+
+        next_cursor = None
+        if has_more and rows:
+            last_value = rows[-1][columns.index(field)]
+            if isinstance(last_value, datetime):
+                last_value = last_value.isoformat()
+            next_cursor = encode_cursor(last_value, rows[-1][0], field)
+
+        return rows, next_cursor
 
-        # Convert to IndexRecord
-        results = [self._item_to_record(item) for item in items_list]
+    def _paginate_ranked(self, queryset, limit: int, cursor: Optional[str],
+                         columns: Tuple[str, ...] = RESPONSE_COLUMNS):
+        """Keyset pagination over (rank desc, id asc) for text search results."""
+        cursor_data = decode_rank_cursor(cursor)
+        if cursor_data:
+            cursor_rank, cursor_id = cursor_data
+            queryset = queryset.filter(
+                Q(rank__lt=cursor_rank) |
+                Q(rank=cursor_rank, id__gt=cursor_id)
+            )
+
+        rows = list(queryset.order_by('-rank', 'id').values_list(*columns, 'rank')[:limit + 1])
+
+        has_more = len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
 
-        # Generate next cursor
         next_cursor = None
-        if has_more and results:
-            last_item = results[-1]
-            next_cursor = encode_cursor(last_item.updated_at, last_item.id)
+        if has_more and rows:
+            next_cursor = encode_rank_cursor(rows[-1][-1], rows[-1][0])
 
-        return {
-            'items': [r.to_response_dict() for r in results],
-            'count': len(results),
-            'next_cursor': next_cursor,
-        }
+        return rows, next_cursor
 
-    def get_status(self) -> Dict:
+    def _search_fts(self, queryset, match: str, limit: int, cursor: Optional[str]):
         """
-        Get index status information.
+        Ranked full-text search through the SQLite FTS5 tables.
+
+        Metadata (item_search) and content (content_search) hits are merged
+        per item in one query: an item scores its metadata bm25 plus that of
+        its best content row, and pages by keyset over (score desc, id).
+        Only the page's items are then loaded and given snippets.
+
+        Args:
+            queryset: Queryset with the exact-match filters applied
+            match: FTS5 MATCH expression
+            limit: Page size
+            cursor: Rank cursor from a previous page
 
         Returns:
-            Dict with status info
+            Tuple of ([(RESPONSE_COLUMNS row, snippet, chat message index or None)], next_cursor)
         """
-        # Count by type
-        stats = IndexedItem.objects.values('item_type').annotate(
-            count=Count('id')
-        )
+        rank = "COALESCE(MAX(hits.meta_rank), 0) + COALESCE(MAX(hits.content_rank), 0)"
+        hits_sql, params = self._fts_hits_sql(match)
+        sql = f"SELECT hits.item_id, {rank} AS rank FROM ({hits_sql}) AS hits"
 
-        prompts_count = 0
-        templates_count = 0
-        chats_count = 0
+        if queryset.query.where:
+            filter_sql, filter_params = queryset.order_by().values('id').query.sql_with_params()
+            sql += f" WHERE hits.item_id IN ({filter_sql})"
+            params.extend(filter_params)
 
-        for stat in stats:
-            if stat['item_type'] == 'prompt':
-                prompts_count = stat['count']
-            elif stat['item_type'] == 'template':
-                templates_count = stat['count']
-            elif stat['item_type'] == 'chat':
-                chats_count = stat['count']
+        sql += " GROUP BY hits.item_id"
+        cursor_data = decode_rank_cursor(cursor)
+        if cursor_data:
+            cursor_rank, cursor_id = cursor_data
+            sql += f" HAVING {rank} < %s OR ({rank} = %s AND hits.item_id > %s)"
+            params.extend([cursor_rank, cursor_rank, cursor_id])
+        sql += " ORDER BY rank DESC, hits.item_id LIMIT %s"
+        params.append(limit + 1)
 
-        # Get last updated
-        last_updated = IndexedItem.objects.aggregate(
-            max_updated=models.Max('updated_at')
-        )['max_updated']
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            hits = db_cursor.fetchall()
 
-        return {
-            'prompts_count': prompts_count,
-            'templates_count': templates_count,
-            'chats_count': chats_count,
-            'last_updated': last_updated.isoformat() if last_updated else None,
-            'index_size_bytes': 0,  # Not applicable for DB
-        }
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+        item_ids = [item_id for item_id, _ in hits]
+        rows = self._rows_by_id(item_ids)
+        snippets = self._fts_snippets(match, item_ids)
+
+        results = [
+            (rows[item_id], *snippets.get(item_id, (None, None)))
+            for item_id in item_ids if item_id in rows
+        ]
+
+        next_cursor = None
+        if has_more and hits:
+            next_cursor = encode_rank_cursor(hits[-1][1], hits[-1][0])
+
+        return results, next_cursor
 
-    def rebuild(self, storage_service) -> Dict:
+    def _search_fuzzy(self, queryset, query: str, limit: int, cursor: Optional[str]) -> Dict:
+        """Fetch one page of fuzzy matches, ordered by (similarity desc, id)."""
+        matches = self._fuzzy_matches(queryset, query)
+
+        cursor_data = decode_rank_cursor(cursor)
+        if cursor_data:
+            cursor_score, cursor_id = cursor_data
+            matches = [
+                (score, item_id) for score, item_id in matches
+                if score < cursor_score or (score == cursor_score and item_id > cursor_id)
+            ]
+
+        page = matches[:limit]
+        rows = self._rows_by_id([item_id for _, item_id in page])
+        results = []
+        for score, item_id in page:
+            if item_id in rows:
+                item = self._row_to_response(rows[item_id])
+                item['similarity'] = score
+                item['snippet'] = None
+                item['snippet_message'] = None
+                results.append(item)
+
+        next_cursor = None
+        if len(matches) > limit and page:
+            next_cursor = encode_rank_cursor(*page[-1])
+
+        return {'items': results, 'count': len(results), 'next_cursor': next_cursor}
+
+    @staticmethod
+    def _fuzzy_matches(queryset, query: str) -> List[Tuple[float, str]]:
         """
-        Rebuild index from file storage.
+        Find items whose title, slug, a label, or a word of them is similar to query.
+
+        Candidates come from the item_trigrams posting lists of the query's
+        own trigrams: a text with similarity >= t shares at least
+        t * len(query trigrams) of them, so items below that count are
+        dropped in SQL, and only the FUZZY_SEARCH_CANDIDATES items sharing
+        the most are scored. The cost depends on the query, not on the
+        size of the library.
 
         Args:
-            storage_service: FileStorageService instance
+            queryset: Queryset with the exact-match filters applied
+            query: Search text
 
         Returns:
-            Dict with rebuild statistics
+            List of (similarity, item ID), best first, at or above
+            settings.FUZZY_SEARCH_THRESHOLD
         """
-        stats = {
-            'prompts_added': 0,
-            'templates_added': 0,
-            'chats_added': 0,
-            'errors': [],
-        }
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+        threshold = getattr(settings, 'FUZZY_SEARCH_THRESHOLD', 0.3)
+        max_candidates = getattr(settings, 'FUZZY_SEARCH_CANDIDATES', 200)
 
-        with transaction.atomic():
-            # Clear existing index
-            IndexedItem.objects.all().delete()
+        candidates = ItemTrigram.objects.filter(trigram__in=query_trigrams)
+        if queryset.query.where:
+            candidates = candidates.filter(item_id__in=queryset.order_by().values('id'))
+        candidates = candidates.values('item_id').annotate(shared=Count('id')).filter(
+            shared__gte=max(1, math.ceil(threshold * len(query_trigrams)))
+        ).order_by('-shared', 'item_id')[:max_candidates]
+        candidate_ids = [row['item_id'] for row in candidates]
 
-            # Rebuild prompts
+        matches = []
+        rows = IndexedItem.objects.filter(id__in=candidate_ids).values_list('id', 'title', 'slug', 'labels_json')
+        for item_id, title, slug, labels_json in rows:
             try:
-                prompts = storage_service.list_all_items('prompt')
-                for prompt in prompts:
-                    try:
-                        # Convert to PromptMeta then to IndexRecord
-                        from backend.apps.core.domain.base_meta import PromptMeta
-                        prompt_meta = PromptMeta.from_file_dict(prompt.__dict__())
-                        record = prompt_meta.to_index_record()
-                        self.add_or_update(record)
-                        stats['prompts_added'] += 1
-                    except Exception as e:
-                        stats['errors'].append({
-                            'item': prompt.id if hasattr(prompt, 'id') else 'unknown',
-                            'type': 'prompt',
-                            'error': str(e),
-                        })
-            except Exception as e:
-                stats['errors'].append({
-                    'type': 'prompts',
-                    'error': str(e),
-                })
-
-            # Rebuild templates
-            try:
-                templates = storage_service.list_all_items('template')
-                for template in templates:
-                    try:
-                        from backend.apps.core.domain.base_meta import TemplateMeta
-                        template_meta = TemplateMeta.from_file_dict(template.__dict__())
-                        record = template_meta.to_index_record()
-                        self.add_or_update(record)
-                        stats['templates_added'] += 1
-                    except Exception as e:
-                        stats['errors'].append({
-                            'item': template.id if hasattr(template, 'id') else 'unknown',
-                            'type': 'template',
-                            'error': str(e),
-                        })
-            except Exception as e:
-                stats['errors'].append({
-                    'type': 'templates',
-                    'error': str(e),
-                })
-
-            # Rebuild chats
-            try:
-                chats = storage_service.list_all_chats()
-                for chat in chats:
-                    try:
-                        from backend.apps.core.domain.base_meta import ChatMeta
-                        chat_meta = ChatMeta.from_file_dict(chat.__dict__())
-                        record = chat_meta.to_index_record()
-                        self.add_or_update(record)
-                        stats['chats_added'] += 1
-                    except Exception as e:
-                        stats['errors'].append({
-                            'item': chat.id if hasattr(chat, 'id') else 'unknown',
-                            'type': 'chat',
-                            'error': str(e),
-                        })
-            except Exception as e:
-                stats['errors'].append({
-                    'type': 'chats',
-                    'error': str(e),
-                })
+                labels = json.loads(labels_json or '[]')
+            except (TypeError, ValueError):
+                labels = []
+            fields = DBIndexService._fuzzy_fields(title, slug, labels)
+            texts = fields + [word for text in fields for word in re.findall(r'[^\W_]+', text)]
+            score = round(max(similarity(query_trigrams, trigrams(text)) for text in texts), 4)
+            if score >= threshold:
+                matches.append((score, item_id))
 
-        return stats
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches
+
+    @staticmethod
+    def _fts_hits_sql(match: str) -> Tuple[str, List]:
+        """
+        SQL listing every FTS hit as (item_id, meta_rank, content_rank).
+
+        An item appears once per matching metadata or content row.
+
+        Returns:
+            Tuple of (SQL, params)
+        """
+        sql = f"""
+            SELECT {FTS_TABLE}.item_id AS item_id, {FTS_RANK} AS meta_rank, NULL AS content_rank
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            UNION ALL
+            SELECT item_content.item_id, NULL, {CONTENT_FTS_RANK}
+            FROM {CONTENT_FTS_TABLE} JOIN item_content ON item_content.id = {CONTENT_FTS_TABLE}.rowid
+            WHERE {CONTENT_FTS_TABLE} MATCH %s
+        """
+        return sql, [match, match]
+
+    def _matching_queryset(self, queryset, query: str):
+        """Restrict a filtered queryset to items matching a text query, without ranking it."""
+        match = self._fts_match_expression(query)
+        if match and self._fts_available():
+            hits_sql, params = self._fts_hits_sql(match)
+            return queryset.filter(id__in=RawSQL(f"SELECT item_id FROM ({hits_sql})", params))
+
+        searched, _ = self._apply_text_search(queryset, query)
+        return IndexedItem.objects.filter(id__in=searched.values('id'))
+
+    @staticmethod
+    def _facet_counts(queryset, limit: int) -> Dict[str, List[Dict]]:
+        """Run one grouped count per facet over a filtered queryset."""
+        queryset = queryset.order_by()
+        facets = {}
+
+        labels = ItemLabel.objects.all()
+        if queryset.query.where:
+            labels = labels.filter(item_id__in=queryset.values('id'))
+        facets['labels'] = [
+            {'value': row['label'], 'count': row['count']}
+            for row in labels.values('label').annotate(count=Count('item_id')).order_by('-count', 'label')[:limit]
+        ]
+
+        for name, field in FACET_FIELDS:
+            rows = (
+                queryset.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .values(field).annotate(count=Count('id')).order_by('-count', field)[:limit]
+            )
+            facets[name] = [{'value': row[field], 'count': row['count']} for row in rows]
+
+        return facets
+
+    @staticmethod
+    def _fts_snippets(match: str, item_ids: List[str]) -> Dict[str, Tuple[str, Optional[int]]]:
+        """
+        Highlight where a page of search results matched.
+
+        The best-matching content row wins (for chats, with its message
+        index); items that only matched on metadata get a metadata snippet.
+
+        Returns:
+            Dict mapping item ID to (snippet, chat message index or None)
+        """
+        if not item_ids:
+            return {}
+
+        placeholders = ', '.join(['%s'] * len(item_ids))
+        snippet_args = f"'{SNIPPET_MARKS[0]}', '{SNIPPET_MARKS[1]}', '{SNIPPET_ELLIPSIS}', {SNIPPET_TOKENS}"
+        snippets: Dict[str, Tuple[str, Optional[int]]] = {}
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT item_content.item_id, item_content.item_type, item_content.seq,
+                       snippet({CONTENT_FTS_TABLE}, 0, {snippet_args})
+                FROM {CONTENT_FTS_TABLE} JOIN item_content ON item_content.id = {CONTENT_FTS_TABLE}.rowid
+                WHERE {CONTENT_FTS_TABLE} MATCH %s AND item_content.item_id IN ({placeholders})
+                ORDER BY {CONTENT_FTS_RANK} DESC
+            """, [match, *item_ids])
+            for item_id, item_type, seq, snippet in cursor.fetchall():
+                if item_id not in snippets:
+                    snippets[item_id] = (snippet, seq if item_type == 'chat' else None)
+
+            missing = [item_id for item_id in item_ids if item_id not in snippets]
+            if missing:
+                placeholders = ', '.join(['%s'] * len(missing))
+                cursor.execute(f"""
+                    SELECT item_id, snippet({FTS_TABLE}, -1, {snippet_args})
+                    FROM {FTS_TABLE}
+                    WHERE {FTS_TABLE} MATCH %s AND item_id IN ({placeholders})
+                """, [match, *missing])
+                for item_id, snippet in cursor.fetchall():
+                    snippets[item_id] = (snippet, None)
+
+        return snippets
 
     def _apply_text_search(self, queryset, query: str):
         """
-        Apply text search to queryset.
-        Uses PostgreSQL full-text search if available, falls back to icontains.
+        Apply text search to queryset, for backends without the FTS5 tables.
+
+        PostgreSQL uses its full-text search; anything else falls back to
+        icontains. Both also match item content.
 
         Args:
             queryset: Django queryset
             query: Search query string
 
         Returns:
-            Filtered queryset
+            Tuple of (filtered queryset, whether it carries a 'rank')
         """
-        try:
-            # Try PostgreSQL full-text search
+        if connection.vendor == 'postgresql':
             search_vector = SearchVector('title', weight='A') + \
                           SearchVector('description', weight='B') + \
                           SearchVector('slug', weight='C')
             search_query = SearchQuery(query)
+            content_matches = ItemContent.objects.annotate(
+                search=SearchVector('body'),
+            ).filter(search=search_query).values('item_id')
 
             return queryset.annotate(
                 search=search_vector,
                 rank=SearchRank(search_vector, search_query)
-            ).filter(search=search_query).order_by('-rank', '-updated_at', '-id')
-
-        except Exception:
-            # Fallback to icontains for non-PostgreSQL databases
-            return queryset.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(slug__icontains=query)
+            ).filter(Q(search=search_query) | Q(id__in=content_matches)), True
+
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(slug__icontains=query) |
+            Q(id__in=ItemContent.objects.filter(body__icontains=query).values('item_id'))
+        ), False
+
+    @staticmethod
+    def _bump_generation() -> None:
+        """Advance the index generation; call inside the write's transaction."""
+        global _local_writes
+        _local_writes += 1
+        if not IndexGeneration.objects.filter(pk=1).update(value=F('value') + 1):
+            IndexGeneration.objects.get_or_create(pk=1, defaults={'value': 1})
+
+    @staticmethod
+    def _stats_of(item_ids: List[str]) -> Counter:
+        """
+        Get what some indexed items add to the IndexStat totals.
+
+        Args:
+            item_ids: Item IDs; IDs not in the index add nothing
+
+        Returns:
+            Counter of (dimension, key) -> value
+        """
+        stats = Counter()
+        for item_type, provider, size_bytes in IndexedItem.objects.filter(id__in=item_ids).values_list(
+                'item_type', 'provider', 'size_bytes'):
+            stats['type', item_type] += 1
+            if provider:
+                stats['provider', provider] += 1
+            stats['storage', 'bytes'] += size_bytes
+        for label in ItemLabel.objects.filter(item_id__in=item_ids).values_list('label', flat=True):
+            stats['label', label] += 1
+        return stats
+
+    @staticmethod
+    def _apply_stats(before: Counter, after: Counter) -> None:
+        """
+        Move the IndexStat totals from one state of some items to another.
+
+        Call inside the write's transaction, with the items' _stats_of from
+        before and after the write. Also refreshes the index's last_updated
+        from the updated_at index.
+        """
+        delta = Counter(after)
+        delta.subtract(before)
+        for (dimension, key), change in delta.items():
+            if not change:
+                continue
+            stats = IndexStat.objects.filter(dimension=dimension, key=key)
+            if not stats.update(value=F('value') + change):
+                IndexStat.objects.create(dimension=dimension, key=key, value=change)
+            elif change < 0 and dimension != 'storage':
+                stats.filter(value__lte=0).delete()
+
+        newest = IndexedItem.objects.order_by('-updated_at').values('updated_at')[:1]
+        if not IndexGeneration.objects.filter(pk=1).update(last_updated=Subquery(newest)):
+            IndexGeneration.objects.create(pk=1, value=0, last_updated=newest.values_list(
+                'updated_at', flat=True).first())
+
+    @staticmethod
+    def _rebuild_stats() -> None:
+        """Recompute the IndexStat totals and last_updated from the whole index."""
+        rows = [
+            IndexStat(dimension='type', key=item_type, value=count)
+            for item_type, count in IndexedItem.objects.order_by().values_list('item_type').annotate(Count('id'))
+        ]
+        rows.extend(
+            IndexStat(dimension='provider', key=provider, value=count)
+            for provider, count in IndexedItem.objects.filter(provider__gt='').order_by().values_list(
+                'provider').annotate(Count('id'))
+        )
+        rows.extend(
+            IndexStat(dimension='label', key=label, value=count)
+            for label, count in ItemLabel.objects.order_by().values_list('label').annotate(Count('id'))
+        )
+        total = IndexedItem.objects.aggregate(total=models.Sum('size_bytes'), newest=models.Max('updated_at'))
+        rows.append(IndexStat(dimension='storage', key='bytes', value=total['total'] or 0))
+
+        IndexStat.objects.all().delete()
+        IndexStat.objects.bulk_create(rows, batch_size=1000)
+        if not IndexGeneration.objects.filter(pk=1).update(last_updated=total['newest']):
+            IndexGeneration.objects.create(pk=1, value=0, last_updated=total['newest'])
+
+    @staticmethod
+    def _database_size() -> int:
+        """Get the size of the index database file(s), or 0 if not file-backed."""
+        name = str(connection.settings_dict.get('NAME') or '')
+        size = 0
+        for path in (name, f"{name}-wal"):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    @staticmethod
+    def _cache_key(kind: str, type_filter, labels, slug, author, provider, query, labels_mode, *rest) -> str:
+        """
+        Build a search_cache key from search arguments.
+
+        Equivalent requests share a key: label order and duplicates, blank
+        values, and the case and spacing of the query do not matter.
+        """
+        return json.dumps([
+            kind,
+            type_filter or None,
+            sorted(set(labels or [])),
+            slug or None,
+            author or None,
+            provider or None,
+            ' '.join(query.lower().split()) if query else None,
+            labels_mode if labels else None,
+            *rest,
+        ])
+
+    @staticmethod
+    def _fts_match_expression(query: str) -> Optional[str]:
+        """
+        Turn free text into an FTS5 query: every word must match, as a prefix.
+
+        Returns:
+            MATCH expression, or None if the query has no searchable words
+        """
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    @staticmethod
+    def _fts_available() -> bool:
+        """Whether the FTS5 search tables exist (SQLite with FTS5 only)."""
+        global _fts_available
+        if _fts_available is None:
+            if connection.vendor != 'sqlite':
+                _fts_available = False
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (%s, %s)",
+                        [FTS_TABLE, CONTENT_FTS_TABLE],
+                    )
+                    _fts_available = cursor.fetchone()[0] == 2
+        return _fts_available
+
+    @classmethod
+    def _record_fields(cls, record: IndexRecord) -> Dict:
+        """
+        Convert an IndexRecord into IndexedItem field values.
+
+        Args:
+            record: IndexRecord instance
+
+        Returns:
+            Dict of model field values, including 'id'
+        """
+        # Parse datetime strings
+        created_at = parse_datetime(record.created_at) if record.created_at else datetime.now()
+        updated_at = parse_datetime(record.updated_at) if record.updated_at else datetime.now()
+
+        return {
+            'id': record.id,
+            'item_type': record.item_type.value,
+            'title': record.title,
+            'description': record.description,
+            'slug': record.slug,
+            'labels_json': json.dumps(record.labels or []),
+            'author': record.author,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'version_count': record.version_count,
+            'head_version_id': record.head_version_id,
+            'head_version_number': record.head_version_number,
+            'file_path': record.file_path,
+            'sha': record.sha,
+            'size_bytes': record.size_bytes,
+            'provider': record.provider,
+            'provider_key': cls._provider_key(record.provider),
+            'model': record.model,
+            'conversation_id': record.conversation_id,
+            'turn_count': record.turn_count,
+        }
+
+    def _bulk_upsert(self, records: List[IndexRecord], fields: Optional[List[Dict]] = None) -> None:
+        """
+        Insert or update index rows, their search rows, labels, trigrams and stats with bulk statements.
+
+        Args:
+            records: Records to write
+            fields: Their _record_fields, if already computed (and possibly adjusted)
+        """
+        if fields is None:
+            fields = [self._record_fields(record) for record in records]
+        rows = [IndexedItem(**row_fields) for row_fields in fields]
+        item_ids = [record.id for record in records]
+        before = self._stats_of(item_ids)
+
+        if connection.features.supports_update_conflicts_with_target:
+            update_fields = [field for field in fields[0] if field != 'id']
+            IndexedItem.objects.bulk_create(rows, update_conflicts=True, unique_fields=['id'],
+                                            update_fields=update_fields)
+        else:
+            for row in rows:
+                row.save()
+        self._set_search_rows(fields)
+
+        ItemLabel.objects.filter(item_id__in=item_ids).delete()
+        ItemLabel.objects.bulk_create([row for record in records for row in self._label_rows(record)])
+        ItemTrigram.objects.filter(item_id__in=item_ids).delete()
+        ItemTrigram.objects.bulk_create([row for record in records for row in self._trigram_rows(record)])
+        self._apply_stats(before, self._stats_of(item_ids))
+
+    @staticmethod
+    def _set_manifest(item_ids: List[str], entries: List[Dict]) -> None:
+        """Replace some items' IndexManifest rows; call inside the write's transaction."""
+        if item_ids:
+            IndexManifest.objects.filter(item_id__in=item_ids).delete()
+        IndexManifest.objects.bulk_create([IndexManifest(**entry) for entry in entries], batch_size=500)
+
+    @classmethod
+    def _set_search_rows(cls, fields: List[Dict]) -> None:
+        """Replace some items' item_search rows from their _record_fields; call inside the write's transaction."""
+        if not fields or not cls._fts_available():
+            return
+        cls._remove_search_rows([row_fields['id'] for row_fields in fields])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, description, slug, labels_json, item_id)"
+                " VALUES (%s, %s, %s, %s, %s, %s)",
+                [
+                    item_search_row(row_fields['id'], row_fields['title'], row_fields['description'],
+                                    row_fields['slug'], row_fields['labels_json'])
+                    for row_fields in fields
+                ],
             )
 
+    @classmethod
+    def _remove_search_rows(cls, item_ids: List[str]) -> None:
+        """Delete some items' item_search rows; call inside the write's transaction."""
+        if not item_ids or not cls._fts_available():
+            return
+        rowids = [item_search_rowid(item_id) for item_id in item_ids]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(rowids))})", rowids)
+
+    @staticmethod
+    def _label_rows(record: IndexRecord) -> List[ItemLabel]:
+        """Build the join-table rows for a record's labels."""
+        labels = dict.fromkeys(label for label in (record.labels or []) if isinstance(label, str) and label)
+        return [ItemLabel(item_id=record.id, item_type=record.item_type.value, label=label) for label in labels]
+
+    @staticmethod
+    def _trigram_rows(record: IndexRecord) -> List[ItemTrigram]:
+        """Build the trigram rows for a record's title, slug and labels."""
+        return [
+            ItemTrigram(item_id=record.id, trigram=trigram)
+            for trigram in trigrams_of(DBIndexService._fuzzy_fields(record.title, record.slug, record.labels))
+        ]
+
+    @staticmethod
+    def _fuzzy_fields(title: Optional[str], slug: Optional[str], labels: Optional[List]) -> List[str]:
+        """Texts a fuzzy search is matched against."""
+        return [title or '', slug or '', *(label for label in (labels or []) if isinstance(label, str))]
+
+    def _sign_content(self, item_id: str, item_type: str, bodies: List[str], start: int, appended: bool) -> None:
+        """Update an item's MinHash signature after set_content; appended: only new rows were added."""
+        signature = minhash.signature(bodies)
+        previous = None
+        if appended:
+            previous = ItemSignature.objects.filter(item_id=item_id).values_list('signature', flat=True).first()
+        if previous is not None:
+            previous = minhash.from_bytes(previous)
+            signature = previous if signature is None else minhash.combine(previous, signature)
+        elif start > 0:
+            # Earlier messages were rewritten, or never signed: sign the whole content
+            signature = minhash.signature(
+                ItemContent.objects.filter(item_id=item_id).order_by('seq').values_list('body', flat=True)
+            )
+        self._set_signature(item_id, item_type, signature)
+
+    @classmethod
+    def _set_signature(cls, item_id: str, item_type: str, signature) -> None:
+        """Replace an item's MinHash signature and LSH buckets (None removes them)."""
+        ItemBucket.objects.filter(item_id=item_id).delete()
+        ItemSignature.objects.filter(item_id=item_id).delete()
+        if signature is not None:
+            signature_row, bucket_rows = cls._signature_rows(item_id, item_type, signature)
+            signature_row.save(force_insert=True)
+            ItemBucket.objects.bulk_create(bucket_rows)
+
+    @staticmethod
+    def _signature_rows(item_id: str, item_type: str, signature) -> Tuple[ItemSignature, List[ItemBucket]]:
+        """Build the signature row and one bucket row per LSH band."""
+        return (
+            ItemSignature(item_id=item_id, item_type=item_type, signature=minhash.to_bytes(signature)),
+            [
+                ItemBucket(item_id=item_id, item_type=item_type, band=band, bucket=bucket)
+                for band, bucket in enumerate(minhash.band_keys(signature))
+            ],
+        )
+
+    @staticmethod
+    def _content_rows(item_id: str, item_type: str, bodies: List[str], start: int = 0) -> List[ItemContent]:
+        """Build content rows for an item's non-empty bodies."""
+        return [
+            ItemContent(item_id=item_id, item_type=item_type, seq=start + offset, body=body)
+            for offset, body in enumerate(bodies) if body
+        ]
+
+    @staticmethod
+    def _provider_key(provider: Optional[str]) -> Optional[str]:
+        """Case-fold a provider name for indexed lookups."""
+        return provider.lower() if provider else None
+
+    @staticmethod
+    def _rows_by_id(item_ids: List[str]) -> Dict[str, Tuple]:
+        """Fetch the RESPONSE_COLUMNS rows of some items, keyed by ID."""
+        return {row[0]: row for row in IndexedItem.objects.filter(id__in=item_ids).values_list(*RESPONSE_COLUMNS)}
+
+    @staticmethod
+    def _decode_labels(labels_json: Optional[str]) -> List:
+        """Decode an IndexedItem.labels_json value, like IndexedItem.labels."""
+        if not labels_json:
+            return []
+        try:
+            return json.loads(labels_json)
+        except (json.JSONDecodeError, TypeError):
+            return []
+
+    @classmethod
+    def _row_to_response(cls, row: Tuple) -> Dict:
+        """
+        Build a search result from a RESPONSE_COLUMNS row.
+
+        Same shape as IndexRecord.to_response_dict, without building the
+        model instance and record in between. Extra trailing values (a sort
+        key or rank) are ignored.
+        """
+        (item_id, item_type, title, description, slug, labels_json, author, created_at, updated_at,
+         version_count, head_version_id, head_version_number, file_path, sha,
+         provider, model, conversation_id, turn_count, *_) = row
+        item = {
+            'id': item_id,
+            'type': item_type,
+            'title': title,
+            'description': description,
+            'slug': slug,
+            'labels': cls._decode_labels(labels_json),
+            'author': author,
+            'created_at': created_at.isoformat(),
+            'updated_at': updated_at.isoformat(),
+            'file_path': file_path,
+            'sha': sha,
+        }
+        if item_type == ItemType.CHAT.value:
+            item.update(provider=provider, model=model, conversation_id=conversation_id, turn_count=turn_count)
+        else:
+            item.update(version_count=version_count, head_version_id=head_version_id,
+                        head_version_number=head_version_number)
+        return item
+
+    @classmethod
+    def _row_to_summary(cls, row: Tuple) -> Dict:
+        """Build a list summary (ItemSummary, or ChatSummary for chats) from a SUMMARY_COLUMNS row."""
+        (item_id, item_type, title, labels_json, description, updated_at, created_at, author,
+         provider, model, turn_count, *_) = row
+        fields = dict(
+            id=item_id,
+            title=title,
+            type=item_type,
+            labels=cls._decode_labels(labels_json),
+            description=description,
+            updated_at=updated_at.isoformat(),
+            created_at=created_at.isoformat(),
+            author=author,
+        )
+        if item_type == ItemType.CHAT.value:
+            return ChatSummary(**fields, provider=provider, model=model, turn_count=turn_count).__dict__()
+        return ItemSummary(**fields).__dict__()
+
     def _item_to_record(self, item: IndexedItem) -> IndexRecord:
         """
         Convert Django model instance to IndexRecord.
@@ -357,8 +1683,209 @@ class DBIndexService:
             head_version_number=item.head_version_number,
             file_path=item.file_path,
             sha=item.sha,
+            size_bytes=item.size_bytes,
             provider=item.provider,
             model=item.model,
             conversation_id=item.conversation_id,
             turn_count=item.turn_count,
         )
+
+
+class IndexReplacement:
+    """
+    Replaces the whole index with freshly parsed items, one chunk at a time.
+
+    Each write() replaces the rows of its own items (index row, labels,
+    trigrams, content, signature and manifest entry) in one committed
+    transaction, so readers see a complete index throughout, with old and
+    new rows side by side, and memory holds one chunk plus the IDs written
+    so far. finish() then drops the items no chunk contained and recounts
+    the stats; abort() keeps them.
+
+    Unique keys are resolved the way the schema migration does: of two
+    parsed chats of one provider conversation the most recently updated
+    keeps the key and the other is indexed unkeyed; of two parsed items with
+    one (type, slug) the most recently updated is indexed and the other is
+    dropped and reported. Rows left from before the rebuild that hold a key
+    a parsed item needs are dropped at once.
+    """
+
+    def __init__(self, index_service: DBIndexService, chunk_size: int = 1000):
+        """
+        Args:
+            index_service: DBIndexService to write through
+            chunk_size: Rows per bulk_create batch
+        """
+        self.index_service = index_service
+        self.chunk_size = chunk_size
+        self.added: Dict[str, int] = {}
+        self.errors: List[Dict] = []
+        # Item ID -> type of everything written so far
+        self._written: Dict[str, str] = {}
+
+    def write(self, records: List[IndexRecord], manifest: List[Dict] = (),
+              contents: Optional[Dict[str, List[str]]] = None,
+              signatures: Optional[Dict] = None) -> List[IndexRecord]:
+        """
+        Index one chunk of parsed items, replacing any rows they had.
+
+        Args:
+            records: Parsed records
+            manifest: IndexManifest field values for their files
+            contents: Searchable bodies per item ID (see set_content)
+            signatures: MinHash signature per item ID with content; computed
+                from contents when not given. Only stored with duplicate
+                detection on
+
+        Returns:
+            The records that were indexed; the others are reported in errors
+        """
+        contents = contents or {}
+        rows: Dict[str, Tuple[IndexRecord, Dict]] = {}
+        slugs: Dict[Tuple[str, str], str] = {}
+        conversations: Dict[Tuple[str, str], str] = {}
+
+        parsed = []
+        for record in records:
+            try:
+                parsed.append((record, self.index_service._record_fields(record)))
+            except (TypeError, ValueError) as e:
+                self._error(record.id, record.item_type.value, str(e))
+        parsed.sort(key=lambda pair: pair[1]['updated_at'].timestamp(), reverse=True)
+
+        for record, fields in parsed:
+            slug = (fields['item_type'], fields['slug'])
+            if record.id in self._written or record.id in rows or slug in slugs:
+                self._error(record.id, fields['item_type'], f"Duplicate id or slug: {record.slug}")
+                continue
+            conversation = (fields['provider_key'], fields['conversation_id'])
+            if all(conversation):
+                if conversation in conversations:
+                    fields['provider_key'] = None
+                else:
+                    conversations[conversation] = record.id
+            slugs[slug] = record.id
+            rows[record.id] = (record, fields)
+
+        with transaction.atomic():
+            self._resolve_conflicts(rows, slugs, conversations)
+            if not rows:
+                return []
+
+            # Drop the chunk's old rows (and manifest entries) first: within
+            # one statement an upsert could still collide with keys they are giving up
+            item_ids = list(rows)
+            self.index_service.remove_many(item_ids)
+            self.index_service._bulk_upsert([record for record, _ in rows.values()],
+                                            [fields for _, fields in rows.values()])
+
+            content_rows, signature_rows, bucket_rows = [], [], []
+            sign = self.index_service.duplicates_enabled()
+            for item_id, (record, fields) in rows.items():
+                bodies = contents.get(item_id) or []
+                content_rows.extend(self.index_service._content_rows(item_id, fields['item_type'], bodies))
+                if not sign:
+                    continue
+                signature = signatures.get(item_id) if signatures is not None else minhash.signature(bodies)
+                if signature is not None:
+                    signature_row, buckets = self.index_service._signature_rows(item_id, fields['item_type'],
+                                                                                signature)
+                    signature_rows.append(signature_row)
+                    bucket_rows.extend(buckets)
+            ItemContent.objects.bulk_create(content_rows, batch_size=self.chunk_size)
+            ItemSignature.objects.bulk_create(signature_rows, batch_size=self.chunk_size)
+            ItemBucket.objects.bulk_create(bucket_rows, batch_size=self.chunk_size)
+
+            # Dropped records get no entry, so a reconcile retries them
+            self.index_service._set_manifest([], [entry for entry in manifest if entry['item_id'] in rows])
+            self.index_service._bump_generation()
+
+        for item_id, (_, fields) in rows.items():
+            self._written[item_id] = fields['item_type']
+            self.added[fields['item_type']] = self.added.get(fields['item_type'], 0) + 1
+        return [record for record, _ in rows.values()]
+
+    def finish(self) -> Tuple[Dict[str, int], List[Dict]]:
+        """
+        Drop the items no chunk contained and recount the stats.
+
+        Returns:
+            Tuple of (rows added per item type, errors)
+        """
+        stale = [item_id for item_id in IndexedItem.objects.values_list('id', flat=True)
+                 if item_id not in self._written]
+        self.index_service.remove_many(stale)
+
+        with transaction.atomic():
+            stale_entries = [path for path, item_id in IndexManifest.objects.values_list('path', 'item_id')
+                             if item_id not in self._written]
+            for i in range(0, len(stale_entries), 500):
+                IndexManifest.objects.filter(path__in=stale_entries[i:i + 500]).delete()
+            self.index_service._rebuild_stats()
+            self.index_service._bump_generation()
+
+        return self.added, self.errors
+
+    def abort(self) -> None:
+        """
+        End a replacement that failed partway without dropping anything.
+
+        The chunks written so far stay, and so do the rows of items no
+        chunk reached yet, so the index is complete, only partly refreshed;
+        the next rebuild or reconcile catches up. The stats are recounted.
+        """
+        with transaction.atomic():
+            self.index_service._rebuild_stats()
+            self.index_service._bump_generation()
+
+    def _resolve_conflicts(self, rows: Dict[str, Tuple[IndexRecord, Dict]],
+                           slugs: Dict[Tuple[str, str], str],
+                           conversations: Dict[Tuple[str, str], str]) -> None:
+        """
+        Settle unique keys between a chunk and the rows already in the index.
+
+        Adjusts rows (and the slug/conversation maps built for it) in place;
+        call inside the chunk's transaction.
+        """
+        holders = IndexedItem.objects.filter(
+            Q(slug__in={slug for _, slug in slugs}) |
+            Q(conversation_id__in={conversation_id for _, conversation_id in conversations})
+        ).exclude(id__in=list(rows)).values_list('id', 'item_type', 'slug', 'provider_key', 'conversation_id',
+                                                 'updated_at')
+        stale = []
+        for holder_id, item_type, slug, provider_key, conversation_id, updated_at in holders:
+            slug_owner = slugs.get((item_type, slug))
+            conversation_owner = conversations.get((provider_key, conversation_id)) if provider_key else None
+            if slug_owner is None and conversation_owner is None:
+                continue
+            if holder_id not in self._written:
+                stale.append(holder_id)
+                continue
+
+            if slug_owner is not None:
+                record, fields = rows[slug_owner]
+                if fields['updated_at'].timestamp() > updated_at.timestamp():
+                    # Written by an earlier chunk, but older: this record takes its place
+                    stale.append(holder_id)
+                    self._written.pop(holder_id)
+                    self.added[item_type] -= 1
+                    self._error(holder_id, item_type, f"Duplicate id or slug: {slug}")
+                else:
+                    del rows[slug_owner]
+                    if conversations.get((fields['provider_key'], fields['conversation_id'])) == slug_owner:
+                        del conversations[fields['provider_key'], fields['conversation_id']]
+                    self._error(record.id, item_type, f"Duplicate id or slug: {record.slug}")
+
+            if conversation_owner is not None and conversation_owner in rows and holder_id not in stale:
+                fields = rows[conversation_owner][1]
+                if fields['updated_at'].timestamp() > updated_at.timestamp():
+                    IndexedItem.objects.filter(id=holder_id).update(provider_key=None)
+                else:
+                    fields['provider_key'] = None
+
+        if stale:
+            self.index_service.remove_many(stale)
+
+    def _error(self, item_id: str, item_type: str, message: str) -> None:
+        """Report an item that was not indexed."""
+        self.errors.append({'item': item_id, 'type': item_type, 'error': message})
@@ -2,36 +2,169 @@
 File-based storage service for prompts, templates, and chats.
 Replaces Git-based storage with file-based versioning system.
 """
+import copy
 import json
-import yaml
 import shutil
+import hashlib
+import itertools
+import os
+import struct
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple, Union
+from typing import BinaryIO, Optional, List, Dict, Tuple, Union, Iterator
 import datetime
 
 from django.conf import settings
+from filelock import FileLock
 
 from backend.apps.core.exceptions import ResourceNotFoundError, ValidationError
 from backend.apps.core.utils.id_generator import generate_ulid
+from backend.apps.core.utils.line_delta import apply_delta, make_delta
+from backend.apps.core.utils.manifest import manifest_entry
+from backend.apps.core.utils.metadata_codec import CODECS, MetadataCodec, codec_for_path, get_codec
+from backend.apps.core.services.blob_store import BlobStore
+from backend.apps.core.services.index_queue import get_index_queue
 from backend.apps.core.domain.itemmetadata import ItemMetadata, VersionSummary
 from backend.apps.core.domain.version import VersionData, TemplateVersionData, TemplateVariable
 from backend.apps.core.domain.chatmetadata import ChatMetadata
 from backend.apps.core.domain.base_meta import PromptMeta, TemplateMeta, ChatMeta
+from backend.apps.core.domain.index_record import IndexRecord
+
+
+# Number of lock files per lock namespace (conversation upserts, chat writes)
+LOCK_STRIPES = 64
+
+# Bytes per entry in a chat's message offsets file
+MESSAGE_OFFSET_SIZE = 8
+
+
+class MetadataCache:
+    """
+    Process-wide LRU cache of data parsed from files.
+
+    Entries are keyed by path and validated against the file's
+    (mtime_ns, size, inode), so edits made outside the service are noticed
+    on the next read.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Args:
+            max_entries: Capacity; defaults to settings.METADATA_CACHE_SIZE
+        """
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, int], Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is None:
+            return getattr(settings, 'METADATA_CACHE_SIZE', 4096)
+        return self._max_entries
+
+    @staticmethod
+    def stat_key(file_path: Path) -> Optional[Tuple[int, int, int]]:
+        """Get the validation key of a file, or None if it does not exist."""
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def get(self, file_path: Path, stat_key: Tuple[int, int, int]) -> Optional[Dict]:
+        """Get a copy of the cached data if the file is unchanged."""
+        key = str(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stat_key:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+        return copy.deepcopy(data)
+
+    def put(self, file_path: Path, stat_key: Tuple[int, int, int], data: Dict):
+        """Store parsed data for a file version."""
+        key = str(file_path)
+        data = copy.deepcopy(data)
+        with self._lock:
+            self._entries[key] = (stat_key, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_prefix(self, prefix: Path):
+        """Drop entries for a file or everything below a directory."""
+        prefix = str(prefix)
+        with self._lock:
+            for key in [k for k in self._entries if k == prefix or k.startswith(prefix + os.sep)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+metadata_cache = MetadataCache()
+
+# Reconstructed version bodies ({'content', 'depth'}), keyed by version file
+version_cache = MetadataCache(getattr(settings, 'VERSION_CACHE_SIZE', 1024))
+
+# Metadata plus HEAD version of prompts/templates ({'data', 'etag'}), keyed by
+# item directory and validated against the metadata file and HEAD pointer
+head_cache = MetadataCache(getattr(settings, 'HEAD_CACHE_SIZE', 1024))
 
 
 class FileStorageService:
     """Service for file-based storage with versioning."""
 
-    def __init__(self, storage_root: Optional[str] = None, index_service=None):
+    def __init__(self, storage_root: Optional[str] = None, index_service=None,
+                 metadata_format: Optional[str] = None, use_blob_store: Optional[bool] = None,
+                 delta_chain_length: Optional[int] = None):
         """
         Initialize file storage service.
 
         Args:
             storage_root: Root directory for storage. Defaults to settings.GIT_REPO_ROOT
             index_service: Optional index service for syncing. If None, will be lazy-loaded.
+            metadata_format: Format for new metadata writes ('yaml' or 'json').
+                Defaults to settings.METADATA_FORMAT
+            use_blob_store: Store new version bodies in the content-addressed
+                blob store. Defaults to settings.VERSION_BLOB_STORE
+            delta_chain_length: Max consecutive versions stored as deltas
+                before a full snapshot; 0 disables deltas.
+                Defaults to settings.VERSION_DELTA_CHAIN_LENGTH
         """
         self.storage_root = Path(storage_root or settings.GIT_REPO_ROOT)
         self._index_service = index_service
+        self.metadata_codec = get_codec(metadata_format or getattr(settings, 'METADATA_FORMAT', 'yaml'))
+        # Blob references are always readable; the flag only affects new writes
+        self.blob_store = BlobStore(self.storage_root / '.blobs',
+                                    getattr(settings, 'VERSION_BLOB_COMPRESSION_LEVEL', 6))
+        self.use_blob_store = (getattr(settings, 'VERSION_BLOB_STORE', False)
+                               if use_blob_store is None else use_blob_store)
+        self.delta_chain_length = (getattr(settings, 'VERSION_DELTA_CHAIN_LENGTH', 0)
+                                   if delta_chain_length is None else delta_chain_length)
         self._ensure_directory_structure()
 
     @property
@@ -42,6 +175,21 @@ class FileStorageService:
             self._index_service = DBIndexService()
         return self._index_service
 
+    @property
+    def index_writer(self):
+        """Where index writes go: the write-behind queue if enabled, else the index service."""
+        queue = get_index_queue()
+        return queue if queue is not None else self.index_service
+
+    @property
+    def vector_index(self):
+        """The storage root's similarity vectors (see vector_index), or None if disabled."""
+        if not getattr(settings, 'VECTOR_SEARCH_ENABLED', False):
+            return None
+        # Imported on first use, so the vector index code only loads when vector search is on
+        from backend.apps.core.services.vector_index import get_vector_index
+        return get_vector_index(self.storage_root)
+
     def _ensure_directory_structure(self):
         """Ensure basic directory structure exists."""
         dirs = [
@@ -72,20 +220,67 @@ class FileStorageService:
         prefix = "pv" if item_type == "prompt" else "tv"
         return f"{prefix}-{item_id}_{version_id}.md"
 
-    def _read_yaml(self, file_path: Path) -> Dict:
-        """Read YAML file."""
-        if not file_path.exists():
+    def _find_metadata_path(self, item_dir: Path, item_type: str) -> Optional[Path]:
+        """
+        Find an item's metadata file in any supported format.
+
+        The configured format is checked first, so mixed trees (for example
+        mid-migration) still resolve.
+        """
+        preferred = self.metadata_codec
+        for codec in [preferred] + [c for c in CODECS.values() if c is not preferred]:
+            path = item_dir / f"{item_type}.{codec.extension}"
+            if path.exists():
+                return path
+        return None
+
+    def _get_metadata_path(self, item_type: str, item_id: str) -> Optional[Path]:
+        """Get the existing metadata file of an item, or None."""
+        return self._find_metadata_path(self._get_item_directory(item_type, item_id), item_type)
+
+    def _read_metadata(self, file_path: Path) -> Dict:
+        """Read a metadata file, served from the metadata cache when unchanged."""
+        stat_key = metadata_cache.stat_key(file_path)
+        if stat_key is None:
             return {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
 
-    def _write_yaml(self, file_path: Path, data: Dict):
-        """Write YAML file."""
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        # Convert data to plain dict/list to avoid Python object tags
-        plain_data = json.loads(json.dumps(data))
-        with open(file_path, 'w', encoding='utf-8') as f:
-            yaml.safe_dump(plain_data, f, allow_unicode=True, default_flow_style=False)
+        data = metadata_cache.get(file_path, stat_key)
+        if data is not None:
+            return data
+
+        data = codec_for_path(file_path).loads(file_path.read_bytes())
+        metadata_cache.put(file_path, stat_key, data)
+        return data
+
+    def _write_metadata(self, item_type: str, item_id: str, data: Dict, codec: Optional[MetadataCodec] = None):
+        """
+        Write an item's metadata atomically and prime the metadata cache.
+
+        Files for the item in other formats are removed so exactly one
+        metadata file exists per item.
+
+        Args:
+            item_type: 'prompt' or 'template'
+            item_id: Item ID
+            data: Plain metadata dict
+            codec: Format to write; defaults to the configured one
+        """
+        codec = codec or self.metadata_codec
+        item_dir = self._get_item_directory(item_type, item_id)
+        item_dir.mkdir(parents=True, exist_ok=True)
+        file_path = item_dir / f"{item_type}.{codec.extension}"
+
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        tmp_path.write_bytes(codec.dumps(data))
+        # Rename gives every write a new inode, so cached entries never go stale
+        os.replace(tmp_path, file_path)
+        metadata_cache.put(file_path, metadata_cache.stat_key(file_path), data)
+
+        for other in CODECS.values():
+            if other is not codec:
+                stale_path = item_dir / f"{item_type}.{other.extension}"
+                if stale_path.exists():
+                    stale_path.unlink()
 
     def _get_head_target(self, item_type: str, item_id: str) -> Optional[str]:
         """Get the target of HEAD pointer."""
@@ -104,13 +299,35 @@ class FileStorageService:
         head_file.parent.mkdir(parents=True, exist_ok=True)
         head_file.write_text(f"versions/{version_filename}")
 
-    def _sync_to_index(self, item_type: str, metadata: ItemMetadata):
+    def _striped_lock(self, namespace: str, key: str) -> FileLock:
+        """
+        Get an inter-process lock for a key.
+
+        Keys are hashed onto a fixed set of lock files per namespace so the
+        number of lock files stays bounded.
+        """
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        stripe = int(digest, 16) % LOCK_STRIPES
+        lock_dir = self.storage_root / '.locks'
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(lock_dir / f"{namespace}-{stripe:02d}.lock"))
+
+    def _conversation_lock(self, provider: str, conversation_id: str) -> FileLock:
+        """Get the lock guarding upserts of one provider conversation."""
+        return self._striped_lock('conversation', f"{provider.lower()}\0{conversation_id}")
+
+    def _chat_lock(self, chat_id: str) -> FileLock:
+        """Get the lock guarding writes to one chat's files."""
+        return self._striped_lock('chat', chat_id)
+
+    def _sync_to_index(self, item_type: str, metadata: ItemMetadata, content: Optional[str] = None):
         """
         Sync item metadata to database index.
 
         Args:
             item_type: 'prompt' or 'template'
             metadata: ItemMetadata object
+            content: New HEAD content to index for search, if HEAD changed
         """
         # Convert ItemMetadata to appropriate Meta type and then to IndexRecord
         if item_type == 'prompt':
@@ -121,27 +338,108 @@ class FileStorageService:
             return  # Chats are handled separately
 
         record = meta.to_index_record()
-        self.index_service.add_or_update(record)
+        record.size_bytes = self.item_size(item_type, record.id)
+        self.index_writer.add_or_update(record, self.index_manifest(
+            item_type, str(self._get_item_directory(item_type, record.id)), record.id))
+        if content is not None:
+            self.index_writer.set_content(record.id, item_type, [content])
+
+        if self.vector_index is not None:
+            if content is None:
+                head = self.read_version(item_type, record.id)
+                content = head.content if head else ''
+            self.index_vector(record, [content])
+
+    def index_vector(self, record: IndexRecord, bodies: List[str]):
+        """
+        Update an item's similarity vector, if vector search is enabled.
+
+        Args:
+            record: Index record of the item
+            bodies: HEAD content, or chat messages from the first on; only
+                the first settings.VECTOR_CHAT_MESSAGES messages are used
+        """
+        index = self.vector_index
+        if index is None:
+            return
+        from backend.apps.core.services.vector_index import item_vector
+        if record.item_type.value == 'chat':
+            bodies = bodies[:getattr(settings, 'VECTOR_CHAT_MESSAGES', 10)]
+        index.upsert(record.id, record.item_type.value,
+                     item_vector(record.title, record.description, bodies, index.dimensions))
+
+    def remove_vector(self, item_id: str):
+        """Drop an item's similarity vector, if vector search is enabled."""
+        index = self.vector_index
+        if index is not None:
+            index.remove(item_id)
 
     def load_metadata(self, item_type: str, item_id: str) -> ItemMetadata:
         """
-        Load metadata from YAML file.
+        Load metadata from the item's metadata file.
 
         Args:
             item_type: 'prompt' or 'template'
             item_id: Item ID
+
         Returns:
             Metadata object
         """
-        item_dir = self._get_item_directory(item_type, item_id)
-        yaml_path = item_dir / f"{item_type}.yaml"
+        metadata_path = self._get_metadata_path(item_type, item_id)
 
-        if not yaml_path.exists():
+        if metadata_path is None:
             raise ResourceNotFoundError(f"{item_type.capitalize()} {item_id} not found")
 
-        data = self._read_yaml(yaml_path)
+        data = self._read_metadata(metadata_path)
         return ItemMetadata.from_dict(data)
-    
+
+    def read_head(self, item_type: str, item_id: str) -> Dict:
+        """
+        Get an item's metadata together with its HEAD version in one read.
+
+        Served from head_cache while the metadata file and HEAD pointer are
+        unchanged (two stat calls); create_version, delete_version and
+        metadata updates drop the entry.
+
+        Args:
+            item_type: 'prompt' or 'template'
+            item_id: Item ID
+
+        Returns:
+            Dict with 'data' (summary fields plus version_id, version_number,
+            content and variables; version fields are None/empty without
+            HEAD) and 'etag', a quoted hash of data
+        """
+        item_dir = self._get_item_directory(item_type, item_id)
+        metadata_path = self._get_metadata_path(item_type, item_id)
+        if metadata_path is None:
+            raise ResourceNotFoundError(f"{item_type.capitalize()} {item_id} not found")
+
+        stat_key = (metadata_cache.stat_key(metadata_path), metadata_cache.stat_key(item_dir / "HEAD"))
+        cached = head_cache.get(item_dir, stat_key)
+        if cached is not None:
+            return cached
+
+        metadata = ItemMetadata.from_dict(self._read_metadata(metadata_path))
+        version = None
+        head_target = self._get_head_target(item_type, item_id)
+        if head_target and (item_dir / head_target).exists():
+            version = self._resolve_version_content(
+                item_type, item_id, self._read_version_file(item_type, item_dir / head_target)
+            )
+
+        data = {
+            **metadata.to_summary().__dict__(),
+            'version_id': version.id if version else None,
+            'version_number': version.version_number if version else None,
+            'content': (version.content or '') if version else '',
+            'variables': [var.__dict__() for var in getattr(version, 'variables', None) or []],
+        }
+        digest = hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+        entry = {'data': data, 'etag': f'"{digest}"'}
+        head_cache.put(item_dir, stat_key, entry)
+        return entry
+
     def create_version(self, metadata: ItemMetadata, version_number: str, content: str, variables: Optional[List[TemplateVariable]]) -> str:
         """
         Create a new version of an existing item.
@@ -192,7 +490,9 @@ class FileStorageService:
 
         # Write version file (immutable, minimal frontmatter)
         try:
-            version_text = version_data.to_text()
+            version_text = self._serialize_version(item_type, item_id, version_data, metadata.versions)
+        except ResourceNotFoundError:
+            raise
         except Exception as e:
             raise ValidationError(f"Error serializing version data: {str(e)}")
         
@@ -207,15 +507,15 @@ class FileStorageService:
             )
         )
 
-        # Write full metadata to YAML
-        yaml_path = item_dir / f"{item_type}.yaml"
-        self._write_yaml(yaml_path, metadata.__dict__())
+        # Write full metadata
+        self._write_metadata(item_type, item_id, metadata.__dict__())
 
         # Update HEAD
         self._set_head_target(item_type, item_id, version_filename)
+        head_cache.invalidate_prefix(item_dir)
 
         # Sync with index
-        self._sync_to_index(item_type, metadata)
+        self._sync_to_index(item_type, metadata, content)
 
         return version_id
     
@@ -274,9 +574,9 @@ class FileStorageService:
         metadata.updated_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
         metadata.author = author
 
-        # Write full metadata to YAML
-        yaml_path = item_dir / f"{item_type}.yaml"
-        self._write_yaml(yaml_path, metadata.__dict__())
+        # Write full metadata
+        self._write_metadata(item_type, item_id, metadata.__dict__())
+        head_cache.invalidate_prefix(item_dir)
 
         # Sync with index
         self._sync_to_index(item_type, metadata)
@@ -325,8 +625,142 @@ class FileStorageService:
         else:
             raise ValidationError(f"Invalid item type: {item_type}")    
 
+        return self._resolve_version_content(item_type, item_id, version_data)
+
+    # Version bodies are stored in one of three ways, recorded in the version
+    # file's front matter:
+    #   - full text (no marker): the body is the content
+    #   - content_blob: the content lives in the blob store
+    #   - delta_base/delta_depth: the body is a line delta (JSON) against the
+    #     previous version; chains are capped at delta_chain_length, after
+    #     which a full snapshot is written
+    # read_version strips these fields so callers see identical VersionData.
+
+    def _serialize_version(self, item_type: str, item_id: str, version_data: VersionData,
+                           previous_versions: List[VersionSummary]) -> str:
+        """Serialize a new version as a delta, a blob reference or full text."""
+        content = version_data.content or ''
+
+        if self.delta_chain_length > 0 and previous_versions:
+            base_id = previous_versions[-1].id
+            try:
+                base_content, base_depth = self._version_content(item_type, item_id, base_id)
+            except ResourceNotFoundError:
+                base_content = None
+            if base_content is not None and base_depth < self.delta_chain_length:
+                delta = json.dumps(make_delta(base_content, content), ensure_ascii=False, separators=(',', ':'))
+                # Tiny or rewritten bodies are cheaper to store whole
+                if len(delta) < len(content):
+                    return version_data.to_text({'delta_base': base_id, 'delta_depth': base_depth + 1}, delta)
+
+        return self._snapshot_text(version_data, self.use_blob_store)
+
+    def _snapshot_text(self, version_data: VersionData, use_blob_store: bool) -> str:
+        """Serialize a version with its full content, inline or in the blob store."""
+        if use_blob_store:
+            return version_data.to_text({'content_blob': self.blob_store.put(version_data.content or '')}, '')
+        return version_data.to_text()
+
+    def _resolve_version_content(self, item_type: str, item_id: str, version_data: VersionData) -> VersionData:
+        """Replace a stored body (blob reference or delta) with the version's content."""
+        extra = version_data._extra_data or {}
+        content_blob = extra.pop('content_blob', None)
+        delta_base = extra.pop('delta_base', None)
+        extra.pop('delta_depth', None)
+
+        if content_blob:
+            version_data.content = self.blob_store.get(content_blob)
+        elif delta_base:
+            base_content, _ = self._version_content(item_type, item_id, delta_base)
+            version_data.content = apply_delta(base_content, json.loads(version_data.content))
         return version_data
 
+    def _version_content(self, item_type: str, item_id: str, version_id: str) -> Tuple[str, int]:
+        """
+        Get a version's content and delta depth through the reconstruction cache.
+
+        Returns:
+            Tuple of (content, delta_depth)
+        """
+        version_path = self._get_versions_directory(item_type, item_id) / \
+            self._get_version_filename(item_type, item_id, version_id)
+        stat_key = version_cache.stat_key(version_path)
+        if stat_key is None:
+            raise ResourceNotFoundError(f"Version {version_id} not found")
+
+        cached = version_cache.get(version_path, stat_key)
+        if cached is not None:
+            return cached['content'], cached['depth']
+
+        version_data = self._read_version_file(item_type, version_path)
+        depth = int((version_data._extra_data or {}).get('delta_depth', 0))
+        content = self._resolve_version_content(item_type, item_id, version_data).content or ''
+        version_cache.put(version_path, stat_key, {'content': content, 'depth': depth})
+        return content, depth
+
+    def _iter_version_files(self) -> Iterator[Tuple[str, str, Path]]:
+        """Iterate over (item_type, item_id, path) of every prompt/template version file."""
+        for item_type in ('prompt', 'template'):
+            for version_path in (self.storage_root / f"{item_type}s").glob(f"{item_type}-*/versions/*.md"):
+                yield item_type, version_path.parent.parent.name[len(item_type) + 1:], version_path
+
+    @staticmethod
+    def _write_version_file(version_path: Path, version_text: str):
+        """Rewrite a version file atomically."""
+        tmp_path = version_path.with_suffix('.md.tmp')
+        tmp_path.write_text(version_text, encoding='utf-8')
+        os.replace(tmp_path, version_path)
+
+    def _read_version_file(self, item_type: str, version_path: Path) -> VersionData:
+        text = version_path.read_text(encoding='utf-8')
+        if item_type == 'template':
+            return TemplateVersionData.from_text(text)
+        return VersionData.from_text(text)
+
+    def pack_versions(self, unpack: bool = False) -> int:
+        """
+        Move bodies of existing full-text version files into the blob store,
+        or back. Delta versions are left as they are.
+
+        Args:
+            unpack: Write full-text version files again instead
+
+        Returns:
+            Number of version files rewritten
+        """
+        rewritten = 0
+
+        for item_type, item_id, version_path in self._iter_version_files():
+            version_data = self._read_version_file(item_type, version_path)
+            extra = version_data._extra_data or {}
+            if extra.get('delta_base') or bool(extra.get('content_blob')) != unpack:
+                continue
+
+            self._resolve_version_content(item_type, item_id, version_data)
+            self._write_version_file(version_path, self._snapshot_text(version_data, not unpack))
+            rewritten += 1
+
+        return rewritten
+
+    def prune_blobs(self, grace_seconds: Optional[int] = None) -> Dict:
+        """
+        Delete blobs no longer referenced by any version file.
+
+        Args:
+            grace_seconds: Keep blobs written this recently (see BlobStore.prune)
+
+        Returns:
+            Dict with removed blob count and freed bytes
+        """
+        referenced = set()
+        for item_type, _, version_path in self._iter_version_files():
+            version_data = self._read_version_file(item_type, version_path)
+            content_blob = (version_data._extra_data or {}).get('content_blob')
+            if content_blob:
+                referenced.add(content_blob)
+
+        return self.blob_store.prune(referenced, grace_seconds)
+
     def list_versions(self, item_type: str, item_id: str) -> List[VersionSummary]:
         """
         List all versions of an item.
@@ -353,9 +787,12 @@ class FileStorageService:
         item_dir = self._get_item_directory(item_type, item_id)
         if item_dir.exists():
             shutil.rmtree(item_dir)
+        metadata_cache.invalidate_prefix(item_dir)
+        head_cache.invalidate_prefix(item_dir)
 
         # Remove from index
-        self.index_service.remove(item_id)
+        self.index_writer.remove(item_id)
+        self.remove_vector(item_id)
 
     def delete_version(self, item_type: str, item_id: str, version_id: str) :
         """
@@ -377,6 +814,9 @@ class FileStorageService:
         if not version_path.exists():
             raise ResourceNotFoundError(f"Version {version_id} not found")
 
+        # Versions stored as deltas against this one become full snapshots
+        self._rematerialize_dependents(item_type, item_id, version_id)
+
         # Delete version file
         version_path.unlink()
 
@@ -385,8 +825,7 @@ class FileStorageService:
         metadata.versions = [v for v in metadata.versions if v.id != version_id]
 
         # Write updated metadata
-        yaml_path = item_dir / f"{item_type}.yaml"
-        self._write_yaml(yaml_path, metadata.__dict__())
+        self._write_metadata(item_type, item_id, metadata.__dict__())
 
         # If deleted version was HEAD, update HEAD to latest version
         head_target = self._get_head_target(item_type, item_id)
@@ -400,8 +839,361 @@ class FileStorageService:
                 head_file = item_dir / "HEAD"
                 if head_file.exists():
                     head_file.unlink()
+        head_cache.invalidate_prefix(item_dir)
+
+        # Sync with index (version count, and HEAD content if HEAD moved)
+        head = self.read_version(item_type, item_id)
+        self._sync_to_index(item_type, metadata, head.content if head else '')
+
+    def _rematerialize_dependents(self, item_type: str, item_id: str, version_id: str):
+        """Rewrite versions that use version_id as their delta base as snapshots."""
+        for version_path in self._get_versions_directory(item_type, item_id).glob('*.md'):
+            version_data = self._read_version_file(item_type, version_path)
+            if (version_data._extra_data or {}).get('delta_base') != version_id:
+                continue
+
+            self._resolve_version_content(item_type, item_id, version_data)
+            self._write_version_file(version_path, self._snapshot_text(version_data, self.use_blob_store))
 
     # Chat operations (simpler, no versioning)
+    #
+    # A chat is a small JSON header, chats/chat-<id>.json, plus an append-only
+    # message log, chats/chat-<id>.messages.jsonl, holding one JSON message per
+    # line, and chats/chat-<id>.messages.idx, holding the byte offset of each
+    # line so any message range can be read with a single seek. The header
+    # records how many messages (and bytes) of the log are committed, so a
+    # crash during an append never exposes partial data. A rewrite (history
+    # edited) builds the new log and offsets as .tmp files and stages its
+    # header as chat-<id>.json.rewrite before swapping them in; a staged
+    # header means the swap can be finished (see _finish_chat_rewrite).
+    # Message readers open the header, log and offsets under the chat lock,
+    # so they never pair a header with another write's files.
+    # Chats written before the split keep `messages` inside the header and are
+    # converted on their next write.
+
+    def _get_chat_header_path(self, chat_id: str) -> Path:
+        """Get header file path for a chat."""
+        return self.storage_root / 'chats' / f"chat-{chat_id}.json"
+
+    def _get_chat_messages_path(self, chat_id: str) -> Path:
+        """Get message log path for a chat."""
+        return self.storage_root / 'chats' / f"chat-{chat_id}.messages.jsonl"
+
+    def _get_chat_offsets_path(self, chat_id: str) -> Path:
+        """Get message offsets path (one uint64 byte offset per message)."""
+        return self.storage_root / 'chats' / f"chat-{chat_id}.messages.idx"
+
+    def _get_chat_rewrite_path(self, chat_id: str) -> Path:
+        """Get the staged header of a message log rewrite."""
+        return self.storage_root / 'chats' / f"chat-{chat_id}.json.rewrite"
+
+    @staticmethod
+    def _encode_message(message: Dict) -> str:
+        """Encode one message as a single log line (without newline)."""
+        return json.dumps(message, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def _chain_digest(digest: str, lines: List[str]) -> str:
+        """
+        Extend a chained digest of message log lines.
+
+        The digest of a log is sha1(prev_digest + line) folded over its lines,
+        so it can be extended on append and compared against a resent history
+        without reading the log back.
+        """
+        for line in lines:
+            digest = hashlib.sha1((digest + line).encode('utf-8')).hexdigest()
+        return digest
+
+    @staticmethod
+    def _count_turns(messages: List[Dict]) -> int:
+        """Count conversation turns (user messages)."""
+        return sum(1 for msg in messages if msg.get('role') == 'user')
+
+    def _write_json_atomic(self, file_path: Path, data: Dict):
+        """Write a JSON file via a temporary file and rename."""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
+
+    def _read_chat_header(self, chat_id: str) -> Dict:
+        """Read a chat header file."""
+        header_path = self._get_chat_header_path(chat_id)
+        if not header_path.exists():
+            raise ResourceNotFoundError(f"Chat {chat_id} not found")
+
+        with open(header_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _chat_message_count(header: Dict) -> int:
+        """Number of committed messages of a chat."""
+        if 'messages' in header:
+            return len(header['messages'] or [])
+        return header.get('message_count', 0)
+
+    def _finish_chat_rewrite(self, chat_id: str):
+        """
+        Complete a staged message log rewrite, if there is one. Caller holds the chat lock.
+
+        The staged header is written only once the new log and offsets are
+        complete, so a rewrite interrupted after that point is rolled
+        forward: files still pending are moved into place, the header last.
+        Without a staged header, leftover .tmp files are ignored.
+        """
+        staged_path = self._get_chat_rewrite_path(chat_id)
+        if not staged_path.exists():
+            return
+        for path in (self._get_chat_messages_path(chat_id), self._get_chat_offsets_path(chat_id)):
+            tmp_path = path.with_name(path.name + '.tmp')
+            if tmp_path.exists():
+                os.replace(tmp_path, path)
+        os.replace(staged_path, self._get_chat_header_path(chat_id))
+
+    def _open_chat(self, chat_id: str) -> Tuple[Dict, Optional[BinaryIO], Optional[BinaryIO]]:
+        """
+        Read a chat's header and open its message log and offsets as one snapshot.
+
+        Done under the chat lock, so no rewrite is half-swapped; afterwards
+        the open files keep the versions the header describes while writers
+        go on (appends only add bytes past the committed length).
+
+        Returns:
+            Tuple of (header, log file, offsets file); files are None if
+            missing or for legacy single-file chats. The caller closes them
+        """
+        with self._chat_lock(chat_id):
+            self._finish_chat_rewrite(chat_id)
+            header = self._read_chat_header(chat_id)
+            if 'messages' in header:
+                return header, None, None
+            log = self._open_existing(self._get_chat_messages_path(chat_id))
+            offsets = self._open_existing(self._get_chat_offsets_path(chat_id))
+        return header, log, offsets
+
+    @staticmethod
+    def _open_existing(path: Path) -> Optional[BinaryIO]:
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _close_files(*files: Optional[BinaryIO]):
+        for f in files:
+            if f is not None:
+                f.close()
+
+    @classmethod
+    def _iter_log(cls, header: Dict, log: Optional[BinaryIO], offsets: Optional[BinaryIO],
+                  start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield the committed messages in [start, stop) of an opened chat (see _open_chat).
+
+        Seeks straight to `start` through the offsets file and decodes line by
+        line, so memory use does not depend on the length of the chat.
+        """
+        count = cls._chat_message_count(header)
+        stop = count if stop is None else min(stop, count)
+        if start >= stop:
+            return
+
+        if 'messages' in header:
+            # Legacy single-file chat
+            yield from header['messages'][start:stop]
+            return
+
+        if log is None:
+            return
+
+        begin = None
+        if offsets is not None:
+            offsets.seek(start * MESSAGE_OFFSET_SIZE)
+            data = offsets.read(MESSAGE_OFFSET_SIZE)
+            if len(data) == MESSAGE_OFFSET_SIZE:
+                begin = struct.unpack('<Q', data)[0]
+
+        if begin is None:
+            log.seek(0)
+            lines = itertools.islice(log, start, stop)
+        else:
+            log.seek(begin)
+            lines = itertools.islice(log, stop - start)
+        for line in lines:
+            yield json.loads(line)
+
+    def _iter_chat_messages(self, header: Dict, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield a chat's committed messages in [start, stop), one at a time.
+
+        Messages are read as of the chat's current header, which may be
+        newer than the one given; a chat deleted meanwhile yields nothing.
+        """
+        if 'messages' in header:
+            yield from self._iter_log(header, None, None, start, stop)
+            return
+
+        try:
+            header, log, offsets = self._open_chat(header['id'])
+        except ResourceNotFoundError:
+            return
+        try:
+            yield from self._iter_log(header, log, offsets, start, stop)
+        finally:
+            self._close_files(log, offsets)
+
+    def _read_chat_messages(self, header: Dict) -> List[Dict]:
+        """Read all committed messages of a chat."""
+        return list(self._iter_chat_messages(header))
+
+    def _chat_from_header(self, header: Dict) -> ChatMetadata:
+        """Build a ChatMetadata whose messages load lazily from the log."""
+        return ChatMetadata.from_dict(
+            header, message_loader=lambda: self._read_chat_messages(header)
+        )
+
+    def _append_message_lines(self, chat_id: str, committed_count: int, committed_bytes: int,
+                              lines: List[str], suffix: str = '') -> int:
+        """
+        Append lines to a message log and its offsets after the committed length.
+
+        Args:
+            chat_id: Chat ID
+            committed_count: Messages committed in the header
+            committed_bytes: Log bytes committed in the header
+            lines: Encoded messages to append
+            suffix: Filename suffix, used to build replacement files
+
+        Returns:
+            New committed length in bytes
+        """
+        messages_path = self._get_chat_messages_path(chat_id)
+        offsets_path = self._get_chat_offsets_path(chat_id)
+        messages_path = messages_path.with_name(messages_path.name + suffix)
+        offsets_path = offsets_path.with_name(offsets_path.name + suffix)
+
+        chunks = []
+        offsets = []
+        position = committed_bytes
+        for line in lines:
+            chunk = (line + '\n').encode('utf-8')
+            offsets.append(position)
+            position += len(chunk)
+            chunks.append(chunk)
+
+        # Drop anything written after the last committed header update
+        for path, length, data in (
+            (messages_path, committed_bytes, b''.join(chunks)),
+            (offsets_path, committed_count * MESSAGE_OFFSET_SIZE,
+             struct.pack(f'<{len(offsets)}Q', *offsets)),
+        ):
+            mode = 'r+b' if path.exists() else 'wb'
+            with open(path, mode) as f:
+                f.truncate(length)
+                f.seek(length)
+                f.write(data)
+
+        return position
+
+    def _write_chat(self, chat_data: Dict, previous: Optional[Dict] = None) -> Tuple[Dict, int]:
+        """
+        Write a chat's header and message log. Caller holds the chat lock.
+
+        When the stored log is a prefix of the incoming messages (the browser
+        extension resends the whole history), only the new tail is appended
+        and the header written after it. Otherwise the log is rebuilt and
+        swapped in through a staged header (see _finish_chat_rewrite).
+
+        Args:
+            chat_data: Full chat data including messages
+            previous: Current header, or None for a new chat
+
+        Returns:
+            Tuple of (the header that was written, index of the first
+            message written; earlier ones were already stored)
+        """
+        chat_id = chat_data['id']
+        messages = chat_data.get('messages') or []
+        lines = [self._encode_message(msg) for msg in messages]
+
+        header = {key: value for key, value in chat_data.items() if key != 'messages'}
+        header['turn_count'] = self._count_turns(messages)
+
+        stored_count = None
+        if previous is not None and 'messages' not in previous:
+            stored_count = previous.get('message_count', 0)
+
+        first_written = 0
+        if (stored_count is not None and stored_count <= len(lines)
+                and self._chain_digest('', lines[:stored_count]) == previous.get('messages_digest', '')):
+            first_written = stored_count
+            new_lines = lines[stored_count:]
+            header['messages_bytes'] = self._append_message_lines(
+                chat_id, stored_count, previous.get('messages_bytes', 0), new_lines
+            )
+            header['messages_digest'] = self._chain_digest(previous.get('messages_digest', ''), new_lines)
+        else:
+            self._get_chat_messages_path(chat_id).parent.mkdir(parents=True, exist_ok=True)
+            for path in (self._get_chat_messages_path(chat_id), self._get_chat_offsets_path(chat_id)):
+                path.with_name(path.name + '.tmp').unlink(missing_ok=True)
+            header['messages_bytes'] = self._append_message_lines(chat_id, 0, 0, lines, suffix='.tmp')
+            header['messages_digest'] = self._chain_digest('', lines)
+            header['message_count'] = len(lines)
+            # Staging the complete header commits the rewrite
+            self._write_json_atomic(self._get_chat_rewrite_path(chat_id), header)
+            self._finish_chat_rewrite(chat_id)
+            return header, first_written
+
+        header['message_count'] = len(lines)
+        self._write_json_atomic(self._get_chat_header_path(chat_id), header)
+        return header, first_written
+
+    def _sync_chat_to_index(self, header: Dict, messages: Optional[List[Dict]] = None, start: int = 0,
+                            index_writer=None):
+        """
+        Sync a chat header to the database index.
+
+        Args:
+            header: Chat header
+            messages: Messages from index start on to index for search, if
+                they changed
+            start: Index of the first message in messages
+            index_writer: Where to write (default: self.index_writer)
+        """
+        index_writer = index_writer or self.index_writer
+        chat_meta = ChatMeta.from_file_dict(header)
+        record = chat_meta.to_index_record()
+        record.size_bytes = self.item_size('chat', record.id)
+        index_writer.add_or_update(record, self.index_manifest(
+            'chat', str(self._get_chat_header_path(record.id)), record.id))
+        if messages is not None:
+            index_writer.set_content(
+                record.id, 'chat', [self._message_text(msg) for msg in messages], start
+            )
+
+        if self.vector_index is not None:
+            limit = getattr(settings, 'VECTOR_CHAT_MESSAGES', 10)
+            if messages is None or start > 0:
+                messages, start = list(self._iter_chat_messages(header, 0, limit)), 0
+            self.index_vector(record, [self._message_text(msg) for msg in messages[:limit]])
+
+    @staticmethod
+    def _message_text(message: Dict) -> str:
+        """Get the searchable text of a chat message (plain or multi-part content)."""
+        content = message.get('content') if isinstance(message, dict) else message
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            parts = []
+            for part in content:
+                if isinstance(part, str):
+                    parts.append(part)
+                elif isinstance(part, dict) and isinstance(part.get('text'), str):
+                    parts.append(part['text'])
+            return '\n'.join(parts)
+        return ''
 
     def create_chat(self, chat_data: Dict) -> str:
         """
@@ -413,23 +1205,18 @@ class FileStorageService:
         Returns:
             chat_id
         """
+        return self._create_chat(chat_data)
+
+    def _create_chat(self, chat_data: Dict, index_writer=None) -> str:
+        """Create a chat, indexing it through index_writer (default: self.index_writer)."""
         chat_id = chat_data.get('id') or generate_ulid()
         chat_data['id'] = chat_id
 
-        # Determine filename
-        filename = f"chat-{chat_id}.json"
-
-        chat_path = self.storage_root / 'chats' / filename
-        chat_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Write JSON
-        with open(chat_path, 'w', encoding='utf-8') as f:
-            json.dump(chat_data, f, indent=2, ensure_ascii=False)
+        with self._chat_lock(chat_id):
+            header, _ = self._write_chat(chat_data)
 
         # Sync with index
-        chat_meta = ChatMeta.from_file_dict(chat_data)
-        record = chat_meta.to_index_record()
-        self.index_service.add_or_update(record)
+        self._sync_chat_to_index(header, chat_data.get('messages') or [], index_writer=index_writer)
 
         return chat_id
 
@@ -441,18 +1228,14 @@ class FileStorageService:
             chat_id: Chat ID
 
         Returns:
-            Chat data
+            Chat data, including messages
         """
-        filename = f"chat-{chat_id}.json"
-
-        chat_path = self.storage_root / 'chats' / filename
-
-        # Find chat file
-        if chat_path.exists():
-            with open(chat_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-
-        raise ResourceNotFoundError(f"Chat {chat_id} not found")
+        data, log, offsets = self._open_chat(chat_id)
+        try:
+            data['messages'] = list(self._iter_log(data, log, offsets))
+        finally:
+            self._close_files(log, offsets)
+        return data
 
     def update_chat(self, chat_id: str, chat_data: Dict):
         """
@@ -462,22 +1245,120 @@ class FileStorageService:
             chat_id: Chat ID
             chat_data: Updated chat data
         """
-        chats_dir = self.storage_root / 'chats'
-
-        # Find and update chat file
-        for chat_file in chats_dir.glob(f"chat-{chat_id}.json"):
+        with self._chat_lock(chat_id):
+            self._finish_chat_rewrite(chat_id)
+            previous = self._read_chat_header(chat_id)
+            chat_data['id'] = chat_id
             chat_data['updated_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
-            with open(chat_file, 'w', encoding='utf-8') as f:
-                json.dump(chat_data, f, indent=2, ensure_ascii=False)
+            header, first_written = self._write_chat(chat_data, previous)
 
-            # Sync with index
-            chat_meta = ChatMeta.from_file_dict(chat_data)
-            record = chat_meta.to_index_record()
-            self.index_service.add_or_update(record)
+        # Sync with index
+        messages = chat_data.get('messages') or []
+        self._sync_chat_to_index(header, messages[first_written:], first_written)
 
-            return
+    def read_chat_messages(self, chat_id: str, start: int = 0,
+                           stop: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """
+        Read a range of messages of a chat.
+
+        Only the requested slice is read from disk.
+
+        Args:
+            chat_id: Chat ID
+            start: Index of the first message
+            stop: Index after the last message, or None for the end
+
+        Returns:
+            Tuple of (messages, total message count)
+        """
+        header, log, offsets = self._open_chat(chat_id)
+        try:
+            messages = list(self._iter_log(header, log, offsets, start, stop))
+        finally:
+            self._close_files(log, offsets)
+        return messages, self._chat_message_count(header)
+
+    def stream_chat_messages(self, chat_id: str) -> Tuple[ChatMetadata, Iterator[Dict]]:
+        """
+        Open a chat for streaming all of its messages.
+
+        The header is read immediately (so a missing chat raises here); the
+        messages are read lazily as the iterator is consumed.
+
+        Args:
+            chat_id: Chat ID
+
+        Returns:
+            Tuple of (chat header, message iterator)
+        """
+        header, log, offsets = self._open_chat(chat_id)
+
+        def messages():
+            try:
+                yield from self._iter_log(header, log, offsets)
+            finally:
+                self._close_files(log, offsets)
+
+        return self._chat_from_header(header), messages()
+
+    def append_chat_messages(self, chat_id: str, messages: List[Dict]) -> Dict:
+        """
+        Append messages to a chat's message log.
+
+        Only the new lines and the small header are written, regardless of
+        how long the conversation already is.
+
+        Args:
+            chat_id: Chat ID
+            messages: Messages to append, in order
+
+        Returns:
+            Updated chat header (without messages)
+        """
+        with self._chat_lock(chat_id):
+            self._finish_chat_rewrite(chat_id)
+            header = self._read_chat_header(chat_id)
+            legacy_messages = []
+            if 'messages' in header:
+                # Convert a legacy single-file chat before appending
+                legacy_messages = header['messages']
+                header, _ = self._write_chat(header)
+            start = header.get('message_count', 0) - len(legacy_messages)
+
+            lines = [self._encode_message(msg) for msg in messages]
+            header['messages_bytes'] = self._append_message_lines(
+                chat_id, header.get('message_count', 0), header.get('messages_bytes', 0), lines
+            )
+            header['messages_digest'] = self._chain_digest(header.get('messages_digest', ''), lines)
+            header['message_count'] = header.get('message_count', 0) + len(lines)
+            header['turn_count'] = header.get('turn_count', 0) + self._count_turns(messages)
+            header['updated_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            self._write_json_atomic(self._get_chat_header_path(chat_id), header)
+
+        # Sync with index; only the new messages are added to the content index
+        self._sync_chat_to_index(header, legacy_messages + messages, start)
 
-        raise ResourceNotFoundError(f"Chat {chat_id} not found")
+        return header
+
+    def convert_legacy_chats(self) -> int:
+        """
+        Convert single-file chats to the header + message log layout.
+
+        Returns:
+            Number of chats converted
+        """
+        converted = 0
+        for chat_file in (self.storage_root / 'chats').glob("chat-*.json"):
+            with open(chat_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if 'messages' not in data:
+                continue
+
+            with self._chat_lock(data['id']):
+                self._write_chat(data)
+            converted += 1
+
+        return converted
 
     def delete_chat(self, chat_id: str):
         """
@@ -486,17 +1367,45 @@ class FileStorageService:
         Args:
             chat_id: Chat ID
         """
-        filename = f"chat-{chat_id}.json"
-
-        chat_path = self.storage_root / 'chats' / filename
+        chat_path = self._get_chat_header_path(chat_id)
 
         if not chat_path.exists():
             raise ResourceNotFoundError(f"Chat {chat_id} not found")
 
         chat_path.unlink()
+        self._get_chat_rewrite_path(chat_id).unlink(missing_ok=True)
+        for path in (self._get_chat_messages_path(chat_id), self._get_chat_offsets_path(chat_id)):
+            path.unlink(missing_ok=True)
+            path.with_name(path.name + '.tmp').unlink(missing_ok=True)
 
         # Remove from index
-        self.index_service.remove(chat_id)
+        self.index_writer.remove(chat_id)
+        self.remove_vector(chat_id)
+
+    def convert_metadata(self, metadata_format: str) -> int:
+        """
+        Rewrite every prompt/template metadata file in another format.
+
+        Args:
+            metadata_format: Target format ('yaml' or 'json')
+
+        Returns:
+            Number of files converted
+        """
+        codec = get_codec(metadata_format)
+        converted = 0
+
+        for item_type in ('prompt', 'template'):
+            for item_dir in (self.storage_root / f"{item_type}s").glob(f"{item_type}-*"):
+                metadata_path = self._find_metadata_path(item_dir, item_type) if item_dir.is_dir() else None
+                if metadata_path is None or codec_for_path(metadata_path) is codec:
+                    continue
+
+                item_id = item_dir.name[len(item_type) + 1:]
+                self._write_metadata(item_type, item_id, self._read_metadata(metadata_path), codec)
+                converted += 1
+
+        return converted
 
     def list_all_items(self, item_type: str) -> List[ItemMetadata]:
         """
@@ -511,19 +1420,194 @@ class FileStorageService:
         items_dir = self.storage_root / f"{item_type}s"
         items = []
 
-        
         for item_dir in items_dir.glob(f"{item_type}-*"):
             if item_dir.is_dir():
-                yaml_path = item_dir / f"{item_type}.yaml"
-                if yaml_path.exists():
-                    items.append(ItemMetadata.from_dict(self._read_yaml(yaml_path)))
+                metadata_path = self._find_metadata_path(item_dir, item_type)
+                if metadata_path is not None:
+                    items.append(ItemMetadata.from_dict(self._read_metadata(metadata_path)))
 
         return items
 
+    def list_index_paths(self) -> Dict[str, List[str]]:
+        """
+        List the files that make up the index, per item type.
+
+        Returns:
+            Dict mapping 'prompt'/'template' to item directories and 'chat'
+            to chat header files
+        """
+        paths = {}
+        for item_type in ('prompt', 'template', 'chat'):
+            items_dir = self.storage_root / f"{item_type}s"
+            paths[item_type] = []
+            if not items_dir.exists():
+                continue
+            with os.scandir(items_dir) as entries:
+                for entry in entries:
+                    if not entry.name.startswith(f"{item_type}-"):
+                        continue
+                    if item_type == 'chat':
+                        if entry.name.endswith('.json') and entry.is_file():
+                            paths[item_type].append(entry.path)
+                    elif entry.is_dir():
+                        paths[item_type].append(entry.path)
+        return paths
+
+    def item_size(self, item_type: str, item_id: str) -> int:
+        """
+        Get the bytes an item takes up in storage.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            item_id: Item ID
+
+        Returns:
+            Total size of the item directory (metadata and versions) or of a
+            chat's header, message log and offsets; 0 if nothing exists
+        """
+        if item_type == 'chat':
+            paths = [self._get_chat_header_path(item_id), self._get_chat_messages_path(item_id),
+                     self._get_chat_offsets_path(item_id)]
+        else:
+            paths = []
+            for dirpath, _, filenames in os.walk(self._get_item_directory(item_type, item_id)):
+                paths.extend(os.path.join(dirpath, filename) for filename in filenames)
+
+        size = 0
+        for path in paths:
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def index_file_path(self, item_type: str, path: str) -> Optional[Path]:
+        """
+        Get the file an entry from list_index_paths is indexed from.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            path: Item directory or chat header file
+
+        Returns:
+            Metadata file or chat header, or None if the item has no metadata file
+        """
+        if item_type == 'chat':
+            return Path(path)
+        return self._find_metadata_path(Path(path), item_type)
+
+    def index_files(self, item_type: str, path: str) -> List[Tuple[Path, bool]]:
+        """
+        List the files an entry from list_index_paths is indexed from.
+
+        For prompts and templates: the metadata file, HEAD, the version HEAD
+        points to and the versions directory. For chats: the header, the
+        message log and its offsets.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            path: Item directory or chat header file
+
+        Returns:
+            (path, hashed) per existing file, index_file_path first; empty if
+            the item has no metadata file. Message logs and offsets are not
+            content-hashed: they can be large, and every write through the
+            service rewrites the header as well
+        """
+        file_path = self.index_file_path(item_type, path)
+        if file_path is None or not file_path.exists():
+            return []
+        files = [(file_path, True)]
+
+        if item_type == 'chat':
+            chat_id = file_path.name[len('chat-'):-len('.json')]
+            files.extend((log_path, False) for log_path in (
+                self._get_chat_messages_path(chat_id), self._get_chat_offsets_path(chat_id)))
+        else:
+            item_dir = Path(path)
+            head_file = item_dir / "HEAD"
+            try:
+                files.extend([(head_file, True), (item_dir / head_file.read_text().strip(), True)])
+            except FileNotFoundError:
+                pass
+            files.append((item_dir / "versions", True))
+        return [(file_path, hashed) for file_path, hashed in files if file_path.exists()]
+
+    def index_manifest(self, item_type: str, path: str, item_id: str) -> List[Dict]:
+        """
+        Fingerprint the files an entry from list_index_paths is indexed from.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            path: Item directory or chat header file
+            item_id: Item ID
+
+        Returns:
+            IndexManifest field values per file of index_files (see
+            utils.manifest); files removed meanwhile are left out
+        """
+        entries = []
+        for file_path, hashed in self.index_files(item_type, path):
+            try:
+                entries.append(manifest_entry(self.storage_root, item_type, item_id, file_path, hashed))
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def read_index_record(self, item_type: str, path: str) -> Optional[IndexRecord]:
+        """
+        Parse one entry from list_index_paths into an IndexRecord.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            path: Item directory or chat header file
+
+        Returns:
+            IndexRecord, or None if the item directory has no metadata file
+        """
+        if item_type == 'chat':
+            with open(path, 'r', encoding='utf-8') as f:
+                header = json.load(f)
+            chat = self._chat_from_header(header)
+            record = ChatMeta.from_file_dict(chat.to_header_dict()).to_index_record()
+        else:
+            metadata_path = self._find_metadata_path(Path(path), item_type)
+            if metadata_path is None:
+                return None
+            item = ItemMetadata.from_dict(self._read_metadata(metadata_path))
+            meta_class = PromptMeta if item_type == 'prompt' else TemplateMeta
+            record = meta_class.from_file_dict(item.__dict__()).to_index_record()
+
+        record.size_bytes = self.item_size(item_type, record.id)
+        return record
+
+    def read_index_content(self, item_type: str, path: str, item_id: str) -> List[str]:
+        """
+        Get the searchable content of one entry from list_index_paths.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            path: Item directory or chat header file
+            item_id: Item ID
+
+        Returns:
+            [HEAD version content] for prompts/templates (empty without a
+            HEAD), or the text of every chat message
+        """
+        if item_type == 'chat':
+            with open(path, 'r', encoding='utf-8') as f:
+                header = json.load(f)
+            return [self._message_text(msg) for msg in self._iter_chat_messages(header)]
+
+        head = self.read_version(item_type, item_id)
+        return [head.content] if head else []
+
     def list_all_chats(self) -> List[ChatMetadata]:
         """
         List all chats.
 
+        Only headers are read; messages load lazily on access.
+
         Returns:
             List of ChatMetadata objects
         """
@@ -536,7 +1620,7 @@ class FileStorageService:
         for chat_file in chats_dir.glob("chat-*.json"):
             with open(chat_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                chats.append(ChatMetadata.from_dict(data))
+            chats.append(self._chat_from_header(data))
 
         return chats
 
@@ -544,25 +1628,21 @@ class FileStorageService:
         """
         Load chat metadata.
 
+        Only the header is read; messages load lazily on first access.
+
         Args:
             chat_id: Chat ID
 
         Returns:
             ChatMetadata object
         """
-        filename = f"chat-{chat_id}.json"
-        chat_path = self.storage_root / 'chats' / filename
-
-        if not chat_path.exists():
-            raise ResourceNotFoundError(f"Chat {chat_id} not found")
-
-        with open(chat_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return ChatMetadata.from_dict(data)
+        return self._chat_from_header(self._read_chat_header(chat_id))
 
     def save_chat(self, chat: ChatMetadata) -> str:
         """
-        Save chat metadata to JSON file.
+        Save chat metadata and messages.
+
+        Messages are only written if they were loaded or assigned.
 
         Args:
             chat: ChatMetadata object
@@ -570,17 +1650,24 @@ class FileStorageService:
         Returns:
             chat_id
         """
-        filename = f"chat-{chat.id}.json"
-        chat_path = self.storage_root / 'chats' / filename
-        chat_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(chat_path, 'w', encoding='utf-8') as f:
-            json.dump(chat.__dict__(), f, indent=2, ensure_ascii=False)
+        with self._chat_lock(chat.id):
+            self._finish_chat_rewrite(chat.id)
+            header_path = self._get_chat_header_path(chat.id)
+            previous = self._read_chat_header(chat.id) if header_path.exists() else None
+
+            messages = None
+            first_written = 0
+            if previous is None or chat.messages_loaded:
+                chat_data = chat.__dict__()
+                header, first_written = self._write_chat(chat_data, previous)
+                messages = (chat_data.get('messages') or [])[first_written:]
+            else:
+                # Messages untouched: rewrite the header only
+                header = {**previous, **chat.to_header_dict()}
+                self._write_json_atomic(header_path, header)
 
         # Sync with index
-        chat_meta = ChatMeta.from_file_dict(chat.__dict__())
-        record = chat_meta.to_index_record()
-        self.index_service.add_or_update(record)
+        self._sync_chat_to_index(header, messages, first_written)
 
         return chat.id
 
@@ -588,6 +1675,8 @@ class FileStorageService:
         """
         Find a chat by provider and conversation_id.
 
+        Uses the (provider, conversation_id) index instead of scanning chat files.
+
         Args:
             provider: AI provider name (e.g., 'ChatGPT', 'Claude')
             conversation_id: Conversation ID from the provider
@@ -595,11 +1684,45 @@ class FileStorageService:
         Returns:
             ChatMetadata if found, None otherwise
         """
-        chats = self.list_all_chats()
+        record = self.index_service.find_by_conversation(provider, conversation_id)
+        if record is None:
+            return None
 
-        for chat in chats:
-            if (chat.provider and chat.provider.lower() == provider.lower() and
-                chat.conversation_id == conversation_id):
-                return chat
+        try:
+            return self.load_chat(record.id)
+        except ResourceNotFoundError:
+            # Chat file was removed outside the API; drop the stale entry
+            self.index_writer.remove(record.id)
+            self.remove_vector(record.id)
+            return None
 
-        return None
+    def upsert_chat_by_conversation(self, chat: ChatMetadata) -> Tuple[str, bool]:
+        """
+        Create a chat, or update the existing chat for the same conversation.
+
+        The lookup and the write happen under a per-conversation file lock,
+        so parallel syncs of one conversation cannot create duplicate files.
+        A new chat is indexed directly, bypassing the write-behind queue, so
+        the next lookup in any process finds it once the lock is released.
+
+        Args:
+            chat: Incoming chat; provider and conversation_id must be set
+
+        Returns:
+            Tuple of (chat_id, created)
+        """
+        with self._conversation_lock(chat.provider, chat.conversation_id):
+            existing = self.find_chat_by_conversation(chat.provider, chat.conversation_id)
+
+            if existing is None:
+                return self._create_chat(chat.__dict__(), self.index_service), True
+
+            existing.title = chat.title
+            existing.description = chat.description
+            existing.labels = chat.labels
+            existing.messages = chat.messages
+            existing.updated_at = chat.updated_at
+            existing.model = chat.model or existing.model
+            self.save_chat(existing)
+
+            return existing.id, False
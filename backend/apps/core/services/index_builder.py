@@ -0,0 +1,236 @@
+"""
+Parallel, bulk index rebuild.
+
+Files are parsed into IndexRecords (plus their searchable content, MinHash
+signatures and similarity vectors) in a process pool, in batches, and each
+batch is written with bulk_create as soon as it is parsed instead of one
+query per item.
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from backend.apps.core.domain.index_record import IndexRecord
+from backend.apps.core.utils import minhash
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Per-process storage service used by pool workers
+_worker_storage = None
+
+
+def _init_worker(storage_root: str):
+    """Set up Django and a storage service in a freshly spawned worker."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+    global _worker_storage
+    from backend.apps.core.services.file_storage_service import FileStorageService
+    _worker_storage = FileStorageService(storage_root)
+
+
+@dataclass
+class ParsedBatch:
+    """Index rows parsed from one batch of files."""
+    records: List[IndexRecord] = field(default_factory=list)
+    # IndexManifest field values per parsed file
+    manifest: List[Dict] = field(default_factory=list)
+    # Searchable bodies, MinHash signature and similarity vector per item ID
+    contents: Dict[str, List[str]] = field(default_factory=dict)
+    signatures: Dict[str, 'np.ndarray'] = field(default_factory=dict)
+    vectors: Dict[str, 'np.ndarray'] = field(default_factory=dict)
+    errors: List[Dict] = field(default_factory=list)
+
+
+def parse_batch(item_type: str, paths: List[str], storage=None,
+                vector_dimensions: Optional[int] = None, sign: bool = False) -> ParsedBatch:
+    """
+    Parse a batch of item directories or chat header files.
+
+    Each parsed file is also fingerprinted for the index manifest, and its
+    HEAD version or chat messages are read for the content index; with sign
+    they are also signed for duplicate detection, and with vector_dimensions
+    embedded.
+
+    Args:
+        item_type: 'prompt', 'template' or 'chat'
+        paths: Paths from FileStorageService.list_index_paths
+        storage: Storage service; defaults to the worker's
+        vector_dimensions: Length of the similarity vectors; None skips them
+        sign: Whether to compute MinHash signatures (settings.DUPLICATE_DETECTION_ENABLED)
+
+    Returns:
+        ParsedBatch
+    """
+    storage = storage or _worker_storage
+    chat_messages = getattr(settings, 'VECTOR_CHAT_MESSAGES', 10)
+    batch = ParsedBatch()
+
+    for path in paths:
+        try:
+            record = storage.read_index_record(item_type, path)
+            if record is None:
+                continue
+            content = storage.read_index_content(item_type, path, record.id)
+            batch.manifest.extend(storage.index_manifest(item_type, path, record.id))
+            batch.contents[record.id] = content
+            signature = minhash.signature(content) if sign else None
+            if signature is not None:
+                batch.signatures[record.id] = signature
+            if vector_dimensions:
+                from backend.apps.core.services.vector_index import item_vector
+                bodies = content[:chat_messages] if item_type == 'chat' else content
+                batch.vectors[record.id] = item_vector(record.title, record.description, bodies,
+                                                       vector_dimensions)
+            batch.records.append(record)
+        except Exception as e:
+            batch.errors.append({
+                'item': os.path.basename(path),
+                'type': item_type,
+                'error': str(e),
+            })
+
+    return batch
+
+
+class IndexBuilder:
+    """Rebuilds the database index from file storage."""
+
+    def __init__(self, storage_service, index_service,
+                 workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        """
+        Args:
+            storage_service: FileStorageService instance
+            index_service: DBIndexService instance
+            workers: Parser processes; 0/None uses settings.INDEX_REBUILD_WORKERS,
+                then the CPU count. 1 parses in this process
+            chunk_size: Files per parse batch and rows per bulk_create.
+                Defaults to settings.INDEX_REBUILD_CHUNK_SIZE
+        """
+        self.storage_service = storage_service
+        self.index_service = index_service
+        self.workers = workers or getattr(settings, 'INDEX_REBUILD_WORKERS', 0) or os.cpu_count() or 1
+        self.chunk_size = chunk_size or getattr(settings, 'INDEX_REBUILD_CHUNK_SIZE', 1000)
+        self._workers_used = 1
+        self._errors: List[Dict] = []
+        self._write_seconds = 0.0
+
+    def rebuild(self) -> Dict:
+        """
+        Parse all files and replace the index contents.
+
+        Each batch is written as soon as it is parsed (see IndexReplacement),
+        so the index stays readable and memory holds a few batches, not the
+        whole storage. Similarity vectors go to new vector files alongside.
+        If anything fails, both replacements are aborted: the database keeps
+        the items not rewritten yet and the vector files stay as they were.
+
+        Returns:
+            Dict with per-type counts, errors and throughput statistics
+        """
+        started = time.perf_counter()
+        paths = self.storage_service.list_index_paths()
+        files_scanned = sum(len(type_paths) for type_paths in paths.values())
+
+        batches = [
+            (item_type, type_paths[i:i + self.chunk_size])
+            for item_type, type_paths in paths.items()
+            for i in range(0, len(type_paths), self.chunk_size)
+        ]
+
+        self._errors = []
+        self._write_seconds = 0.0
+        vector_index = self.storage_service.vector_index
+        replacement = self.index_service.replace_all(self.chunk_size)
+        vectors = vector_index.replace_all() if vector_index is not None else None
+        try:
+            for batch in self._parse(batches, vector_index.dimensions if vector_index else None,
+                                     self.index_service.duplicates_enabled()):
+                written = self._write(replacement, batch)
+                if vectors is not None:
+                    vectors.write(
+                        (record.id, record.item_type.value, batch.vectors[record.id])
+                        for record in written if record.id in batch.vectors
+                    )
+
+            write_started = time.perf_counter()
+            added, write_errors = replacement.finish()
+            self._write_seconds += time.perf_counter() - write_started
+            if vectors is not None:
+                vectors.finish()
+        except BaseException:
+            replacement.abort()
+            if vectors is not None:
+                vectors.abort()
+            raise
+
+        elapsed = time.perf_counter() - started
+        return {
+            'prompts_added': added.get('prompt', 0),
+            'templates_added': added.get('template', 0),
+            'chats_added': added.get('chat', 0),
+            'errors': self._errors + write_errors,
+            'files_scanned': files_scanned,
+            'workers': self._workers_used,
+            'chunk_size': self.chunk_size,
+            'parse_seconds': round(elapsed - self._write_seconds, 3),
+            'write_seconds': round(self._write_seconds, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'items_per_second': round(files_scanned / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def _write(self, replacement, batch: ParsedBatch) -> List[IndexRecord]:
+        """Index one parsed batch, returning the records that were written."""
+        self._errors.extend(batch.errors)
+        write_started = time.perf_counter()
+        written = replacement.write(batch.records, batch.manifest, batch.contents, batch.signatures)
+        self._write_seconds += time.perf_counter() - write_started
+        return written
+
+    def _parse(self, batches: List[Tuple[str, List[str]]],
+               vector_dimensions: Optional[int], sign: bool) -> Iterator[ParsedBatch]:
+        """
+        Parse batches in a process pool, or inline when a pool would not pay off.
+
+        Batches are yielded in order as they are ready; at most two per
+        worker are in flight, so parsed rows waiting to be written stay bounded.
+        """
+        remaining = deque(batches)
+        workers = min(self.workers, len(batches))
+        if workers > 1:
+            pending = deque()
+            try:
+                # spawn, not fork: the server may be running other threads
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(str(self.storage_service.storage_root),),
+                ) as executor:
+                    while remaining or pending:
+                        while remaining and len(pending) < workers * 2:
+                            item_type, paths = remaining.popleft()
+                            pending.append(((item_type, paths), executor.submit(
+                                parse_batch, item_type, paths, None, vector_dimensions, sign)))
+                        result = pending[0][1].result()
+                        pending.popleft()
+                        self._workers_used = workers
+                        yield result
+                return
+            except (OSError, NotImplementedError, RuntimeError):
+                # No usable process pool here (sandboxes, embedded interpreters):
+                # parse what was not yielded yet inline
+                remaining.extendleft(reversed([batch for batch, _ in pending]))
+
+        for item_type, paths in remaining:
+            yield parse_batch(item_type, paths, self.storage_service, vector_dimensions, sign)
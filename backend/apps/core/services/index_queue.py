@@ -0,0 +1,275 @@
+"""
+Write-behind queue for index updates.
+
+Storage mutations enqueue their index writes instead of running one
+transaction each; the queue has the same write methods as DBIndexService. Pending writes are coalesced per item (the last metadata
+wins, content changes are merged) and flushed in one transaction per batch,
+on a short interval or when the batch is full. Index reads call
+read_barrier() first, so a request always sees its own writes.
+
+Queued writes live in memory only. The index is derived from storage, so
+writes lost in a crash are picked up again by a reconcile.
+"""
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from backend.apps.core.domain.index_record import IndexRecord
+
+logger = logging.getLogger(__name__)
+
+
+class PendingWrite:
+    """Coalesced index changes for one item."""
+
+    def __init__(self, item_id: str):
+        self.item_id = item_id
+        self.record: Optional[IndexRecord] = None
+        # IndexManifest entries of the record's files, if known
+        self.manifest: Optional[List[Dict]] = None
+        self.removed = False
+        # (item_type, bodies, start) in the order they were made
+        self.content: List[Tuple[str, List[str], int]] = []
+
+    def add_content(self, item_type: str, bodies: List[str], start: int):
+        """
+        Merge a content change into the pending ones.
+
+        A change replaces everything from start on, so earlier changes are
+        cut at start, and one that ends exactly there is extended (the case
+        of consecutive message appends).
+        """
+        content = [
+            (pending_type, pending_bodies[:start - pending_start], pending_start)
+            for pending_type, pending_bodies, pending_start in self.content
+            if pending_start < start
+        ]
+        if content and content[-1][2] + len(content[-1][1]) == start:
+            last_type, last_bodies, last_start = content.pop()
+            content.append((item_type, last_bodies + list(bodies), last_start))
+        else:
+            content.append((item_type, list(bodies), start))
+        self.content = content
+
+
+class IndexWriteQueue:
+    """Coalescing, batching queue in front of DBIndexService writes."""
+
+    def __init__(self, index_service=None, flush_interval: Optional[float] = None,
+                 max_batch: Optional[int] = None):
+        """
+        Args:
+            index_service: DBIndexService instance (default: new one)
+            flush_interval: Seconds between background flushes. Defaults to
+                settings.INDEX_WRITE_BEHIND_INTERVAL; 0 flushes only when the
+                batch is full or on a read barrier
+            max_batch: Pending items that trigger a flush. Defaults to
+                settings.INDEX_WRITE_BEHIND_BATCH
+        """
+        if index_service is None:
+            from backend.apps.core.services.db_index_service import DBIndexService
+            index_service = DBIndexService()
+
+        self.index_service = index_service
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else getattr(settings, 'INDEX_WRITE_BEHIND_INTERVAL', 0.5))
+        self.max_batch = max_batch or getattr(settings, 'INDEX_WRITE_BEHIND_BATCH', 500)
+
+        self._pending: Dict[str, PendingWrite] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes, so batches reach the database in queue order
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._queued = 0
+        self._flushes = 0
+        self._items_written = 0
+        self._errors = 0
+        self._last_flush_seconds = 0.0
+
+    def add_or_update(self, record: IndexRecord, manifest: Optional[List[Dict]] = None):
+        """Queue an add-or-update of an item's index row (see DBIndexService.add_or_update)."""
+        def set_record(write: PendingWrite):
+            write.record = record
+            write.manifest = manifest
+            write.removed = False
+
+        full = self._update(record.id, set_record)
+        self._after_put(full)
+
+    def set_content(self, item_id: str, item_type: str, bodies: List[str], start: int = 0):
+        """Queue a content change (see DBIndexService.set_content)."""
+        full = self._update(item_id, lambda write: write.add_content(item_type, bodies, start))
+        self._after_put(full)
+
+    def remove(self, item_id: str):
+        """Queue removal of an item; drops its other pending changes."""
+        def mark_removed(write: PendingWrite):
+            write.record = None
+            write.manifest = None
+            write.content = []
+            write.removed = True
+
+        full = self._update(item_id, mark_removed)
+        self._after_put(full)
+
+    def _update(self, item_id: str, change) -> bool:
+        with self._lock:
+            write = self._pending.get(item_id)
+            if write is None:
+                write = self._pending[item_id] = PendingWrite(item_id)
+            change(write)
+            self._queued += 1
+            return len(self._pending) >= self.max_batch
+
+    def _after_put(self, full: bool):
+        if self.flush_interval > 0:
+            self._ensure_thread()
+            if full:
+                self._wakeup.set()
+        elif full:
+            self.flush()
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Write all pending changes in one batch.
+
+        Returns:
+            Number of items written
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            records = [write.record for write in pending.values() if write.record is not None]
+            removed_ids = [write.item_id for write in pending.values() if write.removed]
+            manifests = {
+                write.item_id: write.manifest
+                for write in pending.values() if write.record is not None and write.manifest is not None
+            }
+            contents = [
+                (write.item_id, item_type, bodies, start)
+                for write in pending.values() if not write.removed
+                for item_type, bodies, start in write.content
+            ]
+            try:
+                errors = self.index_service.write_batch(records, removed_ids, contents, manifests)
+            except Exception:
+                # Put the batch back, under anything queued since, and let the caller see the error
+                with self._lock:
+                    for item_id, write in pending.items():
+                        newer = self._pending.get(item_id)
+                        if newer is None:
+                            self._pending[item_id] = write
+                        elif not newer.removed:
+                            if newer.record is None:
+                                newer.record, newer.manifest = write.record, write.manifest
+                            later_content, newer.content = newer.content, write.content
+                            for item_type, bodies, start in later_content:
+                                newer.add_content(item_type, bodies, start)
+                raise
+
+            for error in errors:
+                logger.warning("Index write for %s failed: %s", error.get('item'), error.get('error'))
+            self._flushes += 1
+            self._items_written += len(pending)
+            self._errors += len(errors)
+            self._last_flush_seconds = round(time.perf_counter() - started, 4)
+            return len(pending)
+
+    def stats(self) -> Dict:
+        """Get queue statistics."""
+        return {
+            'pending': self.pending_count,
+            'queued': self._queued,
+            'flushes': self._flushes,
+            'items_written': self._items_written,
+            'errors': self._errors,
+            'last_flush_seconds': self._last_flush_seconds,
+            'flush_interval': self.flush_interval,
+            'max_batch': self.max_batch,
+        }
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='index-write-behind', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Index write-behind flush failed")
+                close_old_connections()
+        finally:
+            close_old_connections()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the flush thread and write what is still pending."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+
+_queue: Optional[IndexWriteQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_index_queue() -> Optional[IndexWriteQueue]:
+    """Get the process-wide queue, or None if settings.INDEX_WRITE_BEHIND is off."""
+    global _queue
+    if not getattr(settings, 'INDEX_WRITE_BEHIND', False):
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = IndexWriteQueue()
+                atexit.register(_flush_at_exit)
+    return _queue
+
+
+def read_barrier():
+    """
+    Flush pending index writes so a following read sees them.
+
+    A failed flush is logged and the read goes ahead on the index as it is;
+    the batch stays queued for the next flush.
+    """
+    if _queue is not None and _queue.pending_count:
+        try:
+            _queue.flush()
+        except Exception:
+            logger.exception("Index write-behind flush before a read failed")
+
+
+def _flush_at_exit():
+    try:
+        if _queue is not None:
+            _queue.stop(timeout=5)
+    except Exception:
+        logger.exception("Index write-behind flush at exit failed")
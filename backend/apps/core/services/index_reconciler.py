@@ -0,0 +1,208 @@
+"""
+Incremental index reconcile.
+
+Every file an item is indexed from (metadata, HEAD and versions, or a
+chat's header and message log; see FileStorageService.index_files) has an
+IndexManifest row holding its (mtime, size, content hash). A reconcile walks
+the storage root and only re-parses items with a changed fingerprint, then
+drops index rows whose files are gone.
+"""
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from backend.apps.core.models import IndexedItem, IndexManifest
+from backend.apps.core.utils.manifest import stat_key
+
+
+class IndexReconciler:
+    """Brings the database index in line with file storage, touching only what changed."""
+
+    def __init__(self, storage_service, index_service):
+        """
+        Args:
+            storage_service: FileStorageService instance
+            index_service: DBIndexService instance
+        """
+        self.storage_service = storage_service
+        self.index_service = index_service
+
+    def reconcile(self, dry_run: bool = False) -> Dict:
+        """
+        Re-index changed items and drop index rows of deleted ones.
+
+        Args:
+            dry_run: Only count what would change
+
+        Returns:
+            Dict with counts of scanned/unchanged/added/updated/removed items
+        """
+        started = time.perf_counter()
+        stats = {
+            'files_scanned': 0,
+            'unchanged': 0,
+            'touched': 0,
+            'added': 0,
+            'updated': 0,
+            'removed': 0,
+            'errors': [],
+            'dry_run': dry_run,
+        }
+
+        # Item ID -> {path: (mtime_ns, size, content_hash)}, and path -> item ID
+        manifest: Dict[str, Dict[str, Tuple]] = {}
+        owners: Dict[str, str] = {}
+        for path, item_id, mtime_ns, size, content_hash in IndexManifest.objects.values_list(
+                'path', 'item_id', 'mtime_ns', 'size', 'content_hash'):
+            manifest.setdefault(item_id, {})[path] = (mtime_ns, size, content_hash)
+            owners[path] = item_id
+        seen_items = set()
+
+        for item_type, paths in self.storage_service.list_index_paths().items():
+            for path in paths:
+                files = self.storage_service.index_files(item_type, path)
+                if not files:
+                    continue
+                stats['files_scanned'] += 1
+                owner = owners.get(self._relative_path(files[0][0]))
+
+                try:
+                    item_id = self._reconcile_item(item_type, path, files, owner, manifest.get(owner, {}),
+                                                   stats, dry_run)
+                except Exception as e:
+                    stats['errors'].append({
+                        'item': os.path.basename(path),
+                        'type': item_type,
+                        'error': str(e),
+                    })
+                    # Keep whatever the index has for an unreadable item
+                    item_id = owner
+                if item_id:
+                    seen_items.add(item_id)
+
+        stale_paths = [path for path, item_id in owners.items() if item_id not in seen_items]
+        stale_ids = [item_id for item_id in IndexedItem.objects.values_list('id', flat=True)
+                     if item_id not in seen_items]
+        stats['removed'] = len(stale_ids)
+
+        if not dry_run:
+            for i in range(0, len(stale_paths), 500):
+                IndexManifest.objects.filter(path__in=stale_paths[i:i + 500]).delete()
+            self.index_service.remove_many(stale_ids)
+            for item_id in stale_ids:
+                self.storage_service.remove_vector(item_id)
+
+        stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return stats
+
+    def reconcile_items(self, items: Iterable[Tuple[str, str]]) -> Dict:
+        """
+        Reconcile only the given items, e.g. ones a file watcher saw change.
+
+        Args:
+            items: (item_type, path) pairs in the form returned by
+                FileStorageService.list_index_paths; the path may no longer exist
+
+        Returns:
+            Dict with counts of unchanged/added/updated/removed items
+        """
+        stats = {'files_scanned': 0, 'unchanged': 0, 'touched': 0, 'added': 0,
+                 'updated': 0, 'removed': 0, 'errors': [], 'dry_run': False}
+        removed_ids = []
+
+        for item_type, path in items:
+            item_id = self._item_id_from_path(item_type, path)
+            files = self.storage_service.index_files(item_type, path) if os.path.exists(path) else []
+
+            if not files:
+                # Item deleted (or its metadata file not written yet); remove_many drops its manifest rows
+                removed_ids.append(item_id)
+                continue
+
+            stats['files_scanned'] += 1
+            owner = IndexManifest.objects.filter(path=self._relative_path(files[0][0])).values_list(
+                'item_id', flat=True).first()
+            entries = {
+                entry_path: (mtime_ns, size, content_hash)
+                for entry_path, mtime_ns, size, content_hash in IndexManifest.objects.filter(
+                    item_id=owner).values_list('path', 'mtime_ns', 'size', 'content_hash')
+            } if owner else {}
+            try:
+                self._reconcile_item(item_type, path, files, owner, entries, stats, dry_run=False)
+            except Exception as e:
+                stats['errors'].append({'item': item_id, 'type': item_type, 'error': str(e)})
+
+        if removed_ids:
+            stats['removed'] = IndexedItem.objects.filter(id__in=removed_ids).count()
+            self.index_service.remove_many(removed_ids)
+            for item_id in removed_ids:
+                self.storage_service.remove_vector(item_id)
+        return stats
+
+    @staticmethod
+    def _item_id_from_path(item_type: str, path: str) -> str:
+        """Get the item ID from an item directory or chat header path."""
+        name = os.path.basename(path.rstrip(os.sep))
+        if item_type == 'chat' and name.endswith('.json'):
+            name = name[:-len('.json')]
+        return name[len(item_type) + 1:]
+
+    def _relative_path(self, file_path: Path) -> str:
+        """Get a file's IndexManifest path."""
+        return file_path.relative_to(self.storage_service.storage_root).as_posix()
+
+    def _reconcile_item(self, item_type: str, path: str, files: List[Tuple[Path, bool]], owner: Optional[str],
+                        entries: Dict[str, Tuple], stats: Dict, dry_run: bool) -> Optional[str]:
+        """
+        Check one item's files against its manifest entries.
+
+        Args:
+            item_type: 'prompt', 'template' or 'chat'
+            path: Item directory or chat header file
+            files: The item's FileStorageService.index_files
+            owner: Item ID the manifest has for the first file, if any
+            entries: That item's manifest entries, path -> (mtime_ns, size, content_hash)
+            stats: Counters to update
+            dry_run: Only count what would change
+
+        Returns:
+            ID of the item the files are indexed as, or None if they hold none
+        """
+        current = {self._relative_path(file_path): file_path for file_path, _ in files}
+        if entries and set(entries) == set(current) and all(
+                entries[relative_path][:2] == stat_key(file_path)
+                for relative_path, file_path in current.items()):
+            stats['unchanged'] += 1
+            return owner
+
+        manifest = self.storage_service.index_manifest(item_type, path,
+                                                       owner or self._item_id_from_path(item_type, path))
+        if entries and set(entries) == {entry['path'] for entry in manifest} and all(
+                entry['content_hash'] and entry['content_hash'] == entries[entry['path']][2]
+                for entry in manifest):
+            # Rewritten with identical content (touch, checkout): refresh the fingerprints only
+            stats['touched'] += 1
+            if not dry_run:
+                with transaction.atomic():
+                    for entry in manifest:
+                        IndexManifest.objects.filter(path=entry['path']).update(
+                            mtime_ns=entry['mtime_ns'], size=entry['size'])
+            return owner
+
+        record = self.storage_service.read_index_record(item_type, path)
+        if record is None:
+            return None
+        stats['updated' if entries else 'added'] += 1
+
+        if not dry_run:
+            for entry in manifest:
+                entry['item_id'] = record.id
+            content = self.storage_service.read_index_content(item_type, path, record.id)
+            with transaction.atomic():
+                self.index_service.add_or_update(record, manifest)
+                self.index_service.set_content(record.id, item_type, content)
+            self.storage_service.index_vector(record, content)
+        return record.id
@@ -0,0 +1,290 @@
+"""
+Filesystem watcher that keeps the database index in sync with external edits.
+
+On Linux, inotify (via ctypes) reports changes under prompts/, templates/
+(each item directory and its versions/) and chats/; events are debounced
+per item and applied with a targeted reconcile of just those items.
+Elsewhere, or when inotify cannot be set up, the watcher falls back to a
+periodic stat-based reconcile of the whole tree.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+ITEM_TYPES = ('prompt', 'template', 'chat')
+VERSIONS_DIR = 'versions'
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class Inotify:
+    """Minimal ctypes binding for Linux inotify."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.paths: Dict[int, str] = {}
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether inotify can be used on this platform."""
+        if not hasattr(os, 'O_CLOEXEC'):
+            return False
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        try:
+            return hasattr(ctypes.CDLL(libc_name), 'inotify_init1')
+        except OSError:
+            return False
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {path}')
+        self.paths[wd] = path
+        return wd
+
+    def read_events(self, timeout: float) -> List[Tuple[str, int, str]]:
+        """
+        Wait for events.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            List of (watched directory, mask, file name)
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b'\0'))
+            offset += name_len
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            events.append((self.paths.get(wd, ''), mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class IndexWatcher:
+    """Watches file storage and applies targeted index updates."""
+
+    def __init__(self, storage_service=None, index_service=None, debounce: Optional[float] = None,
+                 poll_interval: Optional[float] = None, backend: str = 'auto'):
+        """
+        Args:
+            storage_service: FileStorageService instance (default: new one)
+            index_service: DBIndexService instance (default: new one)
+            debounce: Seconds an item must be quiet before it is re-indexed.
+                Defaults to settings.INDEX_WATCHER_DEBOUNCE
+            poll_interval: Seconds between reconciles in polling mode.
+                Defaults to settings.INDEX_WATCHER_POLL_INTERVAL
+            backend: 'inotify', 'polling' or 'auto'
+        """
+        if storage_service is None:
+            from backend.apps.core.services.file_storage_service import FileStorageService
+            storage_service = FileStorageService()
+        if index_service is None:
+            from backend.apps.core.services.db_index_service import DBIndexService
+            index_service = DBIndexService()
+
+        self.storage_service = storage_service
+        self.index_service = index_service
+        self.debounce = debounce if debounce is not None else getattr(settings, 'INDEX_WATCHER_DEBOUNCE', 0.5)
+        self.poll_interval = (poll_interval if poll_interval is not None
+                              else getattr(settings, 'INDEX_WATCHER_POLL_INTERVAL', 5.0))
+        self.backend = backend
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> threading.Thread:
+        """Run the watcher in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, name='index-watcher', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        """Ask the watcher to stop and wait for its thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        """Watch until stop() is called."""
+        inotify = None
+        if self.backend in ('auto', 'inotify') and Inotify.available():
+            try:
+                inotify = Inotify()
+                self._watch_tree(inotify)
+            except OSError as e:
+                if self.backend == 'inotify':
+                    raise
+                logger.warning("inotify unavailable (%s); falling back to polling", e)
+                if inotify is not None:
+                    inotify.close()
+                inotify = None
+        elif self.backend == 'inotify':
+            raise OSError('inotify is not available on this platform')
+
+        self.backend = 'inotify' if inotify is not None else 'polling'
+        logger.info("Index watcher started (%s)", self.backend)
+        try:
+            if inotify is not None:
+                self._run_inotify(inotify)
+            else:
+                self._run_polling()
+        finally:
+            if inotify is not None:
+                inotify.close()
+            close_old_connections()
+
+    def _watch_tree(self, inotify: Inotify):
+        """Watch the type directories and every prompt/template directory with its versions."""
+        root = self.storage_service.storage_root
+        for item_type in ITEM_TYPES:
+            type_dir = root / f"{item_type}s"
+            type_dir.mkdir(parents=True, exist_ok=True)
+            inotify.add_watch(str(type_dir))
+        for item_type, paths in self.storage_service.list_index_paths().items():
+            if item_type != 'chat':
+                for path in paths:
+                    self._watch_item(inotify, path)
+
+    @staticmethod
+    def _watch_item(inotify: Inotify, item_dir: str):
+        """Watch an item directory and, if it exists yet, its versions directory."""
+        inotify.add_watch(item_dir)
+        versions_dir = os.path.join(item_dir, VERSIONS_DIR)
+        if os.path.isdir(versions_dir):
+            inotify.add_watch(versions_dir)
+
+    def _run_inotify(self, inotify: Inotify):
+        pending: Dict[Tuple[str, str], float] = {}
+
+        while not self._stop.is_set():
+            for directory, mask, name in inotify.read_events(timeout=min(self.debounce, 1.0) or 0.1):
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; fall back to a full reconcile
+                    self._apply_full()
+                    continue
+                item = self._item_for_event(directory, name)
+                if item is None:
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and item[0] != 'chat':
+                    # A new item directory, or the versions directory of one
+                    created = os.path.join(directory, name)
+                    try:
+                        if created == item[1]:
+                            self._watch_item(inotify, created)
+                        else:
+                            inotify.add_watch(created)
+                    except OSError as e:
+                        logger.warning("Cannot watch %s: %s", created, e)
+                pending[item] = time.monotonic()
+
+            quiet_before = time.monotonic() - self.debounce
+            ready = [item for item, seen in pending.items() if seen <= quiet_before]
+            if ready:
+                for item in ready:
+                    del pending[item]
+                self._apply(ready)
+
+    def _run_polling(self):
+        while not self._stop.is_set():
+            self._apply_full()
+            self._stop.wait(self.poll_interval)
+
+    def _item_for_event(self, directory: str, name: str) -> Optional[Tuple[str, str]]:
+        """Map an event to the (item_type, path) it affects, or None to ignore it."""
+        if not name or name.endswith('.tmp'):
+            return None
+
+        root = str(self.storage_service.storage_root)
+        for item_type in ITEM_TYPES:
+            type_dir = os.path.join(root, f"{item_type}s")
+            if item_type == 'chat':
+                if directory != type_dir or not name.startswith('chat-'):
+                    continue
+                # Message logs and offsets belong to the chat's header
+                chat_name = name.split('.', 1)[0]
+                return item_type, os.path.join(type_dir, f"{chat_name}.json")
+            if directory == type_dir and name.startswith(f"{item_type}-"):
+                return item_type, os.path.join(type_dir, name)
+            if os.path.dirname(directory) == type_dir and (
+                    name.split('.', 1)[0] == item_type or name in ('HEAD', VERSIONS_DIR)):
+                # <type>.yaml / <type>.json, HEAD or versions/ inside an item directory
+                return item_type, directory
+            if os.path.basename(directory) == VERSIONS_DIR and os.path.dirname(os.path.dirname(directory)) == type_dir:
+                # A version file: it may be HEAD's, and the version count comes from metadata
+                return item_type, os.path.dirname(directory)
+        return None
+
+    def _apply(self, items: List[Tuple[str, str]]):
+        close_old_connections()
+        try:
+            stats = self.index_service.reconcile_items(self.storage_service, items)
+        except Exception:
+            logger.exception("Index watcher failed to apply %d change(s)", len(items))
+            return
+        for error in stats['errors']:
+            logger.warning("Index watcher could not index %s: %s", error.get('item'), error.get('error'))
+
+    def _apply_full(self):
+        close_old_connections()
+        try:
+            self.index_service.reconcile(self.storage_service)
+        except Exception:
+            logger.exception("Index watcher reconcile failed")
+
+
+_autostarted: Optional[IndexWatcher] = None
+
+
+def autostart_watcher() -> Optional[IndexWatcher]:
+    """Start one background watcher per process if settings.INDEX_WATCHER_AUTOSTART is on."""
+    global _autostarted
+    if _autostarted is None and getattr(settings, 'INDEX_WATCHER_AUTOSTART', False):
+        _autostarted = IndexWatcher()
+        _autostarted.start()
+    return _autostarted
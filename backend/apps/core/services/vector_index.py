@@ -0,0 +1,391 @@
+"""
+Local vector index for "more like this" and similarity search.
+
+Each item's title, description and HEAD content (for chats, the first
+messages) become a hashed bag-of-words vector: words are hashed into a fixed
+number of signed buckets, counted with sublinear term frequency and
+L2-normalized, so cosine similarity is a dot product. No model or external
+service is involved.
+
+The vectors are the rows of one float32 matrix memory-mapped from
+<storage_root>/.vectors/vectors.f32; vectors.ids holds each row's item ID
+and type, and vectors.json the row count. A write updates one row in place
+under a file lock, and a query scores every row with a single
+matrix-vector product.
+"""
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from filelock import FileLock
+
+VECTOR_FILE = 'vectors.f32'
+IDS_FILE = 'vectors.ids'
+META_FILE = 'vectors.json'
+
+# Row labels: ULID and item type
+ID_DTYPE = np.dtype([('id', 'S26'), ('type', 'S8')])
+
+# Rows allocated when the files are created; capacity doubles when full
+INITIAL_CAPACITY = 1024
+
+# Title words count this many times
+TITLE_WEIGHT = 2.0
+
+_WORD_RE = re.compile(r'[^\W_]+')
+# Scripts written without spaces between words
+_CJK_RE = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]')
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have if in into is it its of on or
+    that the their then there these this to was were will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase words, dropping stop words and single letters.
+
+    Runs of CJK characters are split into character bigrams instead.
+    """
+    tokens = []
+    for word in _WORD_RE.findall((text or '').lower()):
+        if _CJK_RE.search(word):
+            tokens.extend(word[i:i + 2] for i in range(max(1, len(word) - 1)))
+        elif len(word) > 1 and word not in STOP_WORDS:
+            tokens.append(word)
+    return tokens
+
+
+def text_vector(fields: Iterable[Tuple[str, float]], dimensions: int) -> np.ndarray:
+    """
+    Build a normalized hashed bag-of-words vector.
+
+    Args:
+        fields: (text, weight) pairs; a word's count is the sum of the
+            weights of the fields it occurs in
+        dimensions: Vector length
+
+    Returns:
+        float32 vector of unit length, or all zeros for text without words
+    """
+    counts: Dict[str, float] = {}
+    for text, weight in fields:
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0.0) + weight
+
+    if not counts:
+        return np.zeros(dimensions, dtype=np.float32)
+
+    digests = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in counts),
+                          dtype=np.uint32, count=len(counts))
+    weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+    # The sign bit keeps colliding words from always adding up
+    weights[digests < 0x80000000] *= -1.0
+    vector = np.bincount(digests % dimensions, weights=weights, minlength=dimensions).astype(np.float32)
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def item_vector(title: Optional[str], description: Optional[str], bodies: Iterable[str],
+                dimensions: int) -> np.ndarray:
+    """Build an item's vector from its title, description and content."""
+    fields = [(title or '', TITLE_WEIGHT), (description or '', 1.0)]
+    fields.extend((body, 1.0) for body in bodies)
+    return text_vector(fields, dimensions)
+
+
+class VectorIndex:
+    """Memory-mapped matrix of item vectors under one directory."""
+
+    def __init__(self, root: Path, dimensions: int):
+        """
+        Args:
+            root: Directory of the vector files (usually <storage_root>/.vectors)
+            dimensions: Vector length; files written with another length are
+                ignored until the next rebuild
+        """
+        self.root = Path(root)
+        self.dimensions = dimensions
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._capacity = 0
+        self._count = 0
+        self._rows: Dict[str, int] = {}
+        self._meta_key = None
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.root / META_FILE
+
+    def _file_lock(self) -> FileLock:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(self.root / '.lock'))
+
+    def _load(self):
+        """Map the files again if they changed since they were last mapped."""
+        try:
+            st = os.stat(self._meta_path)
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            key = None
+        if key == self._meta_key and (key is None or self._matrix is not None):
+            return
+
+        self._matrix, self._ids = None, None
+        self._capacity, self._count, self._rows = 0, 0, {}
+        self._meta_key = key
+        if key is None:
+            return
+
+        with open(self._meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('dimensions') != self.dimensions or not meta.get('capacity'):
+            return
+
+        self._map(meta['capacity'])
+        self._count = meta['count']
+        self._rows = {item_id.decode(): row for row, item_id in enumerate(self._ids['id'][:self._count])}
+
+    def _map(self, capacity: int):
+        self._matrix = np.memmap(self.root / VECTOR_FILE, dtype=np.float32, mode='r+',
+                                 shape=(capacity, self.dimensions))
+        self._ids = np.memmap(self.root / IDS_FILE, dtype=ID_DTYPE, mode='r+', shape=(capacity,))
+        self._capacity = capacity
+
+    def _grow(self, capacity: int):
+        """
+        Extend the mapped files to hold capacity rows, or create new ones.
+
+        Files are only ever extended in place; new files replace the old
+        ones by rename, so other processes' mappings stay valid.
+        """
+        for name, row_size in ((VECTOR_FILE, self.dimensions * 4), (IDS_FILE, ID_DTYPE.itemsize)):
+            path = self.root / name
+            if self._matrix is not None:
+                with open(path, 'r+b') as f:
+                    f.truncate(capacity * row_size)
+            else:
+                tmp_path = path.with_name(f"{name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.truncate(capacity * row_size)
+                os.replace(tmp_path, path)
+        self._map(capacity)
+
+    def _write_meta(self):
+        tmp_path = self._meta_path.with_name(f"{META_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dimensions': self.dimensions, 'capacity': self._capacity, 'count': self._count}, f)
+        os.replace(tmp_path, self._meta_path)
+        st = os.stat(self._meta_path)
+        self._meta_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def upsert(self, item_id: str, item_type: str, vector: np.ndarray):
+        """
+        Set an item's vector, adding a row for new items.
+
+        Args:
+            item_id: Item ID
+            item_type: 'prompt', 'template' or 'chat'
+            vector: Vector from item_vector
+        """
+        with self._lock, self._file_lock():
+            self._load()
+            row = self._rows.get(item_id)
+            if row is None:
+                row = self._count
+                if row >= self._capacity:
+                    self._grow(max(INITIAL_CAPACITY, self._capacity * 2))
+                self._ids[row] = (item_id.encode(), item_type.encode())
+                self._rows[item_id] = row
+                self._count += 1
+            self._matrix[row] = vector
+            self._write_meta()
+
+    def remove(self, item_id: str):
+        """Remove an item's vector; the last row moves into its place."""
+        with self._lock, self._file_lock():
+            self._load()
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                return
+            last = self._count - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._rows[self._ids[row]['id'].decode()] = row
+            self._count = last
+            self._write_meta()
+
+    def replace_all(self) -> 'VectorReplacement':
+        """
+        Start replacing every vector, e.g. during an index rebuild.
+
+        Returns:
+            VectorReplacement to write the new vectors through
+        """
+        return VectorReplacement(self)
+
+    def get(self, item_id: str) -> Optional[np.ndarray]:
+        """Get a copy of an item's vector, or None if it has none."""
+        with self._lock:
+            self._load()
+            row = self._rows.get(item_id)
+            return None if row is None else np.array(self._matrix[row])
+
+    def search(self, vector: np.ndarray, limit: int = 10, type_filter: Optional[str] = None,
+               exclude: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """
+        Find the rows most similar to a vector.
+
+        Args:
+            vector: Normalized query vector
+            limit: Max results
+            type_filter: Only return items of this type
+            exclude: Item ID to leave out (the item a search started from)
+
+        Returns:
+            List of (item_id, item_type, cosine similarity), best first;
+            items sharing no words with the query are left out
+        """
+        with self._lock:
+            self._load()
+            count = self._count
+            if not count or limit <= 0:
+                return []
+
+            scores = np.asarray(self._matrix[:count] @ vector)
+            ids = np.array(self._ids[:count])
+            if type_filter:
+                scores[ids['type'] != type_filter.encode()] = -np.inf
+            if exclude in self._rows:
+                scores[self._rows[exclude]] = -np.inf
+
+        k = min(limit, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            (ids[row]['id'].decode(), ids[row]['type'].decode(), float(scores[row]))
+            for row in top if scores[row] > 0
+        ]
+
+    def stats(self) -> Dict:
+        """Get index size statistics."""
+        with self._lock:
+            self._load()
+            return {
+                'items': self._count,
+                'dimensions': self.dimensions,
+                'capacity': self._capacity,
+                'size_bytes': self._capacity * (self.dimensions * 4 + ID_DTYPE.itemsize),
+            }
+
+
+_indexes: Dict[Tuple[str, int], VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+class VectorReplacement:
+    """
+    New vector files, filled while an index rebuild runs.
+
+    Rows are written to build files as they arrive; searches keep using the
+    current files until finish() renames the new ones into place, and
+    abort() deletes them instead.
+    """
+
+    def __init__(self, vector_index: VectorIndex):
+        """
+        Args:
+            vector_index: VectorIndex whose files are replaced
+        """
+        self.vector_index = vector_index
+        vector_index.root.mkdir(parents=True, exist_ok=True)
+        suffix = f"{os.getpid()}.{threading.get_ident()}.build"
+        self._paths = {name: vector_index.root / f"{name}.{suffix}" for name in (VECTOR_FILE, IDS_FILE)}
+        self._capacity = INITIAL_CAPACITY
+        self._count = 0
+        self._rows: Dict[str, int] = {}
+        try:
+            self._matrix, self._ids = self._map(self._capacity)
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, entries: Iterable[Tuple[str, str, np.ndarray]]):
+        """
+        Add vectors to the new files.
+
+        Args:
+            entries: (item_id, item_type, vector) per item; a repeated ID
+                replaces the item's earlier vector
+        """
+        for item_id, item_type, vector in entries:
+            row = self._rows.get(item_id)
+            if row is None:
+                if self._count == self._capacity:
+                    self._capacity *= 2
+                    self._matrix, self._ids = self._map(self._capacity)
+                row = self._rows[item_id] = self._count
+                self._ids[row] = (item_id.encode(), item_type.encode())
+                self._count += 1
+            self._matrix[row] = vector
+
+    def finish(self):
+        """Rename the new files into place; searches use them from now on."""
+        self._matrix.flush()
+        self._ids.flush()
+        self._matrix, self._ids = None, None
+
+        index = self.vector_index
+        with index._lock, index._file_lock():
+            for name, path in self._paths.items():
+                os.replace(path, index.root / name)
+            index._map(self._capacity)
+            index._count = self._count
+            index._rows = self._rows
+            index._write_meta()
+
+    def abort(self):
+        """Delete the new files, keeping the current vectors."""
+        self._matrix, self._ids = None, None
+        for path in self._paths.values():
+            path.unlink(missing_ok=True)
+
+    def _map(self, capacity: int) -> Tuple[np.memmap, np.memmap]:
+        """Size the new files to capacity rows and map them."""
+        dimensions = self.vector_index.dimensions
+        for name, row_size in ((VECTOR_FILE, dimensions * 4), (IDS_FILE, ID_DTYPE.itemsize)):
+            with open(self._paths[name], 'r+b' if self._paths[name].exists() else 'wb') as f:
+                f.truncate(capacity * row_size)
+        return (
+            np.memmap(self._paths[VECTOR_FILE], dtype=np.float32, mode='r+', shape=(capacity, dimensions)),
+            np.memmap(self._paths[IDS_FILE], dtype=ID_DTYPE, mode='r+', shape=(capacity,)),
+        )
+
+
+def get_vector_index(storage_root: Path) -> Optional[VectorIndex]:
+    """
+    Get the process-wide vector index of a storage root.
+
+    Returns:
+        VectorIndex, or None if settings.VECTOR_SEARCH_ENABLED is off
+    """
+    if not getattr(settings, 'VECTOR_SEARCH_ENABLED', False):
+        return None
+    key = (str(Path(storage_root) / '.vectors'), getattr(settings, 'VECTOR_DIMENSIONS', 256))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = VectorIndex(Path(key[0]), key[1])
+        return index
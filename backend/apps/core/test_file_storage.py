@@ -0,0 +1,189 @@
+import shutil
+import tempfile
+from unittest import mock
+
+import yaml
+from django.test import TestCase, override_settings
+
+from backend.apps.core.domain.itemmetadata import ItemMetadata
+from backend.apps.core.domain.version import TemplateVariable
+from backend.apps.core.services.file_storage_service import FileStorageService, metadata_cache, version_cache
+
+
+class FileStorageServiceTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        self.storage = FileStorageService(self.storage_root)
+        metadata_cache.clear()
+
+    def _create_prompt(self, title='Prompt', content='body'):
+        metadata = ItemMetadata(id='', title=title, type='prompt', labels=['a'], author='You')
+        item_id, _ = self.storage.create_item('prompt', metadata, content, None)
+        return item_id
+
+    def test_metadata_reads_are_cached_until_file_changes(self):
+        item_id = self._create_prompt()
+
+        with mock.patch('backend.apps.core.utils.metadata_codec.yaml.load') as yaml_load:
+            first = self.storage.load_metadata('prompt', item_id)
+            second = self.storage.load_metadata('prompt', item_id)
+            yaml_load.assert_not_called()
+        self.assertEqual(first.title, second.title)
+        self.assertEqual(metadata_cache.stats()['hits'], 2)
+
+        # An external edit is picked up on the next read
+        yaml_path = self.storage._get_item_directory('prompt', item_id) / 'prompt.yaml'
+        data = yaml.safe_load(yaml_path.read_text(encoding='utf-8'))
+        data['title'] = 'Edited outside'
+        yaml_path.write_text(yaml.safe_dump(data), encoding='utf-8')
+
+        self.assertEqual(self.storage.load_metadata('prompt', item_id).title, 'Edited outside')
+
+    def test_cached_metadata_is_not_shared_between_callers(self):
+        item_id = self._create_prompt()
+
+        metadata = self.storage.load_metadata('prompt', item_id)
+        metadata.labels.append('mutated')
+
+        self.assertEqual(self.storage.load_metadata('prompt', item_id).labels, ['a'])
+
+    def test_convert_metadata_between_formats(self):
+        item_id = self._create_prompt(title='Converted')
+        item_dir = self.storage._get_item_directory('prompt', item_id)
+
+        self.assertEqual(self.storage.convert_metadata('json'), 1)
+        self.assertEqual(sorted(p.name for p in item_dir.glob('prompt.*')), ['prompt.json'])
+        self.assertEqual(self.storage.load_metadata('prompt', item_id).title, 'Converted')
+
+        json_storage = FileStorageService(self.storage_root, metadata_format='json')
+        json_storage.update_item('prompt', item_id, 'Renamed', ['a'], '', 'You')
+        self.assertEqual(self.storage.load_metadata('prompt', item_id).title, 'Renamed')
+        self.assertEqual(self.storage.convert_metadata('json'), 0)
+
+    def test_interrupted_chat_rewrite_is_rolled_forward(self):
+        chat_id = self.storage.create_chat({'title': 'Chat', 'messages': [{'role': 'user', 'content': 'draft'}]})
+
+        # Crash after the rewrite was staged, before any file was swapped in
+        with mock.patch.object(FileStorageService, '_finish_chat_rewrite'):
+            self.storage.update_chat(chat_id, {'title': 'Chat', 'messages': [
+                {'role': 'user', 'content': 'final'}, {'role': 'assistant', 'content': 'ok'},
+            ]})
+        self.assertEqual(self.storage._read_chat_header(chat_id)['message_count'], 1)
+
+        messages, count = self.storage.read_chat_messages(chat_id)
+        self.assertEqual(([m['content'] for m in messages], count), (['final', 'ok'], 2))
+        self.assertFalse(self.storage._get_chat_rewrite_path(chat_id).exists())
+
+    @override_settings(VECTOR_SEARCH_ENABLED=True)
+    def test_similarity_vectors_follow_storage_writes(self):
+        kept = self._create_prompt('Translate to French', 'Translate the following text into French')
+        other = self._create_prompt('Unit test writer', 'Write pytest unit tests for this function')
+        vectors = self.storage.vector_index
+
+        query = vectors.get(kept)
+        self.assertEqual([match[0] for match in vectors.search(query, limit=1)], [kept])
+
+        # A new HEAD version changes the vector
+        metadata = self.storage.load_metadata('prompt', other)
+        self.storage.create_version(metadata, '2', 'Translate this email into French', None)
+        self.assertEqual([match[0] for match in vectors.search(query, limit=2, exclude=kept)], [other])
+
+        self.storage.delete_item('prompt', other)
+        self.assertIsNone(vectors.get(other))
+        self.assertEqual(vectors.get(kept).tolist(), query.tolist())
+
+
+class VersionBlobStoreTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        self.storage = FileStorageService(self.storage_root, use_blob_store=True)
+        self.plain_storage = FileStorageService(self.storage_root, use_blob_store=False)
+        metadata_cache.clear()
+
+    def _create(self, storage, item_type='prompt', content='body', variables=None):
+        metadata = ItemMetadata(id='', title='Item', type=item_type, labels=[], author='You')
+        return storage.create_item(item_type, metadata, content, variables)
+
+    def test_identical_bodies_are_stored_once(self):
+        first_id, _ = self._create(self.storage, content='shared body')
+        second_id, _ = self._create(self.storage, content='shared body')
+        metadata = self.storage.load_metadata('prompt', first_id)
+        self.storage.create_version(metadata, 'v2', 'shared body', None)
+
+        self.assertEqual(self.storage.blob_store.stats()['blobs'], 1)
+        self.assertEqual(self.storage.read_version('prompt', second_id).content, 'shared body')
+
+    def test_read_version_matches_full_text_storage(self):
+        variables = [TemplateVariable(name='topic', type=str, description='Topic', default='x')]
+        packed_id, packed_version = self._create(self.storage, 'template', 'Hi {{topic}}', variables)
+        plain_id, plain_version = self._create(self.plain_storage, 'template', 'Hi {{topic}}', variables)
+
+        packed = self.storage.read_version('template', packed_id, packed_version)
+        plain = self.plain_storage.read_version('template', plain_id, plain_version)
+
+        self.assertEqual(packed.content, plain.content)
+        self.assertEqual(packed.variables, plain.variables)
+        self.assertEqual(packed._extra_data.keys(), plain._extra_data.keys())
+
+    def test_pack_unpack_and_prune(self):
+        item_id, version_id = self._create(self.plain_storage, content='legacy body')
+
+        self.assertEqual(self.storage.pack_versions(), 1)
+        self.assertEqual(self.storage.pack_versions(), 0)
+        self.assertEqual(self.storage.read_version('prompt', item_id, version_id).content, 'legacy body')
+
+        self.assertEqual(self.storage.pack_versions(unpack=True), 1)
+        version_path = next(self.storage._get_versions_directory('prompt', item_id).glob('*.md'))
+        self.assertTrue(version_path.read_text(encoding='utf-8').endswith('legacy body'))
+
+        self.assertEqual(self.storage.prune_blobs(grace_seconds=0)['removed'], 1)
+        self.assertEqual(self.storage.blob_store.stats()['blobs'], 0)
+
+
+class VersionDeltaChainTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        self.storage = FileStorageService(self.storage_root, delta_chain_length=2)
+        version_cache.clear()
+
+    def _body(self, revision):
+        return ''.join(f'line {i}\n' for i in range(50)) + f'revision {revision}\n'
+
+    def _create_history(self, revisions):
+        metadata = ItemMetadata(id='', title='Iterated', type='prompt', labels=[], author='You')
+        item_id, first_version = self.storage.create_item('prompt', metadata, self._body(0), None)
+        version_ids = [first_version]
+        for revision in range(1, revisions):
+            metadata = self.storage.load_metadata('prompt', item_id)
+            version_ids.append(self.storage.create_version(metadata, f'v{revision}', self._body(revision), None))
+        return item_id, version_ids
+
+    def _front_matter(self, item_id, version_id):
+        path = self.storage._get_versions_directory('prompt', item_id) / \
+            self.storage._get_version_filename('prompt', item_id, version_id)
+        return self.storage._read_version_file('prompt', path)._extra_data
+
+    def test_versions_are_stored_as_capped_delta_chains(self):
+        item_id, version_ids = self._create_history(5)
+
+        depths = [self._front_matter(item_id, v).get('delta_depth', 0) for v in version_ids]
+        self.assertEqual(depths, [0, 1, 2, 0, 1])
+
+        version_cache.clear()
+        for revision, version_id in enumerate(version_ids):
+            version = self.storage.read_version('prompt', item_id, version_id)
+            self.assertEqual(version.content, self._body(revision))
+            self.assertNotIn('delta_base', version._extra_data)
+        self.assertEqual(self.storage.read_version('prompt', item_id).content, self._body(4))
+
+    def test_deleting_a_delta_base_rematerializes_dependents(self):
+        item_id, version_ids = self._create_history(3)
+
+        self.storage.delete_version('prompt', item_id, version_ids[1])
+
+        self.assertNotIn('delta_base', self._front_matter(item_id, version_ids[2]))
+        version_cache.clear()
+        self.assertEqual(self.storage.read_version('prompt', item_id, version_ids[2]).content, self._body(2))
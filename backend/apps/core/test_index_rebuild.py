@@ -0,0 +1,405 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock, skipUnless
+
+import yaml
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from backend.apps.core.domain.chatmetadata import ChatMetadata
+from backend.apps.core.domain.itemmetadata import ItemMetadata
+from backend.apps.core.models import (
+    IndexedItem, IndexManifest, IndexStat, ItemBucket, ItemContent, ItemSignature, ItemTrigram,
+)
+from backend.apps.core.services.db_index_service import DBIndexService
+from backend.apps.core.services.file_storage_service import FileStorageService
+from backend.apps.core.services.index_queue import IndexWriteQueue, PendingWrite
+from backend.apps.core.services.index_watcher import IndexWatcher, Inotify
+from backend.apps.core.utils import minhash
+
+
+class IndexRebuildTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        self.index = DBIndexService()
+        self.storage = FileStorageService(self.storage_root, index_service=self.index)
+
+    def _populate(self):
+        for i in range(3):
+            metadata = ItemMetadata(id='', title=f'Prompt {i}', type='prompt', labels=['x'], author='You')
+            self.storage.create_item('prompt', metadata, f'body {i}', None)
+        metadata = ItemMetadata(id='', title='Template', type='template', labels=[], author='You')
+        self.storage.create_item('template', metadata, 'Hi {{name}}', [])
+        self.storage.create_chat({'title': 'Chat', 'provider': 'ChatGPT', 'conversation_id': 'c1',
+                                  'messages': [{'role': 'user', 'content': 'hi'}]})
+
+    @override_settings(DUPLICATE_DETECTION_ENABLED=True)
+    def test_rebuild_bulk_inserts_all_items(self):
+        self._populate()
+        self.index.remove_many(list(IndexedItem.objects.values_list('id', flat=True)))
+
+        stats = self.index.rebuild(self.storage, workers=1)
+
+        self.assertEqual((stats['prompts_added'], stats['templates_added'], stats['chats_added']), (3, 1, 1))
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(stats['files_scanned'], 5)
+        self.assertEqual(IndexedItem.objects.count(), 5)
+        chat = IndexedItem.objects.get(item_type='chat')
+        self.assertEqual((chat.provider_key, chat.turn_count), ('chatgpt', 1))
+        self.assertEqual(IndexedItem.objects.filter(item_type='prompt').first().labels, ['x'])
+        # HEAD content and chat messages are indexed for search
+        self.assertEqual(ItemContent.objects.count(), 5)
+        self.assertEqual(self.index.search(query='name')['items'][0]['snippet'], 'Hi {{<mark>name</mark>}}')
+        self.assertEqual(ItemTrigram.objects.values('item').distinct().count(), 5)
+        self.assertEqual(ItemSignature.objects.count(), 5)
+        self.assertEqual(ItemBucket.objects.count(), 5 * minhash.LSH_BANDS)
+
+    @override_settings(DUPLICATE_DETECTION_ENABLED=True)
+    def test_appended_messages_merge_into_the_chat_signature(self):
+        chat_id = self.storage.create_chat({'title': 'Chat', 'provider': 'ChatGPT', 'conversation_id': 'c1',
+                                            'messages': [{'role': 'user', 'content': 'plan a trip to Lisbon'}]})
+        self.storage.append_chat_messages(chat_id, [{'role': 'assistant', 'content': 'three days in Lisbon'}])
+
+        merged = minhash.from_bytes(ItemSignature.objects.get(item_id=chat_id).signature)
+        expected = minhash.signature(['plan a trip to Lisbon', 'three days in Lisbon'])
+        self.assertEqual(merged.tolist(), expected.tolist())
+        self.assertEqual(ItemBucket.objects.filter(item_id=chat_id).count(), minhash.LSH_BANDS)
+
+        self.storage.delete_chat(chat_id)
+        self.assertFalse(ItemSignature.objects.exists())
+        self.assertFalse(ItemBucket.objects.exists())
+
+    def test_projected_rows_match_record_dicts(self):
+        self._populate()
+        records = {record.id: record for record in self.index.get_many(
+            list(IndexedItem.objects.values_list('id', flat=True)))}
+
+        for item in self.index.search(limit=10)['items']:
+            self.assertEqual(item, records[item['id']].to_response_dict())
+
+    def test_stats_are_maintained_by_index_writes(self):
+        self._populate()
+        prompt = IndexedItem.objects.filter(item_type='prompt').first()
+        self.storage.update_item('prompt', prompt.id, 'Renamed', ['x', 'y'], '', 'You')
+        self.storage.delete_item('prompt', IndexedItem.objects.filter(item_type='prompt').exclude(
+            id=prompt.id).first().id)
+
+        status = self.index.get_status()
+        self.assertEqual((status['prompts_count'], status['templates_count'], status['chats_count']), (2, 1, 1))
+        self.assertEqual(status['providers'], {'ChatGPT': 1})
+        self.assertEqual(status['top_labels'], [{'label': 'x', 'count': 2}, {'label': 'y', 'count': 1}])
+        self.assertGreater(status['storage_size_bytes'], 0)
+        self.assertEqual(status['last_updated'], max(IndexedItem.objects.values_list(
+            'updated_at', flat=True)).isoformat())
+
+        # The running totals match a recount, including after a rebuild
+        incremental = set(IndexStat.objects.values_list('dimension', 'key', 'value'))
+        self.index._rebuild_stats()
+        self.assertEqual(set(IndexStat.objects.values_list('dimension', 'key', 'value')), incremental)
+        self.index.rebuild(self.storage, workers=1)
+        self.assertEqual(set(IndexStat.objects.values_list('dimension', 'key', 'value')), incremental)
+
+    @override_settings(VECTOR_SEARCH_ENABLED=True)
+    def test_rebuild_replaces_the_index_chunk_by_chunk(self):
+        self._populate()
+        prompt = IndexedItem.objects.filter(item_type='prompt').first()
+        stale = self.index.get_by_id(prompt.id)
+        stale.id, stale.slug = '01STALEITEM000000000000000', 'stale'
+        self.index.add_or_update(stale)
+        generation = self.index.generation()
+
+        stats = self.index.rebuild(self.storage, workers=1, chunk_size=1)
+
+        self.assertEqual((stats['prompts_added'], stats['errors']), (3, []))
+        self.assertFalse(IndexedItem.objects.filter(id=stale.id).exists())
+        self.assertEqual(set(IndexedItem.objects.values_list('id', flat=True)),
+                         set(IndexManifest.objects.values_list('item_id', flat=True)))
+        # Every batch was committed on its own
+        self.assertGreater(self.index.generation(), generation + stats['files_scanned'])
+        self.assertEqual(self.storage.vector_index.stats()['items'], 5)
+
+    @override_settings(VECTOR_SEARCH_ENABLED=True)
+    def test_failed_rebuild_keeps_the_index_and_vectors(self):
+        self._populate()
+        stale = self.index.get_by_id(IndexedItem.objects.filter(item_type='prompt').first().id)
+        stale.id, stale.slug = '01STALEITEM000000000000000', 'stale'
+        self.index.add_or_update(stale)
+        vector_root = self.storage.vector_index.root
+
+        with mock.patch('backend.apps.core.services.vector_index.VectorReplacement.write',
+                        side_effect=[None, OSError('disk full')]):
+            with self.assertRaises(OSError):
+                self.index.rebuild(self.storage, workers=1, chunk_size=1)
+
+        # Nothing was swept, and the vector files were left alone
+        self.assertEqual(IndexedItem.objects.count(), 6)
+        self.assertEqual(IndexStat.objects.get(dimension='type', key='prompt').value, 4)
+        self.assertEqual(self.storage.vector_index.stats()['items'], 5)
+        self.assertEqual(list(vector_root.glob('*.build')), [])
+
+    def test_rebuild_keeps_newest_chat_per_conversation(self):
+        older = self.storage.create_chat({'title': 'Old', 'provider': 'ChatGPT', 'conversation_id': 'c1',
+                                          'updated_at': '2024-01-01T00:00:00+00:00'})
+        # A second header for the same conversation, e.g. copied in from another machine
+        header_path = self.storage._get_chat_header_path(older)
+        header = json.loads(header_path.read_text(encoding='utf-8'))
+        header.update(id='01NEWERCHAT000000000000000', title='New', updated_at='2025-01-01T00:00:00+00:00')
+        self.storage._get_chat_header_path(header['id']).write_text(json.dumps(header), encoding='utf-8')
+
+        stats = self.index.rebuild(self.storage, workers=1)
+
+        self.assertEqual(stats['chats_added'], 2)
+        self.assertEqual(self.index.find_by_conversation('chatgpt', 'c1').title, 'New')
+
+    def test_rebuild_parses_in_worker_processes(self):
+        self._populate()
+
+        stats = self.index.rebuild(self.storage, workers=2, chunk_size=1)
+
+        self.assertEqual(stats['workers'], 2)
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(IndexedItem.objects.count(), 5)
+
+
+class IndexReconcileTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        self.index = DBIndexService()
+        self.storage = FileStorageService(self.storage_root, index_service=self.index)
+
+    def _create_prompt(self, title):
+        metadata = ItemMetadata(id='', title=title, type='prompt', labels=[], author='You')
+        item_id, _ = self.storage.create_item('prompt', metadata, 'body', None)
+        return item_id
+
+    def test_reconcile_only_touches_changed_files(self):
+        kept = self._create_prompt('Kept')
+        edited = self._create_prompt('Edited')
+        deleted = self._create_prompt('Deleted')
+        self.index.rebuild(self.storage, workers=1)
+        self.assertEqual(set(IndexManifest.objects.values_list('item_id', flat=True)), {kept, edited, deleted})
+
+        stats = self.index.reconcile(self.storage)
+        self.assertEqual((stats['unchanged'], stats['updated'], stats['removed']), (3, 0, 0))
+
+        # Edits made outside the service
+        yaml_path = self.storage._get_metadata_path('prompt', edited)
+        data = yaml.safe_load(yaml_path.read_text(encoding='utf-8'))
+        data['title'] = 'Edited outside'
+        yaml_path.write_text(yaml.safe_dump(data), encoding='utf-8')
+        shutil.rmtree(self.storage._get_item_directory('prompt', deleted))
+        touched_path = self.storage._get_metadata_path('prompt', kept)
+        os.utime(touched_path, ns=(0, 0))
+
+        stats = self.index.reconcile(self.storage)
+
+        self.assertEqual(
+            (stats['unchanged'], stats['touched'], stats['updated'], stats['removed']),
+            (0, 1, 1, 1),
+        )
+        self.assertEqual(self.index.get_by_id(edited).title, 'Edited outside')
+        self.assertIsNone(self.index.get_by_id(deleted))
+        self.assertEqual(set(IndexManifest.objects.values_list('item_id', flat=True)), {kept, edited})
+        self.assertEqual(self.index.reconcile(self.storage)['unchanged'], 2)
+
+    def test_service_writes_keep_the_manifest_current(self):
+        item_id = self._create_prompt('Saved')
+        chat_id = self.storage.create_chat({'title': 'Chat', 'provider': 'ChatGPT', 'conversation_id': 'c1',
+                                            'messages': [{'role': 'user', 'content': 'hi'}]})
+        self.storage.update_item('prompt', item_id, 'Renamed', [], '', 'You')
+        self.storage.append_chat_messages(chat_id, [{'role': 'assistant', 'content': 'hello'}])
+        self.assertEqual(set(IndexManifest.objects.values_list('item_id', flat=True)), {item_id, chat_id})
+
+        # Nothing the service wrote is parsed again
+        stats = self.index.reconcile(self.storage)
+        self.assertEqual((stats['unchanged'], stats['touched'], stats['updated'], stats['added']), (2, 0, 0, 0))
+
+        self.storage.delete_item('prompt', item_id)
+        self.assertEqual(set(IndexManifest.objects.values_list('item_id', flat=True)), {chat_id})
+
+    def test_reconcile_sees_version_and_message_log_edits(self):
+        item_id = self._create_prompt('Versioned')
+        chat_id = self.storage.create_chat({'title': 'Chat', 'provider': 'ChatGPT', 'conversation_id': 'c1',
+                                            'messages': [{'role': 'user', 'content': 'hi'}]})
+        self.assertEqual(IndexManifest.objects.filter(item_id=item_id).count(), 4)
+        self.assertEqual(IndexManifest.objects.filter(item_id=chat_id).count(), 3)
+
+        # The HEAD version and the message log edited outside the service
+        item_dir = self.storage._get_item_directory('prompt', item_id)
+        version_path = item_dir / (item_dir / 'HEAD').read_text()
+        version_path.write_text(version_path.read_text(encoding='utf-8').replace('body', 'edited outside'),
+                                encoding='utf-8')
+        with open(self.storage._get_chat_messages_path(chat_id), 'a', encoding='utf-8') as f:
+            f.write('\n')
+
+        stats = self.index.reconcile(self.storage)
+
+        self.assertEqual((stats['unchanged'], stats['updated']), (0, 2))
+        self.assertEqual(ItemContent.objects.get(item_id=item_id).body, 'edited outside')
+        self.assertEqual(self.index.reconcile(self.storage)['unchanged'], 2)
+
+    def test_reconcile_indexes_items_missing_from_index(self):
+        item_id = self._create_prompt('Unindexed')
+        self.index.remove(item_id)
+
+        stats = self.index.reconcile(self.storage, dry_run=True)
+        self.assertEqual(stats['added'], 1)
+        self.assertIsNone(self.index.get_by_id(item_id))
+
+        self.index.reconcile(self.storage)
+        self.assertEqual(self.index.get_by_id(item_id).title, 'Unindexed')
+
+
+class IndexWatcherTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        self.index = DBIndexService()
+        self.storage = FileStorageService(self.storage_root, index_service=self.index)
+        self.watcher = IndexWatcher(self.storage, self.index, debounce=0)
+
+    def _create_prompt(self, title):
+        metadata = ItemMetadata(id='', title=title, type='prompt', labels=[], author='You')
+        item_id, _ = self.storage.create_item('prompt', metadata, 'body', None)
+        return item_id
+
+    def test_events_map_to_items(self):
+        prompts_dir = os.path.join(self.storage_root, 'prompts')
+        chats_dir = os.path.join(self.storage_root, 'chats')
+        item_dir = os.path.join(prompts_dir, 'prompt-abc')
+
+        self.assertEqual(self.watcher._item_for_event(item_dir, 'prompt.json'), ('prompt', item_dir))
+        self.assertEqual(self.watcher._item_for_event(prompts_dir, 'prompt-abc'), ('prompt', item_dir))
+        self.assertEqual(self.watcher._item_for_event(chats_dir, 'chat-x.messages.jsonl'),
+                         ('chat', os.path.join(chats_dir, 'chat-x.json')))
+        self.assertIsNone(self.watcher._item_for_event(item_dir, 'prompt.yaml.123.tmp'))
+        # HEAD moves and version files belong to the item too
+        self.assertEqual(self.watcher._item_for_event(item_dir, 'HEAD'), ('prompt', item_dir))
+        self.assertEqual(self.watcher._item_for_event(item_dir, 'versions'), ('prompt', item_dir))
+        self.assertEqual(self.watcher._item_for_event(os.path.join(item_dir, 'versions'), 'pv-abc_1.md'),
+                         ('prompt', item_dir))
+
+    def test_applying_changed_items_updates_and_removes_them(self):
+        edited = self._create_prompt('Before')
+        deleted = self._create_prompt('Deleted')
+
+        yaml_path = self.storage._get_metadata_path('prompt', edited)
+        data = yaml.safe_load(yaml_path.read_text(encoding='utf-8'))
+        data['title'] = 'After'
+        yaml_path.write_text(yaml.safe_dump(data), encoding='utf-8')
+        deleted_dir = str(self.storage._get_item_directory('prompt', deleted))
+        shutil.rmtree(deleted_dir)
+
+        self.watcher._apply([
+            ('prompt', str(self.storage._get_item_directory('prompt', edited))),
+            ('prompt', deleted_dir),
+        ])
+
+        self.assertEqual(self.index.get_by_id(edited).title, 'After')
+        self.assertIsNone(self.index.get_by_id(deleted))
+
+    @skipUnless(Inotify.available(), 'inotify not available')
+    def test_inotify_reports_metadata_and_version_writes(self):
+        item_id = self._create_prompt('Watched')
+        item_dir = str(self.storage._get_item_directory('prompt', item_id))
+        versions_dir = os.path.join(item_dir, 'versions')
+        inotify = Inotify()
+        self.addCleanup(inotify.close)
+        self.watcher._watch_tree(inotify)
+
+        self.storage.update_item('prompt', item_id, 'Renamed', [], '', 'You')
+        self.storage.create_version(self.storage.load_metadata('prompt', item_id), 'v2', 'New body', None)
+
+        items = set()
+        directories = set()
+        deadline = time.monotonic() + 2
+        while versions_dir not in directories and time.monotonic() < deadline:
+            for directory, _, name in inotify.read_events(timeout=0.2):
+                item = self.watcher._item_for_event(directory, name)
+                if item:
+                    items.add(item)
+                    directories.add(directory)
+        self.assertEqual(items, {('prompt', item_dir)})
+        self.assertEqual(directories, {item_dir, versions_dir})
+
+
+@override_settings(INDEX_WRITE_BEHIND=True)
+class IndexWriteQueueTests(TestCase):
+    def setUp(self):
+        self.storage_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_root, ignore_errors=True)
+        self.index = DBIndexService()
+        self.storage = FileStorageService(self.storage_root, index_service=self.index)
+        self.queue = IndexWriteQueue(self.index, flush_interval=0, max_batch=10)
+        patcher = mock.patch('backend.apps.core.services.index_queue._queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_writes_are_coalesced_and_flushed_on_read(self):
+        chat_id = self.storage.create_chat({'title': 'Synced', 'provider': 'ChatGPT', 'conversation_id': 'c1',
+                                            'messages': [{'role': 'user', 'content': 'hi'}]})
+        self.storage.append_chat_messages(chat_id, [{'role': 'assistant', 'content': 'hello'}])
+        self.storage.append_chat_messages(chat_id, [{'role': 'user', 'content': 'bye'}])
+
+        self.assertEqual(self.queue.pending_count, 1)
+        self.assertFalse(IndexedItem.objects.exists())
+
+        # Reads see their writes
+        self.assertEqual(self.index.find_by_conversation('chatgpt', 'c1').turn_count, 2)
+        self.assertEqual(list(ItemContent.objects.order_by('seq').values_list('body', flat=True)),
+                         ['hi', 'hello', 'bye'])
+        self.assertEqual(self.queue.stats()['flushes'], 1)
+        self.assertEqual(set(IndexManifest.objects.values_list('item_id', flat=True)), {chat_id})
+
+        self.storage.delete_chat(chat_id)
+        self.assertIsNone(self.index.get_by_id(chat_id))
+        self.assertFalse(ItemContent.objects.exists())
+        self.assertFalse(IndexManifest.objects.exists())
+
+    def test_full_batch_flushes(self):
+        for i in range(10):
+            metadata = ItemMetadata(id='', title=f'Prompt {i}', type='prompt', labels=['x'], author='You')
+            self.storage.create_item('prompt', metadata, f'body {i}', None)
+
+        # The tenth item filled the batch (its content change came after)
+        self.assertEqual(self.queue.stats()['flushes'], 1)
+        self.assertEqual(IndexedItem.objects.count(), 10)
+        self.assertEqual(self.index.list_labels()['labels'], [{'label': 'x', 'count': 10}])
+
+    def test_conversation_creates_are_indexed_before_the_lock_is_released(self):
+        chat = ChatMetadata(id='', title='Synced', provider='ChatGPT', conversation_id='c1',
+                            messages=[{'role': 'user', 'content': 'hi'}])
+
+        chat_id, created = self.storage.upsert_chat_by_conversation(chat)
+
+        # Visible to a lookup that does not go through this process's queue
+        self.assertTrue(created)
+        self.assertEqual(IndexedItem.objects.get(conversation_id='c1').id, chat_id)
+        self.assertEqual(self.queue.pending_count, 0)
+        self.assertEqual(self.storage.upsert_chat_by_conversation(chat), (chat_id, False))
+
+    def test_failed_flush_does_not_fail_reads(self):
+        metadata = ItemMetadata(id='', title='Queued', type='prompt', labels=[], author='You')
+        self.storage.create_item('prompt', metadata, 'body', None)
+
+        with mock.patch.object(self.index, 'write_batch', side_effect=OperationalError('database is locked')), \
+                self.assertLogs('backend.apps.core.services.index_queue', 'ERROR'):
+            self.assertEqual(self.index.search()['items'], [])
+
+        self.assertEqual(self.queue.pending_count, 1)
+        self.assertEqual(self.index.search()['items'][0]['title'], 'Queued')
+
+    def test_content_changes_merge(self):
+        write = PendingWrite('a')
+        write.add_content('chat', ['m0', 'm1'], 0)
+        write.add_content('chat', ['m2'], 2)
+        write.add_content('chat', ['m3', 'm4'], 3)
+        self.assertEqual(write.content, [('chat', ['m0', 'm1', 'm2', 'm3', 'm4'], 0)])
+
+        write.add_content('chat', ['x1'], 1)
+        self.assertEqual(write.content, [('chat', ['m0', 'x1'], 0)])
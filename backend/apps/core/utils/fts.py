@@ -0,0 +1,35 @@
+"""
+Row keys of the item_search FTS5 table.
+
+item_search stores its own copy of each item's searchable fields and is
+written by DBIndexService, not by triggers: SQLite remakes indexed_items on
+every schema change, which drops triggers and renumbers its rowids. The FTS
+rowid is derived from the item ID instead, so an item's row can be replaced
+or deleted by rowid without a scan. Kept free of model imports so migrations
+can use it.
+"""
+import hashlib
+
+
+def item_search_rowid(item_id: str) -> int:
+    """
+    Get the item_search rowid of an item.
+
+    Args:
+        item_id: Item ID
+
+    Returns:
+        Signed 64-bit integer derived from the ID
+    """
+    digest = hashlib.blake2b(item_id.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def item_search_row(item_id: str, title: str, description: str, slug: str, labels_json: str) -> tuple:
+    """
+    Build the item_search values of an item: its rowid, then the table's columns.
+
+    Returns:
+        Tuple of (rowid, title, description, slug, labels_json, item_id)
+    """
+    return item_search_rowid(item_id), title or '', description or '', slug or '', labels_json or '[]', item_id
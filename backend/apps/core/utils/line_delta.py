@@ -0,0 +1,56 @@
+"""
+Line-based deltas between version bodies.
+
+A delta is a JSON-serializable list of ops applied in order: an
+``[start, end]`` pair copies base lines ``start:end``, a string is inserted
+verbatim.
+"""
+import difflib
+from typing import List, Union
+
+DeltaOp = Union[List[int], str]
+
+
+def make_delta(base: str, target: str) -> List[DeltaOp]:
+    """
+    Compute a delta turning base into target.
+
+    Args:
+        base: Base text
+        target: Target text
+
+    Returns:
+        List of delta ops
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+
+    ops: List[DeltaOp] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(target_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: List[DeltaOp]) -> str:
+    """
+    Rebuild a text from its base and a delta.
+
+    Args:
+        base: Base text
+        ops: Delta ops from make_delta
+
+    Returns:
+        Target text
+    """
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return ''.join(parts)
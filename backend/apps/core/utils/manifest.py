@@ -0,0 +1,81 @@
+"""
+File fingerprints for the index manifest.
+
+Kept free of model imports so index rebuild workers can use them before
+Django is set up.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+
+def stat_key(file_path: Path) -> Tuple[int, int]:
+    """
+    Get the cheap part of a fingerprint: (mtime_ns, size).
+
+    A directory's size is its number of entries, so adding or removing a
+    file changes it on any filesystem.
+
+    Args:
+        file_path: File or directory
+
+    Returns:
+        Tuple of (mtime_ns, size)
+    """
+    st = os.stat(file_path)
+    if os.path.isdir(file_path):
+        return st.st_mtime_ns, len(os.listdir(file_path))
+    return st.st_mtime_ns, st.st_size
+
+
+def fingerprint(file_path: Path, hashed: bool = True) -> Tuple[int, int, str]:
+    """
+    Get a file's (mtime_ns, size, sha256).
+
+    A directory is hashed by its sorted entry names.
+
+    Args:
+        file_path: File or directory to fingerprint
+        hashed: Whether to hash the content; without it the hash is empty
+            and only (mtime_ns, size) can tell the file is unchanged
+
+    Returns:
+        Tuple of (mtime_ns, size, content hash)
+    """
+    mtime_ns, size = stat_key(file_path)
+    if not hashed:
+        return mtime_ns, size, ''
+    if os.path.isdir(file_path):
+        content_hash = hashlib.sha256('\n'.join(sorted(os.listdir(file_path))).encode('utf-8')).hexdigest()
+    else:
+        with open(file_path, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+    return mtime_ns, size, content_hash
+
+
+def manifest_entry(storage_root: Path, item_type: str, item_id: str, file_path: Path,
+                   hashed: bool = True) -> Dict:
+    """
+    Build IndexManifest field values for an indexed file.
+
+    Args:
+        storage_root: Storage root the path is stored relative to
+        item_type: 'prompt', 'template' or 'chat'
+        item_id: Item ID
+        file_path: One of the files the item is indexed from (see
+            FileStorageService.index_files)
+        hashed: Whether to hash the content (see fingerprint)
+
+    Returns:
+        Dict of IndexManifest field values
+    """
+    mtime_ns, size, content_hash = fingerprint(file_path, hashed)
+    return {
+        'path': Path(file_path).relative_to(storage_root).as_posix(),
+        'item_id': item_id,
+        'item_type': item_type,
+        'mtime_ns': mtime_ns,
+        'size': size,
+        'content_hash': content_hash,
+    }
@@ -0,0 +1,81 @@
+"""
+Codecs for item metadata files (<type>.yaml / <type>.json).
+
+YAML stays the human-friendly format; JSON is much cheaper to parse and
+write and is meant for hot storage.
+"""
+import json
+from typing import Dict
+
+import yaml
+
+# Use libyaml bindings when PyYAML was built with them
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+class MetadataCodec:
+    """Encodes and decodes metadata dicts."""
+    name = ''
+    extension = ''
+
+    def dumps(self, data: Dict) -> bytes:
+        raise NotImplementedError("Subclasses must implement dumps")
+
+    def loads(self, raw: bytes) -> Dict:
+        raise NotImplementedError("Subclasses must implement loads")
+
+
+class YamlCodec(MetadataCodec):
+    """Block-style YAML, readable and diffable."""
+    name = 'yaml'
+    extension = 'yaml'
+
+    def dumps(self, data: Dict) -> bytes:
+        text = yaml.dump(data, Dumper=_YamlDumper, allow_unicode=True, default_flow_style=False)
+        return text.encode('utf-8')
+
+    def loads(self, raw: bytes) -> Dict:
+        return yaml.load(raw, Loader=_YamlLoader) or {}
+
+
+class JsonCodec(MetadataCodec):
+    """Compact JSON."""
+    name = 'json'
+    extension = 'json'
+
+    def dumps(self, data: Dict) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, raw: bytes) -> Dict:
+        return json.loads(raw) or {}
+
+
+CODECS: Dict[str, MetadataCodec] = {
+    codec.name: codec for codec in (YamlCodec(), JsonCodec())
+}
+
+
+def get_codec(name: str) -> MetadataCodec:
+    """
+    Get a codec by name.
+
+    Args:
+        name: 'yaml' or 'json'
+
+    Returns:
+        MetadataCodec instance
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown metadata format: {name}") from None
+
+
+def codec_for_path(path) -> MetadataCodec:
+    """Get the codec matching a metadata file's extension."""
+    extension = str(path).rsplit('.', 1)[-1]
+    for codec in CODECS.values():
+        if codec.extension == extension:
+            return codec
+    raise ValueError(f"No metadata codec for {path}")
@@ -0,0 +1,145 @@
+"""
+MinHash signatures and LSH band keys for near-duplicate detection.
+
+A text is reduced to its set of word 3-shingles; the signature keeps, for
+each of SIGNATURE_SIZE hash functions, the smallest hash over the set, so
+the share of equal positions in two signatures estimates the Jaccard
+similarity of the sets. Signatures are split into LSH_BANDS bands whose
+hashes are indexed: two items sharing any band key are candidate
+duplicates, which finds pairs above roughly 0.5 similarity without
+comparing every pair.
+
+The minimum is taken per hash function, so the signature of a union is the
+element-wise minimum of the signatures (used when chat messages are
+appended).
+
+NumPy is imported on first use, so importing this module (and the index
+service) does not load it while duplicate detection is off.
+"""
+import re
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SIGNATURE_SIZE = 64
+LSH_BANDS = 16
+ROWS_PER_BAND = SIGNATURE_SIZE // LSH_BANDS
+SHINGLE_SIZE = 3
+
+# Shingles hashed per block, bounding memory for long texts
+_BLOCK = 4096
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+@lru_cache(maxsize=None)
+def _hash_functions() -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Get the multiply-shift hash functions h(x) = ((a * x + b) mod 2^64) >> 32.
+
+    They are fixed so signatures stay comparable across processes and releases.
+
+    Returns:
+        Tuple of (a, b) uint64 arrays of SIGNATURE_SIZE values
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(0x5EED)
+    a = rng.integers(1, 2 ** 63, size=SIGNATURE_SIZE, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=SIGNATURE_SIZE, dtype=np.uint64)
+    return a, b
+
+
+def shingles(texts: Iterable[str]) -> Set[str]:
+    """
+    Get the word shingles of some texts.
+
+    Shingles do not span texts; a text shorter than a shingle is one shingle.
+
+    Args:
+        texts: Texts, e.g. a version body or chat messages
+
+    Returns:
+        Set of shingles
+    """
+    result = set()
+    for text in texts:
+        words = _WORD_RE.findall((text or '').lower())
+        if 0 < len(words) < SHINGLE_SIZE:
+            result.add(' '.join(words))
+        for i in range(len(words) - SHINGLE_SIZE + 1):
+            result.add(' '.join(words[i:i + SHINGLE_SIZE]))
+    return result
+
+
+def signature(texts: Iterable[str]) -> Optional['np.ndarray']:
+    """
+    Compute the MinHash signature of some texts.
+
+    Returns:
+        uint32 array of SIGNATURE_SIZE values, or None for texts without words
+    """
+    items = shingles(texts)
+    if not items:
+        return None
+
+    import numpy as np
+
+    a, b = _hash_functions()
+    values = np.fromiter((zlib.crc32(item.encode('utf-8')) for item in items),
+                         dtype=np.uint64, count=len(items))
+    result = np.full(SIGNATURE_SIZE, np.iinfo(np.uint32).max, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for start in range(0, len(values), _BLOCK):
+            block = values[start:start + _BLOCK]
+            hashes = (a[:, None] * block[None, :] + b[:, None]) >> np.uint64(32)
+            np.minimum(result, hashes.min(axis=1), out=result)
+    return result.astype(np.uint32)
+
+
+def combine(first: 'np.ndarray', second: 'np.ndarray') -> 'np.ndarray':
+    """Get the signature of the union of two signed texts."""
+    import numpy as np
+
+    return np.minimum(first, second)
+
+
+def band_keys(sig: 'np.ndarray') -> List[int]:
+    """
+    Get the LSH key of each band of a signature.
+
+    Returns:
+        LSH_BANDS non-negative integers; equal keys in the same band mark
+        candidate duplicates
+    """
+    import numpy as np
+
+    sig = np.ascontiguousarray(sig, dtype=np.uint32)
+    return [
+        zlib.crc32(sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+        for band in range(LSH_BANDS)
+    ]
+
+
+def similarity(first: 'np.ndarray', second: 'np.ndarray') -> float:
+    """Estimate the Jaccard similarity of two signed texts."""
+    import numpy as np
+
+    return float(np.count_nonzero(first == second)) / SIGNATURE_SIZE
+
+
+def to_bytes(sig: 'np.ndarray') -> bytes:
+    """Serialize a signature for storage."""
+    import numpy as np
+
+    return np.ascontiguousarray(sig, dtype='<u4').tobytes()
+
+
+def from_bytes(data: bytes) -> 'np.ndarray':
+    """Read a signature written by to_bytes."""
+    import numpy as np
+
+    return np.frombuffer(bytes(data), dtype='<u4').astype(np.uint32)
@@ -3,38 +3,41 @@ Cursor-based pagination utilities for keyset pagination.
 """
 import base64
 import json
-from typing import Optional, Tuple
+from typing import Any, Optional, Tuple
 from datetime import datetime
 
 
-def encode_cursor(updated_at: str, item_id: str) -> str:
+def encode_cursor(value: Any, item_id: str, key: str = "updated_at") -> str:
     """
     Encode a cursor for keyset pagination.
 
     Args:
-        updated_at: ISO format timestamp
-        item_id: Item ID (ULID)
+        value: Sort key value of the last item (ISO timestamp, text or number)
+        item_id: Item ID (ULID), the tie-breaker
+        key: Name of the sort key
 
     Returns:
         Base64-encoded cursor string
     """
     cursor_data = {
-        "updated_at": updated_at,
+        key: value,
         "id": item_id
     }
     cursor_json = json.dumps(cursor_data)
     return base64.b64encode(cursor_json.encode()).decode()
 
 
-def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+def decode_cursor(cursor: Optional[str], key: str = "updated_at") -> Optional[Tuple[Any, str]]:
     """
     Decode a cursor for keyset pagination.
 
     Args:
         cursor: Base64-encoded cursor string
+        key: Name of the sort key the cursor must have been encoded for
 
     Returns:
-        Tuple of (updated_at, item_id) or None if invalid
+        Tuple of (sort key value, item_id), or None if invalid or encoded
+        for another sort key
     """
     if not cursor:
         return None
@@ -42,7 +45,59 @@ def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
     try:
         cursor_json = base64.b64decode(cursor.encode()).decode()
         cursor_data = json.loads(cursor_json)
-        return cursor_data["updated_at"], cursor_data["id"]
+        return cursor_data[key], cursor_data["id"]
+    except Exception:
+        return None
+
+
+def parse_sort(sort: Optional[str], default: str = "-updated_at") -> Tuple[str, bool]:
+    """
+    Parse a sort parameter such as "title" or "-updated_at".
+
+    Args:
+        sort: Sort key, prefixed with "-" for descending order
+        default: Used when sort is empty
+
+    Returns:
+        Tuple of (key, descending)
+    """
+    sort = (sort or default).strip()
+    if sort.startswith("-"):
+        return sort[1:], True
+    return sort, False
+
+
+def encode_rank_cursor(rank: float, item_id: str) -> str:
+    """
+    Encode a cursor for relevance-ranked results.
+
+    Args:
+        rank: Relevance score of the last item (higher is better)
+        item_id: Item ID (ULID)
+
+    Returns:
+        Base64-encoded cursor string
+    """
+    cursor_json = json.dumps({"rank": rank, "id": item_id})
+    return base64.b64encode(cursor_json.encode()).decode()
+
+
+def decode_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    """
+    Decode a cursor for relevance-ranked results.
+
+    Args:
+        cursor: Base64-encoded cursor string
+
+    Returns:
+        Tuple of (rank, item_id) or None if invalid
+    """
+    if not cursor:
+        return None
+
+    try:
+        cursor_data = json.loads(base64.b64decode(cursor.encode()).decode())
+        return float(cursor_data["rank"]), cursor_data["id"]
     except Exception:
         return None
 
@@ -0,0 +1,53 @@
+"""
+Trigram sets and similarity for typo-tolerant search.
+
+Follows PostgreSQL's pg_trgm: text is lowercased and split into words of
+letters and digits, each word is padded with two spaces in front and one
+behind, and similarity is the Jaccard index of the two trigram sets.
+"""
+import re
+from typing import Iterable, Set
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Get the trigrams of a text.
+
+    Args:
+        text: Any text
+
+    Returns:
+        Set of three-character strings
+    """
+    result = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def trigrams_of(texts: Iterable[str]) -> Set[str]:
+    """Get the union of the trigrams of several texts."""
+    result = set()
+    for text in texts:
+        result |= trigrams(text)
+    return result
+
+
+def similarity(query: Set[str], other: Set[str]) -> float:
+    """
+    Jaccard similarity of two trigram sets.
+
+    Args:
+        query: Trigrams of the query
+        other: Trigrams of the text compared against
+
+    Returns:
+        Similarity between 0.0 and 1.0
+    """
+    if not query or not other:
+        return 0.0
+    shared = len(query & other)
+    return shared / (len(query) + len(other) - shared)
@@ -125,6 +125,65 @@ GIT_REPO_ROOT = os.environ.get('STORAGE_ROOT', os.environ.get('GIT_REPO_ROOT', B
 # INDEX_LOCK_PATH = Path(GIT_REPO_ROOT) / '.promptmeta' / 'index.lock'
 SCHEMA_DIR = BASE_DIR / 'schemas'
 
+# Format for prompt/template metadata files: 'yaml' (human-friendly) or 'json' (fast)
+METADATA_FORMAT = os.environ.get('METADATA_FORMAT', 'yaml')
+
+# Max parsed metadata files kept in the per-process cache
+METADATA_CACHE_SIZE = int(os.environ.get('METADATA_CACHE_SIZE', 4096))
+
+# Store version bodies once in a compressed, content-addressed blob store
+VERSION_BLOB_STORE = os.environ.get('VERSION_BLOB_STORE', 'False') == 'True'
+VERSION_BLOB_COMPRESSION_LEVEL = int(os.environ.get('VERSION_BLOB_COMPRESSION_LEVEL', 6))
+
+# Store up to this many consecutive versions as line deltas before writing a
+# full snapshot (0 disables deltas); reconstructed bodies are cached per process
+VERSION_DELTA_CHAIN_LENGTH = int(os.environ.get('VERSION_DELTA_CHAIN_LENGTH', 0))
+VERSION_CACHE_SIZE = int(os.environ.get('VERSION_CACHE_SIZE', 1024))
+
+# Max prompts/templates whose metadata + HEAD version (the /content endpoints)
+# are kept in the per-process cache
+HEAD_CACHE_SIZE = int(os.environ.get('HEAD_CACHE_SIZE', 1024))
+
+# Index rebuild: parser processes (0 = CPU count) and batch size for parsing/bulk inserts
+INDEX_REBUILD_WORKERS = int(os.environ.get('INDEX_REBUILD_WORKERS', 0))
+INDEX_REBUILD_CHUNK_SIZE = int(os.environ.get('INDEX_REBUILD_CHUNK_SIZE', 1000))
+
+# Filesystem watcher keeping the index in sync with external edits
+# (or run `manage.py watch_index`); polling is used where inotify is unavailable
+INDEX_WATCHER_AUTOSTART = os.environ.get('INDEX_WATCHER_AUTOSTART', 'False') == 'True'
+INDEX_WATCHER_DEBOUNCE = float(os.environ.get('INDEX_WATCHER_DEBOUNCE', 0.5))
+INDEX_WATCHER_POLL_INTERVAL = float(os.environ.get('INDEX_WATCHER_POLL_INTERVAL', 5.0))
+
+# Write-behind index updates: storage writes queue their index changes, which
+# are coalesced per item and flushed in batches every INTERVAL seconds or at
+# BATCH pending items (index reads flush first)
+INDEX_WRITE_BEHIND = os.environ.get('INDEX_WRITE_BEHIND', 'False') == 'True'
+INDEX_WRITE_BEHIND_INTERVAL = float(os.environ.get('INDEX_WRITE_BEHIND_INTERVAL', 0.5))
+INDEX_WRITE_BEHIND_BATCH = int(os.environ.get('INDEX_WRITE_BEHIND_BATCH', 500))
+
+# Search and facet results kept per process; entries are dropped as soon as
+# any process writes to the index
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 256))
+
+# Fuzzy search (fuzzy=1): minimum trigram similarity of a match, and how many
+# of the items sharing the most trigrams with the query are scored
+FUZZY_SEARCH_THRESHOLD = float(os.environ.get('FUZZY_SEARCH_THRESHOLD', 0.3))
+FUZZY_SEARCH_CANDIDATES = int(os.environ.get('FUZZY_SEARCH_CANDIDATES', 200))
+
+# Similarity search (/v1/search/similar): hashed bag-of-words vectors kept in
+# <storage root>/.vectors. A chat's vector covers its first CHAT_MESSAGES
+# messages; changing DIMENSIONS needs a rebuild_index
+VECTOR_SEARCH_ENABLED = os.environ.get('VECTOR_SEARCH_ENABLED', 'False') == 'True'
+VECTOR_DIMENSIONS = int(os.environ.get('VECTOR_DIMENSIONS', 256))
+VECTOR_CHAT_MESSAGES = int(os.environ.get('VECTOR_CHAT_MESSAGES', 10))
+
+# Near-duplicate detection (/v1/duplicates, check_duplicates): MinHash signatures
+# of item content, computed on index writes only when enabled; enabling it
+# needs a rebuild_index. THRESHOLD is the minimum estimated content similarity
+# (Jaccard of word 3-shingles) for two items to count as duplicates
+DUPLICATE_DETECTION_ENABLED = os.environ.get('DUPLICATE_DETECTION_ENABLED', 'False') == 'True'
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.8))
+
 # CORS settings for local development
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = False
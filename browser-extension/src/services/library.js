@@ -24,27 +24,14 @@ export async function fetchItemDetail(id, type) {
   const config = await getConfig();
   const endpoint = type === 'template' ? 'templates' : 'prompts';
 
-  const meta = await getJson(`${config.apiUrl}/${endpoint}/${id}`);
-
-  let content = '';
-  let variables = [];
-
-  try {
-    const versions = await getJson(`${config.apiUrl}/${endpoint}/${id}/versions`);
-    if (versions.versions?.length) {
-      const latestId = versions.versions[0].id;
-      const versionData = await getJson(`${config.apiUrl}/${endpoint}/${id}/versions/${latestId}`);
-      content = versionData.content || '';
-      variables = versionData.variables || [];
-    }
-  } catch (error) {
-    console.error('[LibraryService] Failed to load versions', error);
-  }
+  // Metadata and HEAD content in one request; the server's ETag lets the
+  // browser cache revalidate it without re-downloading unchanged content
+  const item = await getJson(`${config.apiUrl}/${endpoint}/${id}/content`);
 
   return {
-    ...meta,
+    ...item,
     type,
-    content,
-    variables,
+    content: item.content || '',
+    variables: item.variables || [],
   };
 }